@@ -3,8 +3,14 @@
 Minimal dummy MCP-like stdio server for testing.
 
 This script implements a very small JSON-RPC-over-stdio server that responds to:
+- method "initialize" -> protocol handshake (server info and capabilities)
 - method "mcp.list_tools" -> returns a list of available tools
 - method "dummy.echo" -> echoes back provided params
+- method "dummy.sleep" -> replies after params["seconds"], without blocking other requests
+
+Messages are newline-delimited JSON. If the client offers Content-Length framing in
+initialize (capabilities.experimental.framing), the server accepts it and frames all
+later responses that way; incoming messages may use either form.
 
 Note: This is a lightweight dummy for local integration tests with
 [`osae-ide/agent-server/mcp_client.py:325`](osae-ide/agent-server/mcp_client.py:325).
@@ -19,13 +25,26 @@ from typing import Any, Dict
 TOOLS = [
     {"name": "dummy.echo", "description": "Echo tool that returns provided arguments"},
     {"name": "dummy.ping", "description": "Ping tool that returns 'pong'"},
+    {"name": "dummy.sleep", "description": "Sleep for `seconds` on a worker thread, then reply (responses may arrive out of order)"},
 ]
 
+CONTENT_LENGTH = "content-length"
+
+_stdout_lock = threading.Lock()
+# Set once the client has agreed to Content-Length framing during initialize
+_framed = threading.Event()
+
 
 def send_response(resp: Dict[str, Any]) -> None:
-    """Write a JSON-RPC response object to stdout (newline-delimited) and flush."""
-    sys.stdout.write(json.dumps(resp, separators=(",", ":")) + "\n")
-    sys.stdout.flush()
+    """Write a JSON-RPC response object to stdout (framed or newline-delimited) and flush."""
+    body = json.dumps(resp, separators=(",", ":")).encode("utf-8")
+    if _framed.is_set():
+        data = b"Content-Length: %d\r\n\r\n" % len(body) + body
+    else:
+        data = body + b"\n"
+    with _stdout_lock:
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
 
 
 def handle_request(req: Dict[str, Any]) -> None:
@@ -38,6 +57,23 @@ def handle_request(req: Dict[str, Any]) -> None:
     resp: Dict[str, Any] = {"jsonrpc": "2.0", "id": req_id}
 
     try:
+        if method == "initialize":
+            # Protocol handshake: clients wait for this before sending requests
+            offered = (((params or {}).get("capabilities") or {}).get("experimental") or {}).get("framing") or []
+            capabilities: Dict[str, Any] = {"tools": {}}
+            if CONTENT_LENGTH in offered:
+                capabilities["experimental"] = {"framing": [CONTENT_LENGTH]}
+            resp["result"] = {
+                "protocolVersion": "2024-11-05",
+                "capabilities": capabilities,
+                "serverInfo": {"name": "dummy", "version": "0.0.1"},
+            }
+            # the initialize reply itself is still newline-delimited
+            send_response(resp)
+            if CONTENT_LENGTH in offered:
+                _framed.set()
+            return
+
         if method == "mcp.list_tools":
             resp["result"] = TOOLS
             send_response(resp)
@@ -54,6 +90,17 @@ def handle_request(req: Dict[str, Any]) -> None:
             send_response(resp)
             return
 
+        if method in ("dummy.sleep", "dummy:sleep"):
+            seconds = float((params or {}).get("seconds", 0.1))
+
+            def _reply_later() -> None:
+                time.sleep(seconds)
+                resp["result"] = {"slept": seconds}
+                send_response(resp)
+
+            threading.Thread(target=_reply_later, daemon=True).start()
+            return
+
         # Unknown method -> JSON-RPC error
         resp["error"] = {"code": -32601, "message": f"Method not found: {method}"}
         send_response(resp)
@@ -62,17 +109,31 @@ def handle_request(req: Dict[str, Any]) -> None:
         send_response({"jsonrpc": "2.0", "id": req_id, "error": err})
 
 
+def read_message(stream) -> Any:
+    """Read one message body from a binary stream: a Content-Length frame or one line. None at EOF."""
+    line = stream.readline()
+    if not line:
+        return None
+    if line[:15].lower() == b"content-length:":
+        length = int(line.split(b":", 1)[1].strip() or 0)
+        while True:
+            header = stream.readline()
+            if not header or header in (b"\r\n", b"\n"):
+                break
+        return stream.read(length)
+    return line.strip()
+
+
 def stdin_reader(stop_event: threading.Event) -> None:
     """
-    Read newline-delimited JSON messages from stdin.
-    Each line is expected to be a complete JSON-RPC object.
+    Read JSON messages from stdin, newline-delimited or Content-Length framed.
+    Each message is expected to be a complete JSON-RPC object or batch.
     """
     while not stop_event.is_set():
-        line = sys.stdin.readline()
-        if not line:
+        line = read_message(sys.stdin.buffer)
+        if line is None:
             # EOF
             break
-        line = line.strip()
         if not line:
             continue
         try:
@@ -4,6 +4,7 @@ import json
 from langchain_core.messages import HumanMessage, AIMessage
 from llm import get_llm
 from state import AgentState
+from tools.affected_tests import get_impact_analyzer
 
 def drafter_node(state: AgentState) -> AgentState:
     """
@@ -30,12 +31,27 @@ def drafter_node(state: AgentState) -> AgentState:
         except Exception:
             step = ""
 
+    # When files were edited earlier in this task, suggest running only the affected tests
+    verification = ""
+    changed = state.get("changed_files") or []
+    if changed:
+        try:
+            selection = get_impact_analyzer().test_command(changed)
+            if selection.get("command"):
+                verification = (
+                    "\n\nIf this step verifies the changes, prefer this minimal test command "
+                    f"({selection.get('reason')}): {selection['command']}"
+                )
+        except Exception:
+            verification = ""
+
     prompt = HumanMessage(content=(
         "Draft a sequence of tool calls (JSON only) that, when executed, will "
         f"accomplish the following specific step:\n\n{step}\n\n"
         "Return a JSON object with a single key 'tool_calls' whose value is a list "
         "of calls. Each call must be an object with 'name' (the tool name) and "
         "'args' (an object of named arguments). Only return the JSON object, no extra text."
+        + verification
     ))
 
     messages = state.get("messages", [])
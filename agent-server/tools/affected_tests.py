@@ -0,0 +1,287 @@
+"""Test impact analysis: pick the tests affected by the files changed in a task."""
+import ast
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from utils.repo_map import get_repo_map_service
+
+ROOT = os.getcwd()
+
+PY_EXTS = {".py"}
+JS_EXTS = {".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx"}
+_PY_TEST_RE = re.compile(r"(^|/)(test_[^/]*|[^/]*_test)\.py$")
+_JS_TEST_RE = re.compile(r"\.(test|spec)\.(js|jsx|mjs|cjs|ts|tsx)$")
+_JS_IMPORT_RE = re.compile(r"""(?:import\s[^'"]*?from\s*|import\s*\(?\s*|require\s*\(\s*)['"](\.{1,2}/[^'"]+)['"]""")
+# Changed files with these extensions never affect test results
+_NON_CODE_EXTS = {".md", ".txt", ".rst", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".lock"}
+# While the file list is unchanged only the changed files are re-statted; a full
+# revalidation of every import list happens at most this often
+GRAPH_REVALIDATE_SECONDS = 30.0
+
+
+def _is_test(rel: str) -> bool:
+    return bool(_PY_TEST_RE.search(rel) or _JS_TEST_RE.search(rel))
+
+
+def _py_imports(text: str, rel: str) -> List[str]:
+    """Return dotted module names imported by a Python file (relative imports resolved against rel)."""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return []
+    pkg_parts = rel[:-3].split("/")[:-1]
+    names: List[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(a.name for a in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base_parts = pkg_parts[: len(pkg_parts) - (node.level - 1)] if node.level > 1 else pkg_parts
+                base = ".".join(base_parts + ([node.module] if node.module else []))
+            else:
+                base = node.module or ""
+            if base:
+                names.append(base)
+            for a in node.names:
+                if a.name != "*":
+                    names.append(f"{base}.{a.name}" if base else a.name)
+    return names
+
+
+class ImpactAnalyzer:
+    """
+    Map test files to the source files they (transitively) import and select the
+    tests affected by a set of changed files.
+
+    Import lists are cached per file version (mtime, size) and only re-parsed when a
+    file changes. The import graph is kept between calls and only the changed files
+    are re-read while the (gitignore-filtered) file list stays the same. Optional coverage.py data (.coverage with per-test contexts) adds
+    test -> file edges that static imports miss; it is reloaded when its mtime changes.
+    """
+
+    def __init__(self) -> None:
+        # rel path -> ((mtime_ns, size), raw import specifiers)
+        self._imports: Dict[str, Tuple[Tuple[int, int], Tuple[str, ...]]] = {}
+        self._coverage: Tuple[Optional[int], Dict[str, Set[str]]] = (None, {})
+        # (root, files, dotted module index, built at, graph) from the last full build
+        self._graph: Optional[Tuple[str, List[str], Dict[str, List[str]], float, Dict[str, Set[str]]]] = None
+        self._lock = threading.Lock()
+
+    def _raw_imports(self, root: str, rel: str) -> Tuple[str, ...]:
+        full = os.path.join(root, rel)
+        try:
+            st = os.stat(full)
+        except OSError:
+            return ()
+        version = (st.st_mtime_ns, st.st_size)
+        cached = self._imports.get(rel)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        try:
+            with open(full, "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+        except OSError:
+            return ()
+        if rel.endswith(".py"):
+            specs = tuple(_py_imports(text, rel))
+        else:
+            specs = tuple(_JS_IMPORT_RE.findall(text))
+        self._imports[rel] = (version, specs)
+        return specs
+
+    def _coverage_map(self, root: str) -> Dict[str, Set[str]]:
+        """Read test -> covered files from coverage.py data recorded with dynamic contexts."""
+        path = os.path.join(root, ".coverage")
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return {}
+        if self._coverage[0] == mtime:
+            return self._coverage[1]
+        mapping: Dict[str, Set[str]] = {}
+        try:
+            con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                rows = con.execute(
+                    "SELECT context.context, file.path FROM line_bits "
+                    "JOIN context ON context.id = line_bits.context_id "
+                    "JOIN file ON file.id = line_bits.file_id"
+                ).fetchall()
+            finally:
+                con.close()
+            for ctx, fpath in rows:
+                # pytest-cov contexts look like "tests/test_x.py::test_name|run"
+                test_file = (ctx or "").split("::", 1)[0]
+                if not test_file:
+                    continue
+                rel = os.path.relpath(fpath, root).replace(os.sep, "/") if os.path.isabs(fpath) else fpath
+                mapping.setdefault(test_file, set()).add(rel)
+        except sqlite3.Error:
+            mapping = {}
+        self._coverage = (mtime, mapping)
+        return mapping
+
+    def _edges(self, root: str, rel: str, modules: Dict[str, List[str]], file_set: Set[str]) -> Set[str]:
+        """Resolve the imports of rel to files in the repository."""
+
+        def resolve_py(name: str) -> Optional[str]:
+            cands = modules.get(name)
+            if not cands:
+                return None
+            if len(cands) == 1:
+                return cands[0]
+            # prefer the candidate sharing the longest directory prefix with the importer
+            return max(cands, key=lambda c: len(os.path.commonprefix([c, rel])))
+
+        def resolve_js(spec: str) -> Optional[str]:
+            base = os.path.normpath(os.path.join(os.path.dirname(rel), spec)).replace(os.sep, "/")
+            for cand in [base] + [base + ext for ext in JS_EXTS] + [f"{base}/index{ext}" for ext in JS_EXTS]:
+                if cand in file_set:
+                    return cand
+            return None
+
+        deps: Set[str] = set()
+        for spec in self._raw_imports(root, rel):
+            target = resolve_py(spec) if rel.endswith(".py") else resolve_js(spec)
+            if target and target != rel:
+                deps.add(target)
+        return deps
+
+    def _build_graph(self, root: str, changed: Set[str]) -> Tuple[List[str], Dict[str, Set[str]]]:
+        files = [f for f in get_repo_map_service().list_files(root, respect_gitignore=True)
+                 if os.path.splitext(f)[1].lower() in PY_EXTS | JS_EXTS]
+        file_set = set(files)
+
+        now = time.monotonic()
+        state = self._graph
+        if state is not None and state[0] == root and state[1] == files and now - state[3] < GRAPH_REVALIDATE_SECONDS:
+            # same file list: only the changed files can have new imports
+            modules, graph = state[2], state[4]
+            for rel in changed & file_set:
+                graph[rel] = self._edges(root, rel, modules, file_set)
+            return files, graph
+
+        # dotted-suffix index so both package imports and sys.path-relative imports resolve
+        modules: Dict[str, List[str]] = {}
+        for rel in files:
+            if not rel.endswith(".py"):
+                continue
+            parts = rel[:-3].split("/")
+            if parts[-1] == "__init__":
+                parts = parts[:-1]
+            for i in range(len(parts)):
+                modules.setdefault(".".join(parts[i:]), []).append(rel)
+
+        graph = {rel: self._edges(root, rel, modules, file_set) for rel in files}
+        # drop cache entries for deleted files
+        for gone in [p for p in self._imports if p not in file_set]:
+            del self._imports[gone]
+        self._graph = (root, files, modules, now, graph)
+        return files, graph
+
+    def affected_tests(self, changed_files: List[str], root: Optional[str] = None) -> Dict[str, object]:
+        """
+        Return {"tests": [...], "full_suite": bool, "unreached": [...], "reason": str} for the
+        changed files. full_suite is True when a changed source file is not reached by any
+        known test; unreached lists those files.
+        """
+        root = os.path.abspath(root or ROOT)
+        changed = {os.path.normpath(c).replace(os.sep, "/") for c in changed_files if c}
+        changed = {c for c in changed if os.path.splitext(c)[1].lower() not in _NON_CODE_EXTS}
+        if not changed:
+            return {"tests": [], "full_suite": False, "unreached": [], "reason": "no code files changed"}
+
+        with self._lock:
+            files, graph = self._build_graph(root, changed)
+            coverage = self._coverage_map(root)
+
+        tests = [f for f in files if _is_test(f)]
+        selected: Set[str] = set()
+        reached: Set[str] = set()
+        for t in tests:
+            seen: Set[str] = {t}
+            stack = [t]
+            while stack:
+                for dep in graph.get(stack.pop(), ()):
+                    if dep not in seen:
+                        seen.add(dep)
+                        stack.append(dep)
+            seen |= coverage.get(t, set())
+            hit = seen & changed
+            if hit:
+                selected.add(t)
+                reached |= hit
+
+        unreached = sorted(c for c in changed if c not in reached and c in graph and not _is_test(c))
+        if unreached:
+            return {
+                "tests": sorted(selected),
+                "full_suite": True,
+                "unreached": unreached,
+                "reason": f"no test imports {', '.join(unreached[:5])}; run the full suite",
+            }
+        return {
+            "tests": sorted(selected),
+            "full_suite": False,
+            "unreached": [],
+            "reason": f"{len(selected)} affected test file(s)",
+        }
+
+    def test_command(self, changed_files: List[str], root: Optional[str] = None) -> Dict[str, object]:
+        """
+        Build a minimal verification command for the changed files. A language whose
+        changed sources no test reaches gets its whole suite; the other keeps its selected tests.
+        """
+        result = self.affected_tests(changed_files, root)
+        tests: List[str] = result["tests"]  # type: ignore[assignment]
+        unreached: List[str] = result["unreached"]  # type: ignore[assignment]
+        py = [t for t in tests if t.endswith(".py")]
+        js = [t for t in tests if not t.endswith(".py")]
+        full_py = any(os.path.splitext(u)[1].lower() in PY_EXTS for u in unreached)
+        full_js = any(os.path.splitext(u)[1].lower() in JS_EXTS for u in unreached)
+        commands: List[str] = []
+        if full_py:
+            commands.append("python -m pytest -q")
+        elif py:
+            commands.append("python -m pytest -q " + " ".join(py))
+        if full_js:
+            commands.append(_js_runner(root or ROOT))
+        elif js:
+            commands.append(f"{_js_runner(root or ROOT)} " + " ".join(js))
+        result["command"] = " && ".join(commands)
+        return result
+
+
+def _js_runner(root: str) -> str:
+    try:
+        with open(os.path.join(root, "package.json"), "r", encoding="utf-8") as f:
+            pkg = json.load(f)
+    except (OSError, ValueError):
+        return "npx jest"
+    deps = {**(pkg.get("dependencies") or {}), **(pkg.get("devDependencies") or {})}
+    return "npx vitest run" if "vitest" in deps else "npx jest"
+
+
+_analyzer: Optional[ImpactAnalyzer] = None
+_analyzer_lock = threading.Lock()
+
+
+def get_impact_analyzer() -> ImpactAnalyzer:
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            _analyzer = ImpactAnalyzer()
+        return _analyzer
+
+
+def select_tests(changed_files: Optional[List[str]] = None) -> str:
+    """
+    Return a JSON object {"command", "tests", "full_suite", "unreached", "reason"} with the minimal test
+    command covering the given changed files (paths relative to the workspace).
+    """
+    return json.dumps(get_impact_analyzer().test_command(changed_files or []))
@@ -0,0 +1,289 @@
+"""Diff-based edit tool: validate and atomically apply multi-file patches inside the sandbox."""
+import difflib
+import os
+import re
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from langchain_core.tools import tool
+
+from tools.fs import validate_path
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class _FileState:
+    """In-memory view of one file while a patch is being validated."""
+
+    def __init__(self, path: str, full: str):
+        self.path = path
+        self.full = full
+        self.existed = os.path.isfile(full)
+        self.original: Optional[str] = None
+        if self.existed:
+            with open(full, "r", encoding="utf-8", newline="") as f:
+                self.original = f.read()
+        # None means the file is deleted by the patch
+        self.content: Optional[str] = self.original
+
+
+def _strip_prefix(p: str) -> str:
+    p = p.split("\t", 1)[0].strip()
+    if p.startswith("a/") or p.startswith("b/"):
+        return p[2:]
+    return p
+
+
+def _hunk_complete(hunk: Dict) -> bool:
+    old = sum(1 for tag, _ in hunk["lines"] if tag in (" ", "-"))
+    new = sum(1 for tag, _ in hunk["lines"] if tag in (" ", "+"))
+    return old >= hunk["old_count"] and new >= hunk["new_count"]
+
+
+def _parse_unified_diff(patch: str) -> List[Dict]:
+    """
+    Parse a (multi-file) unified diff into
+    [{"old": path|None, "new": path|None,
+      "hunks": [{"old_start": int, "old_count": int, "new_count": int, "lines": [(tag, text)]}]}].
+    """
+    files: List[Dict] = []
+    current: Optional[Dict] = None
+    hunk: Optional[Dict] = None
+    lines = patch.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+            old = _strip_prefix(line[4:])
+            new = _strip_prefix(lines[i + 1][4:])
+            current = {
+                "old": None if old == "/dev/null" else old,
+                "new": None if new == "/dev/null" else new,
+                "hunks": [],
+            }
+            files.append(current)
+            hunk = None
+            i += 2
+            continue
+        m = _HUNK_RE.match(line)
+        if m:
+            if current is None:
+                raise ValueError("Hunk found before a '---'/'+++' file header")
+            # an omitted count means one line
+            hunk = {
+                "old_start": int(m.group(1)),
+                "old_count": int(m.group(2)) if m.group(2) is not None else 1,
+                "new_count": int(m.group(4)) if m.group(4) is not None else 1,
+                "lines": [],
+            }
+            current["hunks"].append(hunk)
+        elif hunk is not None and line[:1] in (" ", "-", "+"):
+            hunk["lines"].append((line[0], line[1:]))
+        elif hunk is not None and line.startswith("\\"):
+            # "\ No newline at end of file" applies to the preceding line
+            hunk["lines"].append(("\\", ""))
+        elif hunk is not None and line == "" and not _hunk_complete(hunk):
+            # Some generators drop the leading space on empty context lines; a blank
+            # line after a complete hunk is only a separator
+            hunk["lines"].append((" ", ""))
+        i += 1
+    if not files:
+        raise ValueError("No file headers ('--- a/path' / '+++ b/path') found in patch")
+    return files
+
+
+def _find_block(lines: List[str], block: List[str], hint: int) -> int:
+    """Locate block in lines, preferring the position closest to hint. Returns -1 if absent."""
+    if not block:
+        return max(0, min(hint, len(lines)))
+    n = len(block)
+    last = len(lines) - n
+    if last < 0:
+        return -1
+    hint = max(0, min(hint, last))
+    for delta in range(0, max(hint, last - hint) + 1):
+        for pos in (hint - delta, hint + delta):
+            if 0 <= pos <= last and lines[pos:pos + n] == block:
+                return pos
+    return -1
+
+
+def _apply_hunks(fs: _FileState, hunks: List[Dict]) -> None:
+    text = fs.content or ""
+    newline = "\r\n" if "\r\n" in text else "\n"
+    lines = text.split(newline)
+    eof_newline = True
+    if lines and lines[-1] == "":
+        lines.pop()
+    elif text:
+        eof_newline = False
+
+    shift = 0
+    for n, h in enumerate(hunks, start=1):
+        old_block: List[str] = []
+        new_block: List[str] = []
+        prev = None
+        for tag, body in h["lines"]:
+            if tag == "\\":
+                if prev in ("+", " "):
+                    eof_newline = False
+                elif prev == "-":
+                    eof_newline = True
+                continue
+            if tag in (" ", "-"):
+                old_block.append(body)
+            if tag in (" ", "+"):
+                new_block.append(body)
+            prev = tag
+        if len(old_block) != h["old_count"] or len(new_block) != h["new_count"]:
+            raise ValueError(
+                f"Hunk {n} for {fs.path} has {len(old_block)} old / {len(new_block)} new lines "
+                f"but its header says {h['old_count']} / {h['new_count']}"
+            )
+        # a hunk without old lines inserts after line old_start
+        hint = (h["old_start"] if not old_block else max(0, h["old_start"] - 1)) + shift
+        pos = _find_block(lines, old_block, hint)
+        if pos < 0:
+            raise ValueError(f"Hunk {n} does not match the current content of {fs.path}")
+        lines[pos:pos + len(old_block)] = new_block
+        shift += len(new_block) - len(old_block)
+
+    out = newline.join(lines)
+    if lines and eof_newline:
+        out += newline
+    fs.content = out
+
+
+def _apply_search_replace(fs: _FileState, search: str, replace: str) -> None:
+    if fs.content is None:
+        if search:
+            raise ValueError(f"File does not exist: {fs.path}")
+        fs.content = replace
+        return
+    if not search:
+        raise ValueError(f"Empty 'search' is only allowed when creating a new file: {fs.path}")
+    count = fs.content.count(search)
+    if count == 0:
+        raise ValueError(f"Search block not found in {fs.path}")
+    if count > 1:
+        raise ValueError(f"Search block matches {count} locations in {fs.path}; add more context")
+    fs.content = fs.content.replace(search, replace, 1)
+
+
+def _stage(states: Dict[str, _FileState], path: str) -> _FileState:
+    full = validate_path(path)
+    st = states.get(full)
+    if st is None:
+        st = _FileState(path, full)
+        states[full] = st
+    return st
+
+
+def _write_temp(full: str, content: str) -> str:
+    parent = os.path.dirname(full)
+    os.makedirs(parent, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=parent, prefix=".patch-")
+    with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+        f.write(content)
+    return tmp
+
+
+def _commit(states: List[_FileState]) -> None:
+    """Write every staged file via temp file + rename; restore all originals on any failure."""
+    temps: Dict[str, str] = {}
+    done: List[_FileState] = []
+    try:
+        for st in states:
+            if st.content is not None:
+                temps[st.full] = _write_temp(st.full, st.content)
+        for st in states:
+            if st.content is None:
+                os.remove(st.full)
+            else:
+                if st.existed:
+                    try:
+                        os.chmod(temps[st.full], os.stat(st.full).st_mode & 0o7777)
+                    except OSError:
+                        pass
+                os.replace(temps.pop(st.full), st.full)
+            done.append(st)
+    except Exception as exc:
+        for st in reversed(done):
+            try:
+                if st.existed:
+                    os.replace(_write_temp(st.full, st.original or ""), st.full)
+                elif os.path.exists(st.full):
+                    os.remove(st.full)
+            except OSError:
+                pass
+        for tmp in temps.values():
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        raise ValueError(f"Failed to apply patch, all changes rolled back: {exc}")
+
+
+@tool
+def apply_patch(patch: str = "", edits: Optional[List[Dict[str, str]]] = None) -> Dict:
+    """
+    Apply edits to one or more files atomically instead of rewriting whole files.
+
+    - patch: a unified diff (as produced by `git diff` / `diff -u`); may cover several files,
+      create files ('--- /dev/null') and delete files ('+++ /dev/null').
+    - edits: a list of search/replace blocks: {"path": str, "search": str, "replace": str}.
+      The search text must occur exactly once; an empty search creates a new file.
+
+    Every change is validated against the current file content before anything is
+    written. Files are then replaced via temp file + rename, and all files are
+    restored if any write fails. Returns {"files": [{"path", "action", "diff"}]}.
+    """
+    if not patch and not edits:
+        raise ValueError("Provide a unified diff in 'patch' and/or search/replace blocks in 'edits'")
+
+    states: Dict[str, _FileState] = {}
+    try:
+        if patch:
+            for fp in _parse_unified_diff(patch):
+                if fp["new"] is None:
+                    st = _stage(states, fp["old"])
+                    if st.content is None:
+                        raise ValueError(f"Cannot delete missing file: {st.path}")
+                    st.content = None
+                    continue
+                if fp["old"] is not None and fp["old"] != fp["new"]:
+                    raise ValueError(f"Renames are not supported: {fp['old']} -> {fp['new']}")
+                st = _stage(states, fp["new"])
+                if fp["old"] is None:
+                    if st.content is not None:
+                        raise ValueError(f"File already exists: {st.path}")
+                    st.content = ""
+                elif st.content is None:
+                    raise ValueError(f"File does not exist: {st.path}")
+                _apply_hunks(st, fp["hunks"])
+        for e in edits or []:
+            if not isinstance(e, dict) or not e.get("path"):
+                raise ValueError("Each edit must be an object with 'path', 'search' and 'replace'")
+            st = _stage(states, e["path"])
+            _apply_search_replace(st, e.get("search") or "", e.get("replace") or "")
+    except OSError as exc:
+        raise ValueError(f"Error reading files for patch: {exc}")
+
+    changed = [st for st in states.values() if st.content != st.original]
+    _commit(changed)
+
+    files: List[Dict[str, str]] = []
+    for st in changed:
+        if st.content is None:
+            action = "deleted"
+        elif not st.existed:
+            action = "created"
+        else:
+            action = "modified"
+        diff = "".join(difflib.unified_diff(
+            (st.original or "").splitlines(keepends=True),
+            (st.content or "").splitlines(keepends=True),
+            fromfile=f"a/{st.path}" if st.existed else "/dev/null",
+            tofile=f"b/{st.path}" if st.content is not None else "/dev/null",
+        ))
+        files.append({"path": st.path, "action": action, "diff": diff})
+    return {"files": files}
@@ -1,49 +1,190 @@
 from pathlib import Path
+from collections import deque
+import json
 import subprocess
-from typing import Optional
+import threading
+from typing import Callable, Deque, List, Optional, Tuple
+
+from config import get_settings
+from tools.process_manager import get_process_manager, kill_process_tree, new_process_group_kwargs
+from tools.shell_session import get_shell_sessions, sessions_supported
 
 PROJECT_ROOT = Path("c:/projects/June-Extension")
 
 
-def run_command(command: str, background: bool = False) -> str:
+class _OutputCapture:
+    """
+    Keep the first head_bytes and the last tail_bytes (UTF-8) of a command's output.
+    Everything in between is counted but dropped, so memory stays bounded.
+    """
+
+    def __init__(self, head_bytes: int, tail_bytes: int):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head: List[str] = []
+        self.head_size = 0
+        # set on the first line that does not fit the head; later lines all go to the tail
+        self.head_done = False
+        self.tail: Deque[Tuple[str, int]] = deque()
+        self.tail_size = 0
+        self.omitted_lines = 0
+        self.omitted_bytes = 0
+
+    def add(self, line: str) -> None:
+        data = line.encode("utf-8", errors="replace")
+        size = len(data)
+        if not self.head_done:
+            if self.head_size + size <= self.head_bytes:
+                self.head.append(line)
+                self.head_size += size
+                return
+            self.head_done = True
+        if size > self.tail_bytes:
+            # a single line larger than the tail keeps its end, where errors usually are
+            self.omitted_bytes += size - self.tail_bytes
+            data = data[size - self.tail_bytes:]
+            line = data.decode("utf-8", errors="ignore")
+            size = len(data)
+        self.tail.append((line, size))
+        self.tail_size += size
+        while self.tail and self.tail_size > self.tail_bytes:
+            _, dropped = self.tail.popleft()
+            self.tail_size -= dropped
+            self.omitted_lines += 1
+            self.omitted_bytes += dropped
+
+    def text(self) -> str:
+        out = "".join(self.head)
+        if self.omitted_bytes:
+            lines = f"{self.omitted_lines} lines / " if self.omitted_lines else ""
+            out += f"\n... [{lines}{self.omitted_bytes} bytes of output omitted] ...\n"
+        return out + "".join(line for line, _ in self.tail)
+
+
+def _run_in_session(
+    session_id: str,
+    command: str,
+    limit: float,
+    capture: "_OutputCapture",
+    err_capture: "_OutputCapture",
+    on_output: Optional[Callable[[str], None]],
+) -> str:
+    """Run command in the task's persistent shell so cwd and environment carry over between commands."""
+    try:
+        session = get_shell_sessions().get(session_id, cwd=str(PROJECT_ROOT))
+    except Exception as e:
+        return f"Command failed: {e}"
+
+    def _on_line(stream: str, line: str) -> None:
+        (capture if stream == "stdout" else err_capture).add(line if line.endswith("\n") else line + "\n")
+        if on_output is not None:
+            try:
+                on_output(line.rstrip("\n"))
+            except Exception:
+                pass
+
+    exit_code, timed_out = session.run(command, limit, _on_line)
+    if timed_out:
+        return f"Command timed out after {limit:g} seconds (shell session restarted).\n{capture.text()}{err_capture.text()}"
+    out = capture.text() + err_capture.text()
+    if exit_code:
+        out += f"[exit code {exit_code}]\n"
+    return out
+
+
+def run_command(
+    command: str,
+    background: bool = False,
+    timeout: Optional[float] = None,
+    on_output: Optional[Callable[[str], None]] = None,
+    session_id: Optional[str] = None,
+) -> str:
     """
     Run a shell command in the project root directory.
 
-    - If background is False, runs subprocess.run with a 60s timeout and returns combined stdout+stderr.
-    - If background is True, starts subprocess.Popen and returns an immediate confirmation with the PID.
+    - If background is False, streams combined stdout+stderr line by line (to on_output when given)
+      and returns it with only the head and tail kept. The timeout defaults to COMMAND_TIMEOUT_SECONDS.
+    - If session_id is given (and TERMINAL_PERSISTENT_SHELL is on), runs in that session's
+      long-lived shell so cwd, exports and activated virtualenvs persist between commands.
+    - If background is True, starts the command under the process manager and returns an immediate
+      confirmation with its process id; use process_tail/process_status/process_wait/process_kill on it.
     """
     if not command:
         return ""
 
     if background:
         try:
-            p = subprocess.Popen(
-                command,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                cwd=str(PROJECT_ROOT),
-            )
-            return f"Started background process, pid={p.pid}"
+            info = get_process_manager().start(command, cwd=str(PROJECT_ROOT))
+            return f"Started background process id={info['id']}, pid={info['pid']}"
         except Exception as e:
             return f"Failed to start background process: {e}"
     else:
+        settings = get_settings()
+        limit = float(timeout or getattr(settings, "COMMAND_TIMEOUT_SECONDS", 60) or 60)
+        capture = _OutputCapture(
+            int(getattr(settings, "COMMAND_OUTPUT_HEAD_BYTES", 8192)),
+            int(getattr(settings, "COMMAND_OUTPUT_TAIL_BYTES", 8192)),
+        )
+        if session_id and getattr(settings, "TERMINAL_PERSISTENT_SHELL", True) and sessions_supported():
+            err_capture = _OutputCapture(capture.head_bytes, capture.tail_bytes)
+            return _run_in_session(session_id, command, limit, capture, err_capture, on_output)
         try:
-            completed = subprocess.run(
+            proc = subprocess.Popen(
                 command,
                 shell=True,
-                capture_output=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True,
+                errors="replace",
+                bufsize=1,
                 cwd=str(PROJECT_ROOT),
-                timeout=60,
+                **new_process_group_kwargs(),
             )
-            out = completed.stdout or ""
-            err = completed.stderr or ""
-            return out + err
-        except subprocess.TimeoutExpired as e:
-            partial = e.stdout or ""
-            partial_err = e.stderr or ""
-            return f"Command timed out after 60 seconds.\n{partial}{partial_err}"
         except Exception as e:
-            return f"Command failed: {e}"
\ No newline at end of file
+            return f"Command failed: {e}"
+
+        def _pump() -> None:
+            for line in iter(proc.stdout.readline, ""):
+                capture.add(line)
+                if on_output is not None:
+                    try:
+                        on_output(line.rstrip("\n"))
+                    except Exception:
+                        # a broken listener must not stop output capture
+                        pass
+
+        reader = threading.Thread(target=_pump, name="run-command-reader", daemon=True)
+        reader.start()
+        try:
+            proc.wait(timeout=limit)
+        except subprocess.TimeoutExpired:
+            kill_process_tree(proc, grace=2.0)
+            reader.join(timeout=2.0)
+            return f"Command timed out after {limit:g} seconds.\n{capture.text()}"
+        # bounded: a daemonized grandchild may keep the pipe open after the shell exits
+        reader.join(timeout=5.0)
+        return capture.text()
+
+
+def process_status(process_id: str = "") -> str:
+    """Return the status of a background process, or of all background processes if no id is given."""
+    mgr = get_process_manager()
+    if not process_id:
+        return json.dumps(mgr.list())
+    return json.dumps(mgr.status(process_id))
+
+
+def process_tail(process_id: str, lines: int = 50) -> str:
+    """Return the status and the last `lines` lines of output of a background process."""
+    return json.dumps(get_process_manager().tail(process_id, lines))
+
+
+def process_wait(process_id: str, timeout: float = 30.0) -> str:
+    """Wait up to `timeout` seconds for a background process to exit; returns status and output tail."""
+    return json.dumps(get_process_manager().wait(process_id, timeout))
+
+
+def process_kill(process_id: str) -> str:
+    """Terminate a background process (and its children) and return its final status."""
+    return json.dumps(get_process_manager().kill(process_id))
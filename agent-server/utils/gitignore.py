@@ -0,0 +1,118 @@
+import os
+import re
+from typing import List, Optional, Tuple
+
+
+def _translate(pattern: str) -> str:
+    """Translate a single gitignore glob (without leading '/' or trailing '/') into a regex."""
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern[i:i + 3] == '**/':
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern[i:i + 2] == '**':
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = pattern.find(']', i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class GitIgnore:
+    """
+    Matcher for the rules of one .gitignore file.
+
+    Supports comments, negation ('!'), directory-only rules (trailing '/'),
+    anchored rules (containing '/') and '**'. Paths passed to match() are
+    relative to the directory holding the .gitignore and use '/' separators.
+    """
+
+    def __init__(self, lines: List[str]):
+        self._rules: List[Tuple[re.Pattern, bool, bool]] = []
+        for raw in lines:
+            line = raw.rstrip('\n').rstrip('\r')
+            if not line or line.startswith('#'):
+                continue
+            # trailing spaces are ignored unless escaped
+            if not line.endswith('\\ '):
+                line = line.rstrip(' ')
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            elif line.startswith('\\!') or line.startswith('\\#'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            anchored = '/' in line
+            line = line.lstrip('/')
+            regex = _translate(line)
+            if not anchored:
+                regex = '(?:.*/)?' + regex
+            self._rules.append((re.compile('^' + regex + '$'), negate, dir_only))
+
+    @classmethod
+    def from_file(cls, path: str) -> Optional['GitIgnore']:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                return cls(f.readlines())
+        except OSError:
+            return None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """Return True if ignored, False if explicitly re-included, None if no rule applies."""
+        result: Optional[bool] = None
+        for regex, negate, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negate
+        return result
+
+
+class IgnoreStack:
+    """Nested .gitignore rules collected while walking down a directory tree."""
+
+    def __init__(self, root: str, frames: Optional[List[Tuple[str, GitIgnore]]] = None):
+        self.root = root
+        self._frames = frames or []
+
+    def push(self, dir_path: str) -> 'IgnoreStack':
+        """Return a new stack including dir_path/.gitignore when it exists."""
+        gi = GitIgnore.from_file(os.path.join(dir_path, '.gitignore'))
+        if gi is None:
+            return self
+        return IgnoreStack(self.root, self._frames + [(dir_path, gi)])
+
+    def is_ignored(self, full_path: str, is_dir: bool) -> bool:
+        # deeper .gitignore files take precedence over shallower ones
+        for base, gi in reversed(self._frames):
+            rel = os.path.relpath(full_path, base).replace(os.sep, '/')
+            res = gi.match(rel, is_dir)
+            if res is not None:
+                return res
+        return False
@@ -1,81 +1,232 @@
+import hashlib
 import os
-from typing import List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
 
-IGNORED_DIRS = {'.git', 'node_modules', 'venv', '__pycache__'}
+from utils.gitignore import IgnoreStack
+
+IGNORED_DIRS = {'.git', 'node_modules', 'venv', '.venv', '__pycache__'}
+# Build output; skipped by list_files(respect_gitignore=True) even without a .gitignore
+BUILD_OUTPUT_DIRS = {'dist', 'build'}
 
 
 def _is_ignored(name: str) -> bool:
     return name in IGNORED_DIRS
 
 
-def _count_files(root_path: str) -> int:
-    total = 0
-    for dirpath, dirnames, filenames in os.walk(root_path):
-        # skip ignored directories during counting
-        dirnames[:] = [d for d in dirnames if not _is_ignored(d)]
-        total += len(filenames)
-    return total
+class _DirNode:
+    """Cached listing of one directory, valid while the directory mtime is unchanged."""
 
+    __slots__ = ('mtime_ns', 'dirs', 'files', 'links', 'children', 'file_count', 'denied')
 
-def generate_repo_map(root_path: str) -> str:
-    """
-    Generate a tree-style map of the repository starting at root_path.
-    Skips common large/irrelevant directories and truncates deep trees when file count is large.
-    """
-    if not os.path.exists(root_path):
-        return f"Path not found: {root_path}"
+    def __init__(self, mtime_ns: int):
+        self.mtime_ns = mtime_ns
+        self.dirs: List[str] = []
+        self.files: List[str] = []
+        # directories reached through symlinks are listed but never descended into
+        self.links: set = set()
+        self.children: Dict[str, '_DirNode'] = {}
+        self.file_count = 0
+        self.denied = False
 
-    total_files = _count_files(root_path)
-    # If repository is large, limit depth to keep output compact
-    max_depth = 3 if total_files > 200 else 1000
-    max_lines = 1000
 
-    lines: List[str] = []
-    root_name = os.path.basename(os.path.abspath(root_path)) or root_path
-    lines.append(root_name + '/')
+class RepoMapService:
+    """
+    Build tree-style repository maps in a single os.scandir pass and cache them.
 
-    def walk_dir(path: str, prefix: str, depth: int):
-        nonlocal lines
-        if len(lines) >= max_lines:
-            return
+    Each directory listing is cached with the directory's mtime; only directories
+    whose mtime changed are re-listed. The rendered map is cached under a
+    fingerprint of all directory mtimes, so an unchanged tree costs one stat per
+    directory instead of a full walk.
+    """
 
-        try:
-            entries = sorted(os.listdir(path))
-        except PermissionError:
-            lines.append(prefix + '└── [permission denied]')
-            return
-
-        # filter ignored
-        entries = [e for e in entries if not _is_ignored(e)]
-        # sort directories first
-        dirs = [e for e in entries if os.path.isdir(os.path.join(path, e))]
-        files = [e for e in entries if not os.path.isdir(os.path.join(path, e))]
-        ordered = dirs + files
-
-        for idx, name in enumerate(ordered):
-            is_last = idx == len(ordered) - 1
-            connector = '└── ' if is_last else '├── '
-            full = os.path.join(path, name)
-
-            if os.path.isdir(full):
-                lines.append(prefix + connector + name + '/')
-                if depth + 1 >= max_depth:
-                    # indicate truncated contents if there are children
-                    try:
-                        child_entries = [c for c in os.listdir(full) if not _is_ignored(c)]
-                    except PermissionError:
-                        child_entries = []
-                    if child_entries:
-                        lines.append(prefix + ('    ' if is_last else '│   ') + '└── ... (truncated)')
-                    continue
-                new_prefix = prefix + ('    ' if is_last else '│   ')
-                walk_dir(full, new_prefix, depth + 1)
-            else:
-                lines.append(prefix + connector + name)
+    def __init__(self, max_lines: int = 1000):
+        self.max_lines = max_lines
+        self._nodes: Dict[str, _DirNode] = {}
+        # root -> (fingerprint, rendered map)
+        self._rendered: Dict[str, Tuple[str, str]] = {}
+        # root -> (fingerprint, gitignore-filtered file list)
+        self._source_files: Dict[str, Tuple[str, List[str]]] = {}
+        self._lock = threading.Lock()
 
+    def _scan(self, path: str, seen: Dict[str, _DirNode], hasher) -> Optional[_DirNode]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        node = self._nodes.get(path)
+        if node is None or node.mtime_ns != st.st_mtime_ns:
+            node = _DirNode(st.st_mtime_ns)
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if _is_ignored(entry.name):
+                            continue
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        if is_dir:
+                            node.dirs.append(entry.name)
+                            if entry.is_symlink():
+                                node.links.add(entry.name)
+                        else:
+                            node.files.append(entry.name)
+            except OSError:
+                # PermissionError and vanished directories render as '[permission denied]'
+                node.denied = True
+            node.dirs.sort()
+            node.files.sort()
+
+        hasher.update(f'{path}\0{node.mtime_ns}\0'.encode('utf-8', errors='replace'))
+        if '.gitignore' in node.files:
+            # editing a .gitignore in place does not change the directory mtime
+            try:
+                hasher.update(str(os.stat(os.path.join(path, '.gitignore')).st_mtime_ns).encode())
+            except OSError:
+                pass
+        children: Dict[str, _DirNode] = {}
+        total = len(node.files)
+        for name in node.dirs:
+            if name in node.links:
+                continue
+            child = self._scan(os.path.join(path, name), seen, hasher)
+            if child is not None:
+                children[name] = child
+                total += child.file_count
+        node.children = children
+        node.file_count = total
+        seen[path] = node
+        return node
+
+    def _render(self, root_path: str, root: _DirNode) -> str:
+        # If repository is large, limit depth to keep output compact
+        max_depth = 3 if root.file_count > 200 else 1000
+        max_lines = self.max_lines
+
+        lines: List[str] = []
+        root_name = os.path.basename(os.path.abspath(root_path)) or root_path
+        lines.append(root_name + '/')
+
+        def walk_dir(node: _DirNode, prefix: str, depth: int):
             if len(lines) >= max_lines:
                 return
+            if node.denied:
+                lines.append(prefix + '└── [permission denied]')
+                return
+
+            ordered = [(d, True) for d in node.dirs] + [(f, False) for f in node.files]
+            for idx, (name, is_dir) in enumerate(ordered):
+                is_last = idx == len(ordered) - 1
+                connector = '└── ' if is_last else '├── '
+
+                if is_dir:
+                    lines.append(prefix + connector + name + '/')
+                    child = node.children.get(name)
+                    if child is None:
+                        continue
+                    if depth + 1 >= max_depth:
+                        # indicate truncated contents if there are children
+                        if child.dirs or child.files:
+                            lines.append(prefix + ('    ' if is_last else '│   ') + '└── ... (truncated)')
+                        continue
+                    new_prefix = prefix + ('    ' if is_last else '│   ')
+                    walk_dir(child, new_prefix, depth + 1)
+                else:
+                    lines.append(prefix + connector + name)
+
+                if len(lines) >= max_lines:
+                    return
+
+        walk_dir(root, '', 0)
+        return '\n'.join(lines)
+
+    def _refresh(self, root_abs: str) -> Tuple[Optional[_DirNode], str]:
+        """Rescan changed directories under root_abs; return (root node, fingerprint). Caller holds the lock."""
+        seen: Dict[str, _DirNode] = {}
+        hasher = hashlib.sha1()
+        root = self._scan(root_abs, seen, hasher)
+        if root is None:
+            return None, ''
+        # Drop cached listings for directories that no longer exist under this root
+        prefix = root_abs.rstrip(os.sep) + os.sep
+        for stale in [p for p in self._nodes if (p == root_abs or p.startswith(prefix)) and p not in seen]:
+            del self._nodes[stale]
+        self._nodes.update(seen)
+        return root, hasher.hexdigest()
+
+    def list_files(self, root_path: str, respect_gitignore: bool = False) -> List[str]:
+        """
+        Return all non-ignored file paths under root_path (relative, '/'-separated) from the cached tree.
+
+        With respect_gitignore, paths matched by .gitignore files and build output
+        directories are skipped too; the filtered list is cached under the tree fingerprint.
+        """
+        root_abs = os.path.abspath(root_path)
+        with self._lock:
+            root, fingerprint = self._refresh(root_abs)
+            if root is None:
+                return []
+            if respect_gitignore:
+                cached = self._source_files.get(root_abs)
+                if cached is not None and cached[0] == fingerprint:
+                    return list(cached[1])
+        out: List[str] = []
+
+        def collect(node: _DirNode, rel: str):
+            for f in node.files:
+                out.append(rel + f)
+            for name, child in node.children.items():
+                collect(child, rel + name + '/')
+
+        def collect_source(node: _DirNode, full: str, rel: str, ignores: IgnoreStack):
+            if '.gitignore' in node.files:
+                ignores = ignores.push(full)
+            for f in node.files:
+                if not ignores.is_ignored(os.path.join(full, f), False):
+                    out.append(rel + f)
+            for name, child in node.children.items():
+                child_full = os.path.join(full, name)
+                if name in BUILD_OUTPUT_DIRS or ignores.is_ignored(child_full, True):
+                    continue
+                collect_source(child, child_full, rel + name + '/', ignores)
+
+        if not respect_gitignore:
+            collect(root, '')
+            return out
+        collect_source(root, root_abs, '', IgnoreStack(root_abs))
+        with self._lock:
+            self._source_files[root_abs] = (fingerprint, out)
+        return list(out)
+
+    def generate(self, root_path: str) -> str:
+        if not os.path.exists(root_path):
+            return f"Path not found: {root_path}"
+        root_abs = os.path.abspath(root_path)
+
+        with self._lock:
+            root, fingerprint = self._refresh(root_abs)
+            if root is None:
+                return f"Path not found: {root_path}"
+            cached = self._rendered.get(root_abs)
+            if cached is not None and cached[0] == fingerprint:
+                return cached[1]
+            rendered = self._render(root_path, root)
+            self._rendered[root_abs] = (fingerprint, rendered)
+            return rendered
+
+
+_default_service = RepoMapService()
+
 
-    walk_dir(root_path, '', 0)
+def get_repo_map_service() -> RepoMapService:
+    return _default_service
 
-    return '\n'.join(lines)
\ No newline at end of file
+
+def generate_repo_map(root_path: str) -> str:
+    """
+    Generate a tree-style map of the repository starting at root_path.
+    Skips common large/irrelevant directories and truncates deep trees when file count is large.
+    Results are cached and only directories whose mtime changed are re-listed.
+    """
+    return _default_service.generate(root_path)
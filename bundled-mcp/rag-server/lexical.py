@@ -0,0 +1,110 @@
+"""
+In-memory BM25 index over the RAG chunks, kept alongside the Chroma collection.
+
+Exact identifiers and error strings are matched lexically here, then fused with
+vector results by search_knowledge using reciprocal rank fusion.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_PART_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Constant k in 1 / (k + rank); 60 is the value from the original RRF paper
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased identifiers plus their snake_case / camelCase parts, so both
+    'get_embedding' and 'embedding' match a chunk defining get_embedding.
+    """
+    out: List[str] = []
+    for word in _TOKEN_RE.findall(text):
+        lower = word.lower()
+        out.append(lower)
+        parts = [p.lower() for p in _PART_RE.findall(word)]
+        if len(parts) > 1:
+            out.extend(p for p in parts if len(p) > 1 and p != lower)
+    return out
+
+
+class Bm25Index:
+    """Okapi BM25 over documents addressed by id. Thread-safe; documents can be added or replaced."""
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        # term -> {doc id: term frequency}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        # doc id -> (length, distinct terms)
+        self._docs: Dict[str, Tuple[int, Tuple[str, ...]]] = {}
+        self._total_len = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _remove(self, doc_id: str) -> None:
+        length, terms = self._docs.pop(doc_id)
+        self._total_len -= length
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+
+    def add_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        """Index (doc id, text) pairs, replacing documents that already exist."""
+        prepared = [(doc_id, Counter(tokenize(text))) for doc_id, text in items]
+        with self._lock:
+            for doc_id, counts in prepared:
+                if doc_id in self._docs:
+                    self._remove(doc_id)
+                length = sum(counts.values())
+                self._docs[doc_id] = (length, tuple(counts))
+                self._total_len += length
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[doc_id] = tf
+
+    def remove_many(self, doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id in doc_ids:
+                if doc_id in self._docs:
+                    self._remove(doc_id)
+
+    def search(self, query: str, n: int) -> List[Tuple[str, float]]:
+        """Top n (doc id, score) pairs for query, best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            total = len(self._docs)
+            if not total or not terms:
+                return []
+            avg_len = self._total_len / total
+            scores: Dict[str, float] = {}
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    length = self._docs[doc_id][0]
+                    denom = tf + self.k1 * (1 - self.b + self.b * length / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / denom
+        return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank), rank starting at 1."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda kv: -kv[1])
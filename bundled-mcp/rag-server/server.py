@@ -2,21 +2,49 @@
 """
 MCP RAG server
 
-Exposes two MCP tools:
+Exposes three MCP tools:
 - index_codebase(root_path: str)
-- search_knowledge(query: str, n_results: int = 5)
+- search_knowledge(query: str, n_results: int = 5, mode: str = "hybrid")
+- index_stats()
 
 Persistant Chroma DB is stored under .cache
 Embeddings produced via ollama.embeddings(model='nomic-embed-text')
+Files are chunked along definitions to about RAG_CHUNK_TOKENS tokens
+(default 384) with RAG_CHUNK_OVERLAP_TOKENS (default 48) overlap.
+
+Indexing runs as a pipeline: a file walker feeds a process pool that reads and
+chunks files (RAG_CHUNK_WORKERS), a bounded queue (RAG_QUEUE_SIZE) feeds
+RAG_EMBED_WORKERS embedding threads that embed RAG_EMBED_BATCH chunks per
+request, and one writer adds the results to Chroma in bulk.
+
+search_knowledge fuses vector results with a BM25 index over the same chunks
+(rebuilt from Chroma on first use, then updated as chunks are written) by
+reciprocal rank fusion; mode="vector" or "lexical" uses one side only.
+
+Query embeddings are kept in an LRU cache; search results are cached under the
+index version, which index_codebase bumps (in .cache/index_version, so replicas
+sharing the cache directory see it too).
+
+`python server.py --bench-chunking <root>` reports chunking throughput.
 """
 
+import multiprocessing
 import os
-import re
+import queue
+from collections import OrderedDict
+import sys
+import threading
+import time
 import uuid
 import json
-from typing import List, Dict, Any, Optional
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
+from chunking import benchmark_chunking, iter_source_files, read_and_chunk
+from lexical import Bm25Index, reciprocal_rank_fusion
+
 # MCP server framework (expected to be available in the environment)
 try:
     from modelcontextprotocol.server import MCPServer
@@ -43,6 +71,9 @@ server = MCPServer()
 
 # Chromadb persistent client
 try:
+    if __name__ == "__mp_main__":
+        # chunk pool workers re-import this file under spawn; they only use chunking.py
+        raise ImportError("chromadb is not needed in worker processes")
     import chromadb
     from chromadb.config import Settings
     CHROMA_SETTINGS = Settings(persist_directory=".cache")
@@ -56,94 +87,6 @@ try:
 except Exception:
     ollama = None
 
-# Helper: safe read file
-def _read_text_file(path: Path) -> str:
-    try:
-        return path.read_text(encoding="utf-8", errors="ignore")
-    except Exception:
-        # Try binary decode fallback
-        try:
-            with open(path, "rb") as f:
-                return f.read().decode("utf-8", errors="ignore")
-        except Exception:
-            return ""
-
-# Helper: basic language detection from extension
-def _lang_from_path(path: Path) -> str:
-    return path.suffix.lstrip(".").lower() or "text"
-
-# Chunking logic:
-# - Try to chunk by top-level function/class definitions (for common languages)
-# - Fallback to fixed-size blocks (500 lines)
-MAX_LINES_PER_CHUNK = 500
-
-def chunk_file_by_defs(text: str) -> List[Dict[str, Any]]:
-    """
-    Attempt to split source file into logical chunks using regex for common
-    function/class definitions. Returns list of dicts: {'start': int, 'end': int, 'text': str}
-    If detection fails or produces too large chunks, fallback to line-block chunking.
-    """
-    lines = text.splitlines()
-    if len(lines) <= MAX_LINES_PER_CHUNK:
-        return [{"start": 1, "end": len(lines), "text": text}]
-
-    # Regex patterns to detect top-level defs for various languages
-    patterns = [
-        r'^\s*def\s+\w+\s*\(',      # python
-        r'^\s*class\s+\w+\s*[:\(]', # python, java, etc
-        r'^\s*function\s+\w+\s*\(', # javascript
-        r'^\s*(?:public|private|protected)\s+.+\s+\w+\s*\(', # java/c#
-        r'^\s*#pragma',             # c/c++
-    ]
-    combined = re.compile("|".join(patterns), re.MULTILINE)
-
-    indices = []
-    for i, line in enumerate(lines):
-        if combined.match(line):
-            indices.append(i)
-
-    chunks = []
-    if not indices:
-        # fallback to fixed-size chunking by lines
-        for i in range(0, len(lines), MAX_LINES_PER_CHUNK):
-            start = i + 1
-            end = min(i + MAX_LINES_PER_CHUNK, len(lines))
-            chunks.append({"start": start, "end": end, "text": "\n".join(lines[i:end])})
-        return chunks
-
-    # Build chunks from indices, ensuring none exceed MAX_LINES_PER_CHUNK
-    indices.append(len(lines))  # sentinel
-    for i in range(len(indices) - 1):
-        start_idx = indices[i]
-        end_idx = indices[i + 1]
-        # Expand end_idx if chunk too small; ensure chunk sizes are within limits
-        if (end_idx - start_idx) > MAX_LINES_PER_CHUNK:
-            # split this range further
-            for j in range(start_idx, end_idx, MAX_LINES_PER_CHUNK):
-                s = j
-                e = min(j + MAX_LINES_PER_CHUNK, end_idx)
-                chunks.append({"start": s + 1, "end": e, "text": "\n".join(lines[s:e])})
-        else:
-            chunks.append({"start": start_idx + 1, "end": end_idx, "text": "\n".join(lines[start_idx:end_idx])})
-
-    # If first chunk doesn't include header lines before first def, include them
-    first_def_line = indices[0] if indices else 0
-    if first_def_line > 0:
-        header_text = "\n".join(lines[0:first_def_line])
-        if header_text.strip():
-            chunks.insert(0, {"start": 1, "end": first_def_line, "text": header_text})
-
-    return chunks
-
-def chunk_text_generic(text: str) -> List[Dict[str, Any]]:
-    lines = text.splitlines()
-    chunks = []
-    for i in range(0, len(lines), MAX_LINES_PER_CHUNK):
-        start = i + 1
-        end = min(i + MAX_LINES_PER_CHUNK, len(lines))
-        chunks.append({"start": start, "end": end, "text": "\n".join(lines[i:end])})
-    return chunks
-
 # Embedding function
 def get_embedding(text: str) -> List[float]:
     """
@@ -179,6 +122,24 @@ def get_embedding(text: str) -> List[float]:
 
     raise RuntimeError("Unexpected response from ollama.embeddings")
 
+def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Embed several texts in one request via ollama.embed when available,
+    falling back to one get_embedding call per text.
+    """
+    if ollama is None:
+        raise RuntimeError("ollama package not available in environment")
+    embed = getattr(ollama, "embed", None)
+    if embed is not None:
+        try:
+            resp = embed(model="nomic-embed-text", input=texts)
+            vectors = resp.get("embeddings") if isinstance(resp, dict) else getattr(resp, "embeddings", None)
+            if vectors is not None and len(vectors) == len(texts):
+                return [list(v) for v in vectors]
+        except Exception:
+            pass
+    return [get_embedding(t) for t in texts]
+
 # Ensure collection exists
 def _get_collection(name: str = "codebase"):
     if chroma_client is None:
@@ -188,100 +149,447 @@ def _get_collection(name: str = "codebase"):
     except Exception:
         return chroma_client.create_collection(name)
 
-@server.tool
-def index_codebase(root_path: str) -> Dict[str, Any]:
+# Cache sizes (entries) for query embeddings and search results
+EMBED_CACHE_SIZE = int(os.getenv("RAG_EMBED_CACHE_SIZE", "512"))
+RESULT_CACHE_SIZE = int(os.getenv("RAG_RESULT_CACHE_SIZE", "256"))
+INDEX_VERSION_PATH = os.path.join(".cache", "index_version")
+
+
+class _LruCache:
+    """Thread-safe LRU mapping with hit/miss counters."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Any, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+_embedding_cache = _LruCache(EMBED_CACHE_SIZE)
+_result_cache = _LruCache(RESULT_CACHE_SIZE)
+# (mtime_ns, version) of INDEX_VERSION_PATH when last read
+_index_version_seen: Tuple[int, int] = (-1, 0)
+_last_index_run: Optional[Dict[str, Any]] = None
+
+
+def _index_version() -> int:
     """
-    Walks directory at root_path, chunks files (by function or 500-line blocks),
-    generates embeddings via ollama, and stores them in ChromaDB (.cache).
+    Current index version. Stored on disk so replicas sharing .cache agree;
+    re-read only when the file's mtime changes.
     """
-    if chroma_client is None:
-        return {"ok": False, "error": "chromadb client not available"}
+    global _index_version_seen, _lexical_index
+    try:
+        mtime = os.stat(INDEX_VERSION_PATH).st_mtime_ns
+    except OSError:
+        return _index_version_seen[1]
+    if mtime != _index_version_seen[0]:
+        try:
+            with open(INDEX_VERSION_PATH, "r", encoding="utf-8") as f:
+                version = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return _index_version_seen[1]
+        if version != _index_version_seen[1]:
+            # another process re-indexed: our BM25 index no longer matches the collection
+            with _lexical_lock:
+                _lexical_index = None
+        _index_version_seen = (mtime, version)
+    return _index_version_seen[1]
+
+
+def _bump_index_version() -> int:
+    """Advance the index version, invalidating cached search results everywhere."""
+    global _index_version_seen
+    version = _index_version() + 1
+    try:
+        os.makedirs(os.path.dirname(INDEX_VERSION_PATH), exist_ok=True)
+        tmp = f"{INDEX_VERSION_PATH}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(version))
+        os.replace(tmp, INDEX_VERSION_PATH)
+        _index_version_seen = (os.stat(INDEX_VERSION_PATH).st_mtime_ns, version)
+    except OSError:
+        _index_version_seen = (_index_version_seen[0], version)
+    _result_cache.clear()
+    return version
+
+
+def _query_embedding(query: str) -> List[float]:
+    """get_embedding for search queries, through the LRU cache keyed by whitespace-normalized text."""
+    key = " ".join(query.split())
+    emb = _embedding_cache.get(key)
+    if emb is None:
+        emb = get_embedding(key)
+        _embedding_cache.put(key, emb)
+    return emb
+
+
+# BM25 index over the collection's chunks; None until first needed
+_lexical_index: Optional[Bm25Index] = None
+_lexical_lock = threading.Lock()
+# Page size used when rebuilding the BM25 index from Chroma
+LEXICAL_LOAD_PAGE = 1000
+
+
+def _lexical_text(doc: str, metadata: Optional[Dict[str, Any]]) -> str:
+    """Text indexed for BM25: the chunk plus its path and symbol names."""
+    metadata = metadata or {}
+    return " ".join([doc or "", str(metadata.get("path") or ""), str(metadata.get("symbols") or "")])
+
+
+def _get_lexical_index(coll: Any) -> Tuple[Bm25Index, bool]:
+    """
+    Return (BM25 index, complete), building the index from every chunk stored in the
+    collection on first use. The index is only kept once every page loaded; after a
+    failed read the partial index serves this search and the next search loads again.
+    """
+    global _lexical_index
+    with _lexical_lock:
+        if _lexical_index is not None:
+            return _lexical_index, True
+        index = Bm25Index()
+        offset = 0
+        while True:
+            try:
+                page = coll.get(include=["documents", "metadatas"], limit=LEXICAL_LOAD_PAGE, offset=offset)
+            except Exception:
+                return index, False
+            ids = page.get("ids") or []
+            docs = page.get("documents") or []
+            metadatas = page.get("metadatas") or [None] * len(ids)
+            index.add_many((i, _lexical_text(d, m)) for i, d, m in zip(ids, docs, metadatas))
+            if len(ids) < LEXICAL_LOAD_PAGE:
+                break
+            offset += len(ids)
+        _lexical_index = index
+        return index, True
+
+
+def _lexical_add(ids: List[str], docs: List[str], metadatas: List[Dict[str, Any]]) -> None:
+    """Keep an already built BM25 index in step with chunks just written to Chroma."""
+    with _lexical_lock:
+        index = _lexical_index
+    if index is not None:
+        index.add_many((i, _lexical_text(d, m)) for i, d, m in zip(ids, docs, metadatas))
+
+
+# Indexing pipeline sizing
+CHUNK_WORKERS = int(os.getenv("RAG_CHUNK_WORKERS", "0")) or min(8, os.cpu_count() or 1)
+EMBED_WORKERS = int(os.getenv("RAG_EMBED_WORKERS", "4"))
+EMBED_BATCH = int(os.getenv("RAG_EMBED_BATCH", "16"))
+QUEUE_SIZE = int(os.getenv("RAG_QUEUE_SIZE", "256"))
+# Largest number of chunks passed to one collection.add call
+WRITE_BATCH = 512
+
+
+class _StageStats:
+    """Items processed and busy seconds for one pipeline stage across its workers."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.items = 0
+        self.busy_s = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items: int, busy_s: float) -> None:
+        with self._lock:
+            self.items += items
+            self.busy_s += busy_s
+
+    def snapshot(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "busy_s": round(self.busy_s, 3),
+            "items_per_busy_s": round(self.items / self.busy_s, 1) if self.busy_s else None,
+            # share of the run the stage's workers were busy; the highest one limits throughput
+            "utilization": round(self.busy_s / (elapsed * self.workers), 3) if elapsed and self.workers else None,
+        }
 
-    root = Path(root_path)
-    if not root.exists():
-        return {"ok": False, "error": f"path not found: {root_path}"}
 
-    coll = _get_collection("codebase")
-    added = 0
-    skipped = 0
-    for dirpath, dirnames, filenames in os.walk(root):
-        # skip common large or irrelevant directories
-        skip_dirs = {".git", ".cache", "__pycache__", "node_modules", ".venv", "venv"}
-        dirnames[:] = [d for d in dirnames if d not in skip_dirs]
-        for fname in filenames:
-            fpath = Path(dirpath) / fname
-            # skip binary-ish by extension heuristics
-            if fpath.suffix.lower() in {".png", ".jpg", ".jpeg", ".gif", ".exe", ".dll", ".so", ".bin"}:
-                skipped += 1
-                continue
+class _QueueStats:
+    """Depth samples of a bounded queue, taken each time a consumer reads from it."""
+
+    def __init__(self, q: "queue.Queue[Any]"):
+        self.q = q
+        self.samples = 0
+        self.total = 0
+        self.max = 0
+        self._lock = threading.Lock()
+
+    def sample(self) -> None:
+        depth = self.q.qsize()
+        with self._lock:
+            self.samples += 1
+            self.total += depth
+            self.max = max(self.max, depth)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.q.maxsize,
+            "avg_depth": round(self.total / self.samples, 1) if self.samples else 0,
+            "max_depth": self.max,
+        }
 
-            text = _read_text_file(fpath)
-            if not text.strip():
-                skipped += 1
-                continue
 
-            # Try chunk by defs first, else generic chunking
-            chunks = chunk_file_by_defs(text)
-            if not chunks:
-                chunks = chunk_text_generic(text)
+def _make_chunk_pool(workers: int):
+    """Process pool for read_and_chunk; threads when processes are unavailable (e.g. sandboxed)."""
+    try:
+        # spawn: forking this process would copy the MCP server's threads and Chroma client
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")), "process"
+    except (OSError, NotImplementedError, ValueError):
+        return ThreadPoolExecutor(max_workers=workers), "thread"
 
-            lang = _lang_from_path(fpath)
-            for chunk in chunks:
-                doc_id = str(uuid.uuid4())
-                doc_text = chunk["text"].strip()
-                if not doc_text:
-                    continue
-                try:
-                    emb = get_embedding(doc_text)
-                except Exception as e:
-                    # Skip embedding failures for individual chunks but continue overall
-                    skipped += 1
+
+class _IndexPipeline:
+    """
+    walker -> chunk pool -> chunk queue -> embedding workers -> write queue -> writer.
+
+    Both queues are bounded, so a slow stage blocks the ones before it instead of
+    buffering the whole tree in memory.
+    """
+
+    def __init__(self, root: Path, coll: Any):
+        self.root = root
+        self.coll = coll
+        self.chunk_q: "queue.Queue[Any]" = queue.Queue(maxsize=QUEUE_SIZE)
+        self.write_q: "queue.Queue[Any]" = queue.Queue(maxsize=QUEUE_SIZE)
+        self.chunk_stats = _StageStats(CHUNK_WORKERS)
+        self.embed_stats = _StageStats(EMBED_WORKERS)
+        self.write_stats = _StageStats(1)
+        self.chunk_q_stats = _QueueStats(self.chunk_q)
+        self.write_q_stats = _QueueStats(self.write_q)
+        self.pool: Any = None
+        self.pool_kind = ""
+        self.files = 0
+        self.added = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def _skip(self, n: int = 1) -> None:
+        with self._lock:
+            self.skipped += n
+
+    def _take_batch(self, q: "queue.Queue[Any]", stats: _QueueStats, limit: int) -> Tuple[List[Any], bool]:
+        """Block for one item, then take up to limit without waiting. Returns (items, saw_sentinel)."""
+        stats.sample()
+        item = q.get()
+        if item is None:
+            return [], True
+        items = [item]
+        while len(items) < limit:
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _embed_worker(self) -> None:
+        done = False
+        while not done:
+            batch, done = self._take_batch(self.chunk_q, self.chunk_q_stats, EMBED_BATCH)
+            if not batch:
+                continue
+            t0 = time.perf_counter()
+            try:
+                vectors: List[Optional[List[float]]] = list(get_embeddings([doc for doc, _ in batch]))
+            except Exception:
+                # retry one by one so a single bad chunk only skips itself
+                vectors = []
+                for doc, _ in batch:
+                    try:
+                        vectors.append(get_embedding(doc))
+                    except Exception:
+                        vectors.append(None)
+            self.embed_stats.add(len(batch), time.perf_counter() - t0)
+            for (doc, metadata), emb in zip(batch, vectors):
+                if emb is None:
+                    self._skip()
                     continue
+                self.write_q.put((doc, metadata, emb))
 
-                metadata = {
-                    "path": str(fpath.relative_to(root)) if fpath.is_relative_to(root) else str(fpath),
-                    "full_path": str(fpath),
-                    "start_line": int(chunk["start"]),
-                    "end_line": int(chunk["end"]),
-                    "language": lang,
-                }
+    def _writer(self) -> None:
+        done = False
+        while not done:
+            batch, done = self._take_batch(self.write_q, self.write_q_stats, WRITE_BATCH)
+            if not batch:
+                continue
+            t0 = time.perf_counter()
+            ids = [str(uuid.uuid4()) for _ in batch]
+            docs = [doc for doc, _, _ in batch]
+            metadatas = [metadata for _, metadata, _ in batch]
+            try:
+                self.coll.add(ids=ids, metadatas=metadatas, documents=docs, embeddings=[emb for _, _, emb in batch])
+                written = len(batch)
+            except Exception:
+                # Some chroma client versions may not accept embeddings param; try without
                 try:
-                    coll.add(
-                        ids=[doc_id],
-                        metadatas=[metadata],
-                        documents=[doc_text],
-                        embeddings=[emb],
-                    )
-                    added += 1
+                    self.coll.add(ids=ids, metadatas=metadatas, documents=docs)
+                    written = len(batch)
                 except Exception:
-                    # Some chroma client versions may not accept embeddings param; try without
-                    try:
-                        coll.add(ids=[doc_id], metadatas=[metadata], documents=[doc_text])
-                        added += 1
-                    except Exception:
-                        skipped += 1
-    # Persist if client supports persist
-    try:
-        chroma_client.persist()
-    except Exception:
-        pass
+                    written = 0
+                    self._skip(len(batch))
+            if written:
+                _lexical_add(ids, docs, metadatas)
+            self.write_stats.add(written, time.perf_counter() - t0)
+            with self._lock:
+                self.added += written
+
+    def _submit(self, path: str) -> Any:
+        try:
+            future = self.pool.submit(read_and_chunk, path, str(self.root))
+        except BrokenProcessPool:
+            # worker processes could not start or died: finish the run on threads
+            self.pool.shutdown(wait=False)
+            self.pool, self.pool_kind = ThreadPoolExecutor(max_workers=CHUNK_WORKERS), "thread"
+            future = self.pool.submit(read_and_chunk, path, str(self.root))
+        future.path = path
+        return future
+
+    def _collect(self, future: Any) -> None:
+        try:
+            res = future.result()
+        except BrokenProcessPool:
+            res = read_and_chunk(future.path, str(self.root))
+        except Exception:
+            self._skip()
+            return
+        self.files += 1
+        self.chunk_stats.add(1, res["busy_s"])
+        if not res["chunks"]:
+            self._skip()
+        for item in res["chunks"]:
+            # blocks while the embedding workers are behind (backpressure)
+            self.chunk_q.put(item)
+
+    def run(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        embedders = [threading.Thread(target=self._embed_worker, name=f"rag-embed-{i}", daemon=True) for i in range(EMBED_WORKERS)]
+        writer = threading.Thread(target=self._writer, name="rag-writer", daemon=True)
+        for t in embedders + [writer]:
+            t.start()
+        self.pool, self.pool_kind = _make_chunk_pool(CHUNK_WORKERS)
+        try:
+            pending = set()
+            for fpath, is_binary in iter_source_files(self.root):
+                if is_binary:
+                    self._skip()
+                    continue
+                pending.add(self._submit(str(fpath)))
+                # keep a few files per worker in flight; the walker waits otherwise
+                if len(pending) >= CHUNK_WORKERS * 4:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for f in finished:
+                        self._collect(f)
+            for f in pending:
+                self._collect(f)
+        finally:
+            self.pool.shutdown(wait=True)
+            for _ in embedders:
+                self.chunk_q.put(None)
+            for t in embedders:
+                t.join()
+            self.write_q.put(None)
+            writer.join()
+        elapsed = time.perf_counter() - start
+        stages = {
+            "chunk": self.chunk_stats.snapshot(elapsed),
+            "embed": self.embed_stats.snapshot(elapsed),
+            "write": self.write_stats.snapshot(elapsed),
+        }
+        return {
+            "added": self.added,
+            "skipped": self.skipped,
+            "stats": {
+                "elapsed_s": round(elapsed, 3),
+                "files": self.files,
+                "chunk_pool": self.pool_kind,
+                "stages": stages,
+                "queues": {"chunks": self.chunk_q_stats.snapshot(), "writes": self.write_q_stats.snapshot()},
+                "bottleneck": max(stages, key=lambda k: stages[k]["utilization"] or 0),
+            },
+        }
 
-    return {"ok": True, "added": added, "skipped": skipped}
 
 @server.tool
-def search_knowledge(query: str, n_results: int = 5) -> Dict[str, Any]:
+def index_codebase(root_path: str) -> Dict[str, Any]:
     """
-    Embeds query, searches Chroma, returns top-n matched code snippets with metadata.
+    Walks directory at root_path, chunks files along definitions into chunks of about
+    RAG_CHUNK_TOKENS tokens, generates embeddings via ollama, and stores them in ChromaDB (.cache).
+    Returns per-stage throughput and queue depths under "stats".
     """
     if chroma_client is None:
         return {"ok": False, "error": "chromadb client not available"}
 
-    try:
-        q_emb = get_embedding(query)
-    except Exception as e:
-        return {"ok": False, "error": f"embedding error: {e}"}
+    root = Path(root_path)
+    if not root.exists():
+        return {"ok": False, "error": f"path not found: {root_path}"}
 
+    global _last_index_run
     coll = _get_collection("codebase")
+    try:
+        result = _IndexPipeline(root, coll).run()
+    finally:
+        # new chunks make every cached search result stale
+        version = _bump_index_version()
+    # Persist if client supports persist
+    try:
+        chroma_client.persist()
+    except Exception:
+        pass
+
+    _last_index_run = dict(result["stats"], root=str(root), added=result["added"], skipped=result["skipped"], finished_at=time.time())
+    return {"ok": True, "index_version": version, **result}
+
+
+SEARCH_MODES = ("hybrid", "vector", "lexical")
+
+
+def _first(value: Any) -> Any:
+    # chroma may return nested lists per query; normalize first element
+    if isinstance(value, list) and value and isinstance(value[0], list):
+        return value[0]
+    return value
+
+
+def _vector_search(coll: Any, q_emb: List[float], n_results: int) -> Dict[str, List[Any]]:
+    """Nearest chunks as parallel lists: ids, documents, metadatas, distances."""
     try:
         results = coll.query(
             query_embeddings=[q_emb],
@@ -290,36 +598,151 @@ def search_knowledge(query: str, n_results: int = 5) -> Dict[str, Any]:
         )
     except Exception:
         # adapt to different chroma APIs
+        results = coll.query(q_emb, n_results=n_results)
+    results = results if isinstance(results, dict) else {}
+    return {key: list(_first(results.get(key)) or []) for key in ("ids", "documents", "metadatas", "distances")}
+
+
+def _fetch_chunks(coll: Any, ids: List[str]) -> Dict[str, Tuple[Any, Any]]:
+    """Document and metadata for each id, from the collection."""
+    if not ids:
+        return {}
+    try:
+        got = coll.get(ids=ids, include=["documents", "metadatas"])
+    except Exception:
+        return {}
+    docs = got.get("documents") or []
+    metadatas = got.get("metadatas") or []
+    return {
+        doc_id: (docs[i] if i < len(docs) else None, metadatas[i] if i < len(metadatas) else None)
+        for i, doc_id in enumerate(got.get("ids") or [])
+    }
+
+
+@server.tool
+def search_knowledge(query: str, n_results: int = 5, mode: str = "hybrid") -> Dict[str, Any]:
+    """
+    Searches indexed code and returns the top-n matched snippets with metadata.
+    mode: "vector" (embedding similarity), "lexical" (BM25 over identifiers and words),
+    or "hybrid" (both, fused by reciprocal rank; the default).
+    """
+    if chroma_client is None:
+        return {"ok": False, "error": "chromadb client not available"}
+    if mode not in SEARCH_MODES:
+        return {"ok": False, "error": f"unknown mode: {mode} (expected one of {', '.join(SEARCH_MODES)})"}
+
+    cache_key = (" ".join(query.split()), int(n_results), mode, _index_version())
+    cached = _result_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached, cached=True)
+
+    coll = _get_collection("codebase")
+    # hybrid looks deeper on each side so fusion can promote results ranked low by one of them
+    depth = n_results if mode != "hybrid" else max(n_results * 4, 20)
+    warning = None
+
+    vector: Dict[str, List[Any]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+    if mode in ("vector", "hybrid"):
         try:
-            results = coll.query(q_emb, n_results=n_results)
+            q_emb = _query_embedding(query)
         except Exception as e:
-            return {"ok": False, "error": f"query error: {e}"}
+            if mode == "vector":
+                return {"ok": False, "error": f"embedding error: {e}"}
+            warning = f"embedding error, lexical results only: {e}"
+            q_emb = None
+        if q_emb is not None:
+            try:
+                vector = _vector_search(coll, q_emb, depth)
+            except Exception as e:
+                if mode == "vector":
+                    return {"ok": False, "error": f"query error: {e}"}
+                warning = f"query error, lexical results only: {e}"
+
+    if mode == "vector":
+        # Normalize output
+        out = []
+        docs, metadatas, distances = vector["documents"], vector["metadatas"], vector["distances"]
+        count = max(len(docs), len(metadatas))
+        for i in range(count):
+            out.append({
+                "document": (docs[i] if i < len(docs) else None),
+                "metadata": (metadatas[i] if i < len(metadatas) else None),
+                "distance": (distances[i] if i < len(distances) else None),
+            })
+        _result_cache.put(cache_key, {"ok": True, "results": out})
+        return {"ok": True, "results": out}
+
+    index, complete = _get_lexical_index(coll)
+    if not complete:
+        warning = "lexical index could not be fully loaded; results may be incomplete"
+    lexical = index.search(query, depth)
+    rankings = [[doc_id for doc_id, _ in lexical]]
+    if vector["ids"]:
+        rankings.insert(0, vector["ids"])
+    fused = reciprocal_rank_fusion(rankings)[:n_results]
+
+    known: Dict[str, Tuple[Any, Any]] = {}
+    distance_of: Dict[str, Any] = {}
+    for i, doc_id in enumerate(vector["ids"]):
+        known[doc_id] = (
+            vector["documents"][i] if i < len(vector["documents"]) else None,
+            vector["metadatas"][i] if i < len(vector["metadatas"]) else None,
+        )
+        distance_of[doc_id] = vector["distances"][i] if i < len(vector["distances"]) else None
+    known.update(_fetch_chunks(coll, [doc_id for doc_id, _ in fused if doc_id not in known]))
+    bm25_of = dict(lexical)
 
-    # Normalize output
     out = []
-    docs = results.get("documents") if isinstance(results, dict) else None
-    metadatas = results.get("metadatas") if isinstance(results, dict) else None
-    distances = results.get("distances") if isinstance(results, dict) else None
+    for doc_id, score in fused:
+        doc, metadata = known.get(doc_id, (None, None))
+        out.append({
+            "document": doc,
+            "metadata": metadata,
+            "distance": distance_of.get(doc_id),
+            "bm25": round(bm25_of[doc_id], 4) if doc_id in bm25_of else None,
+            "score": round(score, 6),
+        })
+    result: Dict[str, Any] = {"ok": True, "mode": mode, "results": out}
+    if warning:
+        result["warning"] = warning
+    else:
+        # degraded results are not cached, so the next call retries the failed side
+        _result_cache.put(cache_key, result)
+    return result
 
-    # chroma may return nested lists per query; normalize first element
-    if isinstance(docs, list) and docs and isinstance(docs[0], list):
-        docs = docs[0]
-    if isinstance(metadatas, list) and metadatas and isinstance(metadatas[0], list):
-        metadatas = metadatas[0]
-    if isinstance(distances, list) and distances and isinstance(distances[0], list):
-        distances = distances[0]
-
-    count = max(len(docs or []), len(metadatas or []))
-    for i in range(count):
-        entry = {
-            "document": (docs[i] if docs and i < len(docs) else None),
-            "metadata": (metadatas[i] if metadatas and i < len(metadatas) else None),
-            "distance": (distances[i] if distances and i < len(distances) else None),
-        }
-        out.append(entry)
 
-    return {"ok": True, "results": out}
+@server.tool
+def index_stats() -> Dict[str, Any]:
+    """
+    Index version, chunk counts, query-embedding and result cache hit ratios,
+    and the per-stage stats of the last index_codebase run in this process.
+    """
+    chunks = None
+    if chroma_client is not None:
+        try:
+            chunks = _get_collection("codebase").count()
+        except Exception:
+            pass
+    with _lexical_lock:
+        lexical_docs = len(_lexical_index) if _lexical_index is not None else None
+    return {
+        "ok": True,
+        "index_version": _index_version(),
+        "chunks": chunks,
+        "lexical_docs": lexical_docs,
+        "caches": {"query_embeddings": _embedding_cache.snapshot(), "results": _result_cache.snapshot()},
+        "last_index": _last_index_run,
+    }
 
 if __name__ == "__main__":
-    # When run directly, start the server (or print registered tools in shim)
-    server.serve()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench-chunking":
+        # python server.py --bench-chunking <root> [target_tokens] [overlap_tokens]
+        bench_args = sys.argv[2:]
+        print(json.dumps(benchmark_chunking(
+            bench_args[0] if bench_args else ".",
+            int(bench_args[1]) if len(bench_args) > 1 else None,
+            int(bench_args[2]) if len(bench_args) > 2 else None,
+        ), indent=2))
+    else:
+        # When run directly, start the server (or print registered tools in shim)
+        server.serve()
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""Content-addressed blob store for large tool outputs.
+
+Outputs above TOOL_OUTPUT_SPILL_BYTES are written once to BLOB_DIR, keyed by the
+sha256 of their UTF-8 content. Messages only carry a small reference with a
+head/tail preview; the full content is served by GET /blob/{hash}.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import get_settings
+
+settings = get_settings()
+
+BLOB_DIR = Path(getattr(settings, "BLOB_DIR", None) or (Path(__file__).parent / ".cache" / "blobs"))
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _blob_path(blob_hash: str) -> Path:
+    # Two-level fan-out keeps directory sizes reasonable for long-running sidecars
+    return BLOB_DIR / blob_hash[:2] / blob_hash
+
+
+def put_blob(content: str) -> str:
+    """Store content and return its sha256 hex digest. Idempotent."""
+    data = content.encode("utf-8", errors="replace")
+    blob_hash = hashlib.sha256(data).hexdigest()
+    path = _blob_path(blob_hash)
+    if path.exists():
+        return blob_hash
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temp file first so readers never observe a partial blob
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return blob_hash
+
+
+def get_blob(blob_hash: str) -> Optional[str]:
+    """Return the stored content for blob_hash, or None if unknown/invalid."""
+    if not blob_hash or not _HASH_RE.match(blob_hash):
+        return None
+    path = _blob_path(blob_hash)
+    try:
+        return path.read_bytes().decode("utf-8", errors="replace")
+    except OSError:
+        return None
+
+
+def spill(value: Any) -> Any:
+    """
+    Return value unchanged when small, otherwise store it and return a reference
+    dict: {"blob": hash, "size": bytes, "head": str, "tail": str, "note": str}.
+    Falls back to the inline value if the blob cannot be written.
+    """
+    if value is None:
+        return value
+    if isinstance(value, str):
+        text = value
+    else:
+        try:
+            text = json.dumps(value, default=str)
+        except Exception:
+            text = str(value)
+
+    limit = int(getattr(settings, "TOOL_OUTPUT_SPILL_BYTES", 16384) or 0)
+    data = text.encode("utf-8", errors="replace")
+    size = len(data)
+    if limit <= 0 or size <= limit:
+        return value
+
+    preview = int(getattr(settings, "TOOL_OUTPUT_PREVIEW_BYTES", 1024) or 0)
+    try:
+        blob_hash = put_blob(text)
+    except OSError:
+        # Never lose an output because the blob directory is unwritable
+        return value
+    ref: Dict[str, Any] = {
+        "blob": blob_hash,
+        "size": size,
+        # cut by encoded bytes; a character split at the boundary is dropped
+        "head": data[:preview].decode("utf-8", errors="ignore"),
+        "tail": data[-preview:].decode("utf-8", errors="ignore") if preview else "",
+        "note": f"Output truncated ({size} bytes). Full content: GET /blob/{blob_hash}",
+    }
+    return ref
+
+
+__all__ = ["BLOB_DIR", "put_blob", "get_blob", "spill"]
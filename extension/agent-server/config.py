@@ -43,6 +43,26 @@ if _BaseSettings is not None:
         OPENAI_BASE_URL: Optional[str] = None
         ANTHROPIC_API_KEY: Optional[str] = None
         MCP_SERVERS: Optional[dict] = None
+        # Tool outputs larger than this (bytes) are spilled to the blob store
+        TOOL_OUTPUT_SPILL_BYTES: int = 16384
+        TOOL_OUTPUT_PREVIEW_BYTES: int = 1024
+        BLOB_DIR: Optional[str] = None
+        # Planner repo map: "tree" (directory listing) or "symbols" (ranked definitions)
+        REPO_MAP_MODE: str = "tree"
+        REPO_MAP_TOKEN_BUDGET: int = 2048
+        # Foreground run_command: default timeout and head/tail output kept for the LLM
+        COMMAND_TIMEOUT_SECONDS: int = 60
+        COMMAND_OUTPUT_HEAD_BYTES: int = 8192
+        COMMAND_OUTPUT_TAIL_BYTES: int = 8192
+        # Reuse one shell per task for approved commands (POSIX only)
+        TERMINAL_PERSISTENT_SHELL: bool = True
+        # Instances of the bundled RAG MCP server; search calls are spread across them
+        RAG_SERVER_REPLICAS: int = 1
+        # Start the bundled RAG server on first use; lazy servers stop after this many idle seconds
+        RAG_SERVER_LAZY: bool = True
+        MCP_IDLE_SECONDS: int = 600
+        # Default timeout for MCP tool calls (MCP_SERVERS entries may set "call_timeout")
+        MCP_CALL_TIMEOUT_SECONDS: int = 120
 
         class Config:
             env_file = str(_env_path) if _env_path.exists() else None
@@ -59,6 +79,19 @@ else:
         OPENAI_API_KEY: Optional[str]
         OPENAI_BASE_URL: Optional[str]
         ANTHROPIC_API_KEY: Optional[str]
+        TOOL_OUTPUT_SPILL_BYTES: int
+        TOOL_OUTPUT_PREVIEW_BYTES: int
+        BLOB_DIR: Optional[str]
+        REPO_MAP_MODE: str
+        REPO_MAP_TOKEN_BUDGET: int
+        COMMAND_TIMEOUT_SECONDS: int
+        COMMAND_OUTPUT_HEAD_BYTES: int
+        COMMAND_OUTPUT_TAIL_BYTES: int
+        TERMINAL_PERSISTENT_SHELL: bool
+        RAG_SERVER_REPLICAS: int
+        RAG_SERVER_LAZY: bool
+        MCP_IDLE_SECONDS: int
+        MCP_CALL_TIMEOUT_SECONDS: int
 
         def __init__(self) -> None:
             self.REASONING_PROVIDER = os.getenv("REASONING_PROVIDER", "ollama")
@@ -68,6 +101,19 @@ else:
             self.OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_KEY")
             self.OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
             self.ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+            self.TOOL_OUTPUT_SPILL_BYTES = int(os.getenv("TOOL_OUTPUT_SPILL_BYTES", "16384"))
+            self.TOOL_OUTPUT_PREVIEW_BYTES = int(os.getenv("TOOL_OUTPUT_PREVIEW_BYTES", "1024"))
+            self.BLOB_DIR = os.getenv("BLOB_DIR")
+            self.REPO_MAP_MODE = os.getenv("REPO_MAP_MODE", "tree")
+            self.REPO_MAP_TOKEN_BUDGET = int(os.getenv("REPO_MAP_TOKEN_BUDGET", "2048"))
+            self.COMMAND_TIMEOUT_SECONDS = int(os.getenv("COMMAND_TIMEOUT_SECONDS", "60"))
+            self.COMMAND_OUTPUT_HEAD_BYTES = int(os.getenv("COMMAND_OUTPUT_HEAD_BYTES", "8192"))
+            self.COMMAND_OUTPUT_TAIL_BYTES = int(os.getenv("COMMAND_OUTPUT_TAIL_BYTES", "8192"))
+            self.TERMINAL_PERSISTENT_SHELL = os.getenv("TERMINAL_PERSISTENT_SHELL", "true").lower() in ("1", "true", "yes")
+            self.RAG_SERVER_REPLICAS = int(os.getenv("RAG_SERVER_REPLICAS", "1"))
+            self.RAG_SERVER_LAZY = os.getenv("RAG_SERVER_LAZY", "true").lower() in ("1", "true", "yes")
+            self.MCP_IDLE_SECONDS = int(os.getenv("MCP_IDLE_SECONDS", "600"))
+            self.MCP_CALL_TIMEOUT_SECONDS = int(os.getenv("MCP_CALL_TIMEOUT_SECONDS", "120"))
 
 
 # Instantiate once for module-level import
@@ -98,7 +144,14 @@ try:
     _server_py = _bundled_rag / "server.py"
     _venv_python = _bundled_rag / ".venv" / "bin" / "python"
     if _bundled_rag.exists() and _server_py.exists() and _venv_python.exists():
-        rag_entry = {"command": str(_venv_python), "args": [str(_server_py)]}
+        rag_entry = {
+            "command": str(_venv_python),
+            "args": [str(_server_py)],
+            "replicas": int(getattr(settings, "RAG_SERVER_REPLICAS", 1) or 1),
+            # searches only read the index, so they can go to any replica
+            "read_only_tools": ["search_knowledge", "index_stats"],
+            "lazy": bool(getattr(settings, "RAG_SERVER_LAZY", True)),
+        }
         try:
             current = getattr(settings, "MCP_SERVERS", None) or {}
             # If user provided a dict form, merge the rag entry unless it already exists.
@@ -109,7 +162,7 @@ try:
             # If user provided a list form, append a named entry if not present.
             elif isinstance(current, list):
                 if not any(isinstance(e, dict) and e.get("name") == "rag" for e in current):
-                    current.append({"name": "rag", "command": str(_venv_python), "args": [str(_server_py)]})
+                    current.append(dict(rag_entry, name="rag"))
                 settings.MCP_SERVERS = current
             else:
                 settings.MCP_SERVERS = {"rag": rag_entry}
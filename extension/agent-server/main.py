@@ -1,15 +1,59 @@
 from fastapi import FastAPI, HTTPException, status, BackgroundTasks
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import Optional
 from langchain_core.messages import HumanMessage
 from graph import app as graph_app, graph as state_graph
 from llm import get_llm
-from store import create_task, update_task_state, get_task, TASK_STORE
+from store import create_task, update_task_state, get_task, get_task_events, cancel_task, is_task_cancelled, TASK_STORE
+from blob_store import get_blob
+from tools.process_manager import get_process_manager
+from tools.shell_session import get_shell_sessions
+from mcp_client import get_global_manager
+from config import get_settings
+import logging
+import threading
 import uuid
 import traceback
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI()
 
+@app.on_event("startup")
+def start_mcp_servers():
+    """Start configured MCP servers concurrently in the background so /health answers immediately."""
+    settings = get_settings()
+    mcp_config = getattr(settings, "MCP_SERVERS", None)
+    if not mcp_config:
+        return
+
+    def _start():
+        try:
+            report = get_global_manager().connect_configured(
+                mcp_config,
+                idle_seconds=getattr(settings, "MCP_IDLE_SECONDS", None),
+                call_timeout=getattr(settings, "MCP_CALL_TIMEOUT_SECONDS", None),
+            )
+            for name, result in report.items():
+                if result.get("lazy"):
+                    logger.info("MCP server %s registered lazily (starts on first use)", name)
+                elif result["ok"]:
+                    logger.info("MCP server %s ready in %.0f ms", name, result["startup_ms"])
+                else:
+                    logger.warning("MCP server %s failed to start: %s", name, result["error"])
+        except Exception:
+            logger.exception("Starting MCP servers failed")
+
+    threading.Thread(target=_start, name="mcp-startup", daemon=True).start()
+
+@app.on_event("shutdown")
+def shutdown_background_processes():
+    """Kill background processes, task shell sessions and MCP servers when the sidecar stops."""
+    get_process_manager().shutdown()
+    get_shell_sessions().close_all()
+    get_global_manager().shutdown()
+
 class TaskRequest(BaseModel):
     prompt: str
 
@@ -39,7 +83,7 @@ def run_agent_background(task_id: str, prompt: str):
     """
     try:
         human = HumanMessage(content=prompt)
-        state = {"messages": [human]}
+        state = {"messages": [human], "task_id": task_id}
 
         # Ensure task exists and write initial state
         create_task(task_id)
@@ -53,6 +97,8 @@ def run_agent_background(task_id: str, prompt: str):
         s = state
         # Walk the same graph logic as StateGraph.compile to allow streaming updates
         while True:
+            if is_task_cancelled(task_id):
+                break
             outgoing = [dst for (a, dst) in state_graph._edges if a == current]
             if not outgoing:
                 break
@@ -84,7 +130,8 @@ def run_agent_background(task_id: str, prompt: str):
             update_task_state(task_id, {
                 "messages": messages_serial,
                 "plan": s.get("plan", []),
-                "current_step_index": s.get("current_step_index", 0)
+                "current_step_index": s.get("current_step_index", 0),
+                "changed_files": s.get("changed_files", [])
             })
 
             current = next_node
@@ -99,12 +146,24 @@ def run_agent_background(task_id: str, prompt: str):
             "messages": messages_serial,
             "plan": s.get("plan", []),
             "current_step_index": s.get("current_step_index", 0),
+            "changed_files": s.get("changed_files", []),
+            "cancelled": is_task_cancelled(task_id),
             "done": True
         })
     except Exception as e:
         tb = traceback.format_exc()
         update_task_state(task_id, {"error": str(e), "traceback": tb})
 
+@app.post("/task/{task_id}/cancel")
+def cancel_task_endpoint(task_id: str):
+    """Stop a task: abort its in-flight MCP calls and shell command; the worker stops before the next node."""
+    if not get_task(task_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    cancel_task(task_id)
+    cancelled_calls = get_global_manager().cancel_calls(task_id)
+    get_shell_sessions().close(task_id)
+    return {"status": "cancelled", "mcp_calls_cancelled": cancelled_calls}
+
 class ApprovalRequest(BaseModel):
     approved: bool
     feedback: Optional[str] = None
@@ -123,6 +182,8 @@ def approve_task_endpoint(task_id: str, req: ApprovalRequest, background_tasks:
         "plan": state.get("plan", []),
         "current_step_index": state.get("current_step_index", 0),
         "artifacts": state.get("artifacts", []),
+        "changed_files": state.get("changed_files", []),
+        "task_id": task_id,
     }
 
     if req.approved:
@@ -152,8 +213,11 @@ def approve_task_endpoint(task_id: str, req: ApprovalRequest, background_tasks:
                     "plan": new_state.get("plan", []),
                     "current_step_index": new_state.get("current_step_index", 0),
                     "artifacts": arts,
+                    "changed_files": new_state.get("changed_files", []),
                     "done": True
                 })
+                # The task is finished; release its persistent shell
+                get_shell_sessions().close(task_id_inner)
             except Exception as e:
                 tb = traceback.format_exc()
                 update_task_state(task_id_inner, {"error": str(e), "traceback": tb})
@@ -180,6 +244,7 @@ def approve_task_endpoint(task_id: str, req: ApprovalRequest, background_tasks:
                 "plan": new_s.get("plan", []),
                 "current_step_index": new_s.get("current_step_index", 0),
                 "tool_calls": new_s.get("tool_calls", []),
+                "changed_files": new_s.get("changed_files", []),
             })
         except Exception as e:
             tb = traceback.format_exc()
@@ -245,13 +310,73 @@ def get_task_endpoint(task_id: str):
                     next_nodes = ["drafter"]
 
     resp = dict(task)
+    # command output is served incrementally by /task/{task_id}/events
+    resp.pop("events", None)
     resp["next"] = next_nodes
     return resp
 
+@app.get("/task/{task_id}/events")
+def get_task_events_endpoint(task_id: str, after: int = 0):
+    """Return task events (e.g. streamed command output lines) with seq greater than `after`."""
+    events = get_task_events(task_id, after)
+    if events is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return {"events": events, "last_seq": events[-1]["seq"] if events else after}
+
+@app.get("/blob/{blob_hash}", response_class=PlainTextResponse)
+def get_blob_endpoint(blob_hash: str):
+    """Return the full content of a spilled tool output referenced from a message."""
+    content = get_blob(blob_hash)
+    if content is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blob not found")
+    return PlainTextResponse(content)
+
+@app.get("/mcp/servers")
+def mcp_servers_endpoint():
+    """Connected MCP servers with their startup latency in milliseconds."""
+    return {"servers": get_global_manager().startup_report()}
+
+@app.get("/mcp/status")
+def mcp_status_endpoint():
+    """Health per MCP server: state, restarts, last exit code and recent stderr."""
+    return {"servers": get_global_manager().status()}
+
+@app.get("/mcp/metrics")
+def mcp_metrics_endpoint():
+    """Per MCP server: circuit breaker state and per-tool call counts, errors, timeouts and latency."""
+    return {"servers": get_global_manager().metrics()}
+
+@app.get("/processes")
+def list_processes_endpoint():
+    return {"processes": get_process_manager().list()}
+
+def _process_or_404(fn, *args):
+    try:
+        return fn(*args)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+@app.get("/process/{process_id}")
+def process_status_endpoint(process_id: str):
+    return _process_or_404(get_process_manager().status, process_id)
+
+@app.get("/process/{process_id}/tail")
+def process_tail_endpoint(process_id: str, lines: int = 50):
+    return _process_or_404(get_process_manager().tail, process_id, lines)
+
+@app.post("/process/{process_id}/wait")
+def process_wait_endpoint(process_id: str, timeout: float = 30.0):
+    return _process_or_404(get_process_manager().wait, process_id, timeout)
+
+@app.post("/process/{process_id}/kill")
+def process_kill_endpoint(process_id: str):
+    return _process_or_404(get_process_manager().kill, process_id)
+
 @app.post("/reset")
 def reset_endpoint():
-    """Clear the in-memory TASK_STORE."""
+    """Clear the in-memory TASK_STORE and close task shell sessions."""
     TASK_STORE.clear()
+    get_shell_sessions().close_all()
     return {"status": "ok", "message": "TASK_STORE cleared"}
 
 if __name__ == "__main__":
@@ -9,13 +9,20 @@ does not implement any tool-specific logic.
 """
 from __future__ import annotations
 
+import asyncio
+import concurrent.futures
+import hashlib
+import io
+import os
 import subprocess
 import threading
 import time
 import json
 import logging
 import inspect
-from typing import Any, Dict, List, Optional, Tuple
+import re
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import mcp
 
@@ -23,10 +30,508 @@ logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
+# Seconds before the tool-name index is rebuilt from the servers' tool lists
+TOOL_INDEX_TTL_SECONDS = 60.0
+# Supervision: stderr lines kept per server, liveness poll interval and restart backoff
+STDERR_LOG_LINES = 500
+SUPERVISE_INTERVAL_SECONDS = 1.0
+RESTART_BACKOFF_BASE_SECONDS = 0.5
+RESTART_BACKOFF_MAX_SECONDS = 30.0
+# A server that stayed up this long before crashing restarts without accumulated backoff
+RESTART_STABLE_SECONDS = 30.0
+# Affinity keys remembered per replica pool (oldest dropped first)
+MAX_AFFINITY_KEYS = 1024
+# Lazy servers: tool manifests cached from their last start, and default idle shutdown
+MANIFEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "mcp_manifests")
+DEFAULT_IDLE_SECONDS = 600.0
+# Tool calls: default per-server timeout, and the circuit breaker that fails fast afterwards
+DEFAULT_CALL_TIMEOUT_SECONDS = 120.0
+# Bound on one tool-discovery round trip, and the slack blocking callers allow past a call's timeout
+DISCOVERY_TIMEOUT_SECONDS = 10.0
+CALL_RESULT_GRACE_SECONDS = 5.0
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_COOLDOWN_SECONDS = 30.0
+# Recent latencies kept per (server, tool) for percentiles
+LATENCY_SAMPLES = 256
+# JSON-RPC transport: largest message accepted, read chunk size for framed bodies, and the
+# size above which we send Content-Length frames instead of one newline-terminated line
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+CONTENT_LENGTH = "content-length"
+
+
 class McpConnectionError(RuntimeError):
     pass
 
 
+class McpRpcError(RuntimeError):
+    """The server answered with a JSON-RPC error: the server is healthy, the call was not."""
+
+
+class McpTimeoutError(McpConnectionError):
+    pass
+
+
+class McpCallCancelled(McpConnectionError):
+    pass
+
+
+class McpCircuitOpenError(McpConnectionError):
+    pass
+
+
+def _is_server_fault(exc: BaseException) -> bool:
+    """True unless the failure is an error reply from a responsive server."""
+    seen = 0
+    while exc is not None and seen < 5:
+        if isinstance(exc, McpRpcError):
+            return False
+        exc = exc.__cause__
+        seen += 1
+    return True
+
+
+class _CircuitBreaker:
+    """
+    Closed -> open after `threshold` consecutive server faults or timeouts; open fails
+    fast until `cooldown` elapses, then one half-open probe decides whether to close again.
+    """
+
+    def __init__(self, threshold: int = BREAKER_FAILURE_THRESHOLD, cooldown: float = BREAKER_COOLDOWN_SECONDS):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Whether a call could be admitted now, without claiming the half-open probe."""
+        with self._lock:
+            return self.state == "closed" or (time.monotonic() - self.opened_at >= self.cooldown and not self._probing)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self._probing:
+                return False
+            self.state = "half_open"
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Give up a half-open probe without a verdict, so the next call may probe instead."""
+        with self._lock:
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures}
+
+
+class _CallStats:
+    __slots__ = ("calls", "errors", "timeouts", "cancelled", "rejected", "total_ms", "max_ms", "recent")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent: "deque[float]" = deque(maxlen=LATENCY_SAMPLES)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.recent)
+
+        def pct(q: float) -> Optional[float]:
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2) if ordered else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else None,
+            "p50_ms": pct(0.5),
+            "p95_ms": pct(0.95),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+def _is_async_sdk() -> bool:
+    """True when the installed `mcp` package is the official async SDK (anyio-based stdio client)."""
+    return hasattr(mcp, "StdioServerParameters")
+
+
+def _to_plain(obj: Any) -> Any:
+    """Convert SDK pydantic results (CallToolResult, Tool, ...) into JSON-friendly dicts."""
+    if hasattr(obj, "model_dump"):
+        try:
+            return obj.model_dump(mode="json")
+        except Exception:
+            return obj.model_dump()
+    return obj
+
+
+def _manifest_path(name: str, spec: Dict[str, Any]) -> str:
+    # keyed by command line too, so a changed server configuration is re-discovered
+    key = hashlib.sha1(json.dumps([spec.get("command"), list(spec.get("args") or [])]).encode("utf-8")).hexdigest()[:12]
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+    return os.path.join(MANIFEST_DIR, f"{safe}-{key}.json")
+
+
+def _load_manifest(name: str, spec: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_manifest_path(name, spec), "r", encoding="utf-8") as f:
+            tools = json.load(f).get("tools")
+    except (OSError, ValueError, AttributeError):
+        return None
+    return tools if isinstance(tools, dict) and tools else None
+
+
+def _save_manifest(name: str, spec: Dict[str, Any], tools: Dict[str, Any]) -> None:
+    path = _manifest_path(name, spec)
+    try:
+        os.makedirs(MANIFEST_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"name": name, "saved_at": time.time(), "tools": tools}, f, default=str)
+        os.replace(tmp, path)
+    except OSError:
+        logger.debug("Could not write MCP tool manifest %s", path, exc_info=True)
+
+
+class JsonRpcStdioTransport:
+    """
+    JSON-RPC over a subprocess's stdio, multiplexed by request id.
+
+    A reader thread owns stdout and completes the Future registered for each
+    response id, so any number of requests can be in flight on one pipe. Writes
+    are serialised by a lock so concurrent requests never interleave on stdin.
+
+    Messages are newline-delimited JSON until both sides agree on Content-Length
+    framing during `initialize` (framing = "content-length"). The reader accepts
+    either form for every message, reads framed bodies in bounded chunks and drops
+    messages larger than MAX_MESSAGE_BYTES. A malformed Content-Length header leaves
+    the stream out of sync, so the transport fails pending requests and stops the server.
+    """
+
+    def __init__(self, proc: subprocess.Popen):
+        self.proc = proc
+        self._next_id = 0
+        self._pending: Dict[int, "concurrent.futures.Future[Any]"] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        # why the reader gave up, reported by later requests instead of a bare "closed"
+        self._broken: Optional[McpConnectionError] = None
+        self.framing = "newline"
+        self.dropped_messages = 0
+        self._reader = threading.Thread(target=self._read_loop, name=f"mcp-rpc-reader-{proc.pid}", daemon=True)
+        self._reader.start()
+
+    def _read_loop(self) -> None:
+        stream = self.proc.stdout
+        if isinstance(stream, io.RawIOBase):
+            # an unbuffered pipe would make readline() issue one read per byte
+            stream = io.BufferedReader(stream, buffer_size=READ_CHUNK_BYTES)
+        error = McpConnectionError("MCP server closed its output stream")
+        try:
+            while True:
+                try:
+                    body = self._read_message(stream)
+                except McpConnectionError as exc:
+                    # message boundaries are lost; nothing after this can be parsed reliably
+                    logger.error("MCP server (pid %s): %s; closing the transport", self.proc.pid, exc)
+                    error = self._broken = exc
+                    self._fail_pending(exc)
+                    self._stop_process()
+                    break
+                if body is None:
+                    break
+                if not body:
+                    continue
+                try:
+                    msg = json.loads(body)
+                except ValueError:
+                    logger.debug("Ignoring non-JSON message from MCP server: %r", body[:200])
+                    continue
+                for item in msg if isinstance(msg, list) else [msg]:
+                    self._dispatch(item)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._fail_pending(error)
+
+    def _read_message(self, stream: Any) -> Optional[bytes]:
+        """Read one message body (newline-delimited or Content-Length framed); None at EOF, b"" to skip."""
+        line = stream.readline(MAX_MESSAGE_BYTES + 1)
+        if not line:
+            return None
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+        if line[:15].lower() == b"content-length:":
+            raw = line.split(b":", 1)[1].strip()
+            try:
+                length = int(raw or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                raise McpConnectionError(f"MCP server sent an invalid Content-Length header: {raw[:40]!r}")
+            # skip any further headers up to the blank separator line
+            while True:
+                header = stream.readline(READ_CHUNK_BYTES)
+                if not header or header in (b"\r\n", b"\n"):
+                    break
+            if length > MAX_MESSAGE_BYTES:
+                self._discard(stream, length)
+                return b""
+            body = bytearray()
+            while len(body) < length:
+                chunk = stream.read(min(READ_CHUNK_BYTES, length - len(body)))
+                if not chunk:
+                    return None
+                body += chunk
+            return bytes(body)
+        if len(line) > MAX_MESSAGE_BYTES and not line.endswith(b"\n"):
+            # oversized line: drop the rest of it without buffering
+            while True:
+                rest = stream.readline(READ_CHUNK_BYTES)
+                if not rest or rest.endswith(b"\n"):
+                    break
+            self._discard(stream, 0)
+            return b""
+        return line.strip()
+
+    def _stop_process(self) -> None:
+        """Close stdin and terminate the server; the supervisor restarts it if it is supervised."""
+        try:
+            if self.proc.stdin:
+                self.proc.stdin.close()
+        except Exception:
+            pass
+        try:
+            self.proc.terminate()
+        except Exception:
+            pass
+
+    def _discard(self, stream: Any, length: int) -> None:
+        self.dropped_messages += 1
+        logger.warning("Dropped an MCP message larger than %d bytes", MAX_MESSAGE_BYTES)
+        while length > 0:
+            chunk = stream.read(min(READ_CHUNK_BYTES, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+
+    def _dispatch(self, msg: Any) -> None:
+        if not isinstance(msg, dict) or "id" not in msg or ("result" not in msg and "error" not in msg):
+            # server-initiated notifications/requests are not used by this client
+            return
+        with self._lock:
+            fut = self._pending.pop(msg["id"], None)
+        if fut is None or fut.done():
+            return
+        if msg.get("error") is not None:
+            fut.set_exception(McpRpcError(f"RPC error: {msg['error']}"))
+        else:
+            fut.set_result(msg.get("result"))
+
+    def _fail_pending(self, exc: Exception) -> None:
+        with self._lock:
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for fut in pending:
+            if not fut.done():
+                fut.set_exception(exc)
+
+    def request(self, method: str, params: Optional[Dict[str, Any]] = None) -> "concurrent.futures.Future[Any]":
+        """Send a request and return a Future completed by the reader thread."""
+        fut: "concurrent.futures.Future[Any]" = concurrent.futures.Future()
+        with self._lock:
+            if self._closed:
+                raise McpConnectionError(str(self._broken or "MCP transport is closed"))
+            self._next_id += 1
+            req_id = self._next_id
+            self._pending[req_id] = fut
+        fut.request_id = req_id  # type: ignore[attr-defined]
+        payload = {"jsonrpc": "2.0", "id": req_id, "method": method, "params": params or {}}
+        try:
+            self._write(payload)
+        except Exception as exc:
+            with self._lock:
+                self._pending.pop(req_id, None)
+            raise McpConnectionError(f"Failed to write to MCP server stdin: {exc}") from exc
+        return fut
+
+    def request_batch(self, calls: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List["concurrent.futures.Future[Any]"]:
+        """Send several requests as one JSON-RPC batch (a single write); one Future per request, in order."""
+        futures: List["concurrent.futures.Future[Any]"] = []
+        payload: List[Dict[str, Any]] = []
+        with self._lock:
+            if self._closed:
+                raise McpConnectionError(str(self._broken or "MCP transport is closed"))
+            for method, params in calls:
+                self._next_id += 1
+                fut: "concurrent.futures.Future[Any]" = concurrent.futures.Future()
+                fut.request_id = self._next_id  # type: ignore[attr-defined]
+                self._pending[self._next_id] = fut
+                futures.append(fut)
+                payload.append({"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params or {}})
+        try:
+            self._write(payload)
+        except Exception as exc:
+            with self._lock:
+                for fut in futures:
+                    self._pending.pop(fut.request_id, None)  # type: ignore[attr-defined]
+            raise McpConnectionError(f"Failed to write to MCP server stdin: {exc}") from exc
+        return futures
+
+    def notify(self, method: str, params: Optional[Dict[str, Any]] = None) -> None:
+        self._write({"jsonrpc": "2.0", "method": method, "params": params or {}})
+
+    def _encode(self, payload: Any) -> bytes:
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        if self.framing == CONTENT_LENGTH:
+            return b"Content-Length: %d\r\n\r\n" % len(body) + body
+        return body + b"\n"
+
+    def _write(self, payload: Any) -> None:
+        data = self._encode(payload)
+        with self._write_lock:
+            self.proc.stdin.write(data)
+            self.proc.stdin.flush()
+
+    def call_rpc(self, method: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Any:
+        """Blocking request; other threads may have requests in flight at the same time."""
+        return self.request(method, params).result(timeout)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def close(self) -> None:
+        try:
+            if self.proc.stdin:
+                self.proc.stdin.close()
+        except Exception:
+            pass
+        self._fail_pending(McpConnectionError("MCP transport is closed"))
+
+
+class JsonRpcSession:
+    """
+    Session over a JsonRpcStdioTransport. Methods are coroutines awaiting the
+    transport futures, so the manager runs calls concurrently without a per-server lock.
+
+    Speaks MCP (`tools/list`, `tools/call`) and falls back to the older convention
+    where each tool is its own method (`mcp.list_tools`, `<tool>`).
+    """
+
+    def __init__(self, transport: JsonRpcStdioTransport):
+        self.transport = transport
+        self._legacy: Optional[bool] = None
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        fut = self.transport.request(method, params)
+        try:
+            return await asyncio.wrap_future(fut)
+        except asyncio.CancelledError:
+            # tell the server to stop working on it (MCP cancellation notification)
+            try:
+                self.transport.notify("notifications/cancelled", {"requestId": fut.request_id, "reason": "cancelled by client"})
+            except Exception:
+                pass
+            raise
+
+    @staticmethod
+    def _is_method_not_found(exc: Exception) -> bool:
+        text = str(exc).lower()
+        return "-32601" in text or "method not found" in text
+
+    async def initialize(self) -> Any:
+        result = await self.request("initialize", {
+            "protocolVersion": "2024-11-05",
+            # offer Content-Length framing so large results need not travel as one JSON line
+            "capabilities": {"experimental": {"framing": [CONTENT_LENGTH]}},
+            "clientInfo": {"name": "agent-server", "version": "0.0.1"},
+        })
+        capabilities = (result.get("capabilities") if isinstance(result, dict) else None) or {}
+        if CONTENT_LENGTH in ((capabilities.get("experimental") or {}).get("framing") or []):
+            self.transport.framing = CONTENT_LENGTH
+        try:
+            self.transport.notify("notifications/initialized")
+        except Exception:
+            pass
+        return result
+
+    async def list_tools(self) -> Any:
+        if not self._legacy:
+            try:
+                result = await self.request("tools/list")
+                self._legacy = False
+                return result.get("tools", []) if isinstance(result, dict) else result
+            except RuntimeError as exc:
+                if not self._is_method_not_found(exc):
+                    raise
+                self._legacy = True
+        return await self.request("mcp.list_tools")
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        if not self._legacy:
+            try:
+                result = await self.request("tools/call", {"name": name, "arguments": arguments or {}})
+                self._legacy = False
+                return result
+            except RuntimeError as exc:
+                if not self._is_method_not_found(exc):
+                    raise
+                self._legacy = True
+        return await self.request(name, arguments)
+
+    async def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return await self.request(method, params)
+
+    async def call_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """
+        Call several tools in one JSON-RPC batch. Returns one entry per call, in order;
+        an entry is the exception instance when that call failed.
+        """
+        if self._legacy is None and calls:
+            # the first call settles which convention the server speaks
+            try:
+                first: Any = await self.call_tool(*calls[0])
+            except Exception as exc:
+                first = exc
+            return [first] + (await self.call_tools_batch(calls[1:]) if len(calls) > 1 else [])
+        if self._legacy:
+            requests = [(name, arguments) for name, arguments in calls]
+        else:
+            requests = [("tools/call", {"name": name, "arguments": arguments or {}}) for name, arguments in calls]
+        futures = self.transport.request_batch(requests)
+        return list(await asyncio.gather(*(asyncio.wrap_future(f) for f in futures), return_exceptions=True))
+
+
 class McpManager:
     """
     Manage multiple MCP stdio servers running as subprocesses.
@@ -36,6 +541,10 @@ class McpManager:
         mgr.connect_to_server("fs", "/path/to/fs-mcp", ["--serve"])
         tools = mgr.list_tools()
         result = mgr.call_tool("fs:read_file", {"path": "README.md"})
+
+    All session I/O runs on one background event-loop thread owned by the manager.
+    call_tool() is the blocking API, submit_call() returns a concurrent.futures.Future
+    and acall_tool() can be awaited from any event loop (e.g. FastAPI's).
     """
 
     def __init__(self) -> None:
@@ -45,76 +554,512 @@ class McpManager:
         #   "client": underlying stdio client object,
         #   "session": mcp.ClientSession,
         #   "tools": {tool_name: tool_meta, ...},
-        #   "lock": threading.Lock()
+        #   "lock": threading.Lock(),
+        #   "stop": asyncio.Event (async SDK sessions only),
+        #   "runner": asyncio.Task owning the SDK context managers (async SDK only)
+        #   "invoke": (kind, method name) that last invoked a tool successfully
+        #   "in_flight": number of calls currently running on this server
         # }
         self._servers: Dict[str, Dict[str, Any]] = {}
         self._global_lock = threading.RLock()
+        # tool name -> servers exposing it; rebuilt on connect/disconnect/refresh or TTL expiry
+        self._tool_index: Dict[str, List[str]] = {}
+        self._tool_index_at = 0.0
+        # names reserved by connect_to_server while their server is starting
+        self._starting: set = set()
+        # replica pools: logical name -> {"instances": [instance names], "read_only": set, "rr": int}
+        self._pools: Dict[str, Dict[str, Any]] = {}
+        self._instance_pool: Dict[str, str] = {}
+        # (pool, affinity key) -> instance the key is pinned to
+        self._affinity: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        # circuit breaker per server instance and call statistics per (server, tool)
+        self._breakers: Dict[str, _CircuitBreaker] = {}
+        self._stats: Dict[Tuple[str, str], _CallStats] = {}
+        # cancel key (task id) -> asyncio tasks of its in-flight calls
+        self._calls_by_key: Dict[str, set] = {}
+        # lazy servers: logical name -> {"spec", "instances", "tools" (manifest), "idle_seconds", "last_used", "start_lock"}
+        self._lazy: Dict[str, Dict[str, Any]] = {}
+        # per-server supervision records (spec, state, restarts, stderr log); kept across restarts
+        self._supervision: Dict[str, Dict[str, Any]] = {}
+        # runs blocking readiness handshakes so they can be bounded by a timeout; nothing that
+        # waits on a handshake may run on this pool, or a burst of starts starves it
+        self._startup_pool = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="mcp-ready")
+
+        # One persistent event loop for every MCP session instead of asyncio.run per call
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._run_loop, name="mcp-event-loop", daemon=True)
+        self._loop_thread.start()
+
+        # Watches server liveness and restarts crashed servers with backoff
+        self._supervisor_stop = threading.Event()
+        self._supervisor = threading.Thread(target=self._supervise, name="mcp-supervisor", daemon=True)
+        self._supervisor.start()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _run_sync(self, aw: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run an awaitable on the manager loop and block the calling thread for its result."""
+        if threading.current_thread() is self._loop_thread:
+            raise McpConnectionError("Blocking MCP call made from the MCP event loop; use the async API")
+
+        async def _await() -> Any:
+            return await aw
+
+        fut = asyncio.run_coroutine_threadsafe(_await(), self._loop)
+        try:
+            return fut.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # cancelling the coroutine also cancels the request on multiplexed transports
+            fut.cancel()
+            raise McpTimeoutError(f"MCP request timed out after {timeout:g}s") from None
+
+    async def _session_owner(self, name: str, command: str, args: List[str], ready: "asyncio.Future[Any]", stop: asyncio.Event) -> None:
+        """
+        Own the async SDK context managers for one server. anyio requires them to be
+        entered and exited from the same task, so this task lives as long as the session.
+        """
+        params = mcp.StdioServerParameters(command=command, args=list(args))
+        try:
+            async with mcp.stdio_client(params) as (read, write):
+                async with mcp.ClientSession(read, write) as session:
+                    await session.initialize()
+                    ready.set_result(session)
+                    await stop.wait()
+        except BaseException as exc:
+            if not ready.done():
+                ready.set_exception(exc)
+            elif not isinstance(exc, asyncio.CancelledError):
+                logger.warning("MCP session for %s ended with error: %s", name, exc)
+
+    def _connect_async_sdk(self, name: str, command: str, args: List[str], ready_timeout: float) -> Dict[str, Any]:
+        async def _start() -> Tuple[Any, asyncio.Event, "asyncio.Task[None]"]:
+            loop = asyncio.get_running_loop()
+            ready: "asyncio.Future[Any]" = loop.create_future()
+            stop = asyncio.Event()
+            task = loop.create_task(self._session_owner(name, command, args, ready, stop))
+            try:
+                # ready resolves once the protocol `initialize` response has arrived
+                session = await asyncio.wait_for(asyncio.shield(ready), ready_timeout)
+            except asyncio.TimeoutError:
+                task.cancel()
+                raise McpConnectionError(f"MCP server '{name}' did not answer initialize within {ready_timeout:g}s")
+            return session, stop, task
+
+        session, stop, task = self._run_sync(_start())
+        return {
+            "proc": None,
+            "cmgr": None,
+            "client": None,
+            "session": session,
+            "tools": {},
+            "lock": threading.RLock(),
+            "stop": stop,
+            "runner": task,
+        }
 
-    def connect_to_server(self, name: str, command: str, args: List[str]) -> None:
+    def connect_to_server(
+        self,
+        name: str,
+        command: str,
+        args: List[str],
+        ready_timeout: float = 10.0,
+        ready_line: Optional[str] = None,
+        protocol: Optional[str] = None,
+        call_timeout: Optional[float] = None,
+    ) -> float:
         """
         Spawn an MCP server process and initialize an mcp.ClientSession.
 
         - name: logical name for the server (must be unique)
         - command: executable path
         - args: list of arguments
+        - ready_timeout: seconds to wait for the server to become ready
+        - ready_line: optional regex; when set, readiness is a matching stderr line
+          instead of the protocol `initialize` response
+        - protocol: "jsonrpc" forces the built-in multiplexed JSON-RPC transport
+          (also used when the installed mcp package has no stdio client)
+        - call_timeout: default timeout in seconds for tool calls on this server
+
+        Returns the startup latency in milliseconds. The global lock is only held
+        to reserve the name, so several servers can start concurrently.
         """
+        spec = {
+            "command": command,
+            "args": list(args),
+            "ready_timeout": ready_timeout,
+            "ready_line": ready_line,
+            "protocol": protocol,
+            "call_timeout": call_timeout,
+        }
         with self._global_lock:
-            if name in self._servers:
+            if name in self._servers or name in self._starting:
                 raise McpConnectionError(f"MCP server with name '{name}' already connected")
+            self._starting.add(name)
+            record = self._supervision.get(name)
+            if record is None:
+                record = self._supervision[name] = {
+                    "spec": spec,
+                    "state": "starting",
+                    "restarts": 0,
+                    "failures": 0,
+                    "stderr": deque(maxlen=STDERR_LOG_LINES),
+                    "started_at": None,
+                    "last_exit_code": None,
+                    "last_crash_at": None,
+                    "next_restart_at": None,
+                    "last_error": None,
+                }
+            record["spec"] = spec
+
+        try:
+            return self._start_server(name, spec, record)
+        except Exception:
+            with self._global_lock:
+                # a server that never came up is not supervised
+                if record.get("started_at") is None:
+                    self._supervision.pop(name, None)
+            raise
+        finally:
+            with self._global_lock:
+                self._starting.discard(name)
+
+    def _start_server(self, name: str, spec: Dict[str, Any], record: Dict[str, Any]) -> float:
+        """Start one server from its spec and register it. Caller has reserved the name."""
+        command, args, protocol = spec["command"], spec["args"], spec.get("protocol")
+        ready_timeout = spec.get("ready_timeout") or 10.0
+        started = time.monotonic()
+        if _is_async_sdk() and protocol != "jsonrpc":
+            # The official SDK spawns and owns the subprocess itself
+            logger.info("Starting MCP server %s via SDK: %s %s", name, command, args)
+            try:
+                server_entry = self._connect_async_sdk(name, command, args, ready_timeout)
+            except McpConnectionError:
+                raise
+            except Exception as exc:
+                raise McpConnectionError(f"Failed to initialize MCP client for '{name}': {exc}") from exc
+        else:
+            server_entry = self._connect_stdio(
+                name, command, args, ready_timeout, spec.get("ready_line"), protocol, record["stderr"]
+            )
+
+        startup_ms = (time.monotonic() - started) * 1000.0
+        server_entry["startup_ms"] = startup_ms
+        logger.info("MCP server %s ready in %.1f ms", name, startup_ms)
+
+        # Attempt to discover tools immediately (best-effort)
+        try:
+            tools = self._discover_tools(server_entry["session"])
+            server_entry["tools"] = tools or {}
+            logger.info("Discovered %d tools for server %s", len(server_entry["tools"]), name)
+        except Exception as e:
+            logger.warning("Tool discovery failed for server %s: %s", name, e)
+
+        with self._global_lock:
+            self._servers[name] = server_entry
+            self._rebuild_tool_index()
+            record.update(state="running", started_at=time.monotonic(), next_restart_at=None, last_error=None)
+            lazy = self._lazy.get(self._instance_pool.get(name, name))
+        if lazy is not None and server_entry.get("tools"):
+            lazy["tools"] = server_entry["tools"]
+            lazy["last_used"] = time.monotonic()
+            _save_manifest(self._instance_pool.get(name, name), lazy["spec"], server_entry["tools"])
+        return startup_ms
+
+    def connect_servers(self, specs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Start several servers concurrently. Each spec is
+        {"name", "command", "args", optional "ready_timeout", "ready_line", "protocol",
+        "replicas", "read_only_tools", "lazy", "idle_seconds", "call_timeout"}. A spec with replicas > 1
+        starts instances named "<name>#0".."<name>#N-1" that are addressed and
+        load-balanced as "<name>". A lazy server with a cached tool manifest is not
+        started: its tools are advertised from the manifest and the process starts on
+        first use, then stops after idle_seconds without calls.
+        Servers that are already connected are skipped. Returns
+        {name: {"ok": bool, "startup_ms": float | None, "error": str | None}}.
+        """
+        report: Dict[str, Dict[str, Any]] = {}
+        expanded: List[Dict[str, Any]] = []
+        for sp in specs:
+            instances = self._register_pool(sp)
+            if sp.get("lazy") and self._register_lazy(sp, instances):
+                report[sp["name"]] = {"ok": True, "startup_ms": None, "error": None, "lazy": True}
+                continue
+            # lazy servers without a manifest start once now so their tools can be recorded
+            expanded.extend(dict(sp, name=inst) for inst in instances)
+
+        with self._global_lock:
+            pending = [sp for sp in expanded if sp.get("name") not in self._servers and sp.get("name") not in self._starting]
+        if not pending:
+            return report
 
-            cmd = [command] + list(args)
-            logger.info("Starting MCP server %s: %s", name, cmd)
-            proc = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                bufsize=0,
+        def _start(spec: Dict[str, Any]) -> float:
+            return self.connect_to_server(
+                spec["name"],
+                spec["command"],
+                list(spec.get("args") or []),
+                ready_timeout=float(spec.get("ready_timeout") or 10.0),
+                ready_line=spec.get("ready_line"),
+                protocol=spec.get("protocol"),
+                call_timeout=spec.get("call_timeout"),
             )
 
-            # Allow small startup time for server to initialize
-            time.sleep(0.25)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="mcp-start") as pool:
+            futures = {sp["name"]: pool.submit(_start, sp) for sp in pending}
+            for sname, fut in futures.items():
+                try:
+                    report[sname] = {"ok": True, "startup_ms": fut.result(), "error": None}
+                except Exception as exc:
+                    logger.warning("MCP server %s failed to start: %s", sname, exc)
+                    report[sname] = {"ok": False, "startup_ms": None, "error": str(exc)}
+        return report
+
+    def _register_pool(self, spec: Dict[str, Any]) -> List[str]:
+        """Register the replica pool for a spec (if replicas > 1) and return its instance names."""
+        replicas = int(spec.get("replicas") or 1)
+        if replicas <= 1:
+            return [spec["name"]]
+        instances = [f"{spec['name']}#{i}" for i in range(replicas)]
+        with self._global_lock:
+            pool = self._pools.setdefault(spec["name"], {"instances": [], "read_only": set(), "rr": 0})
+            pool["instances"] = instances
+            pool["read_only"] = set(spec.get("read_only_tools") or [])
+            for inst in instances:
+                self._instance_pool[inst] = spec["name"]
+        return instances
+
+    def _register_lazy(self, spec: Dict[str, Any], instances: List[str]) -> bool:
+        """Track a lazy server; True when its tools are known (manifest or earlier start) and startup can wait."""
+        name = spec["name"]
+        with self._global_lock:
+            record = self._lazy.get(name)
+            if record is None:
+                record = self._lazy[name] = {
+                    "spec": dict(spec),
+                    "instances": instances,
+                    "tools": None,
+                    "idle_seconds": float(spec.get("idle_seconds") or DEFAULT_IDLE_SECONDS),
+                    "last_used": time.monotonic(),
+                    "start_lock": threading.Lock(),
+                }
+        if record["tools"] is None:
+            record["tools"] = _load_manifest(name, spec)
+            if record["tools"] is not None:
+                with self._global_lock:
+                    self._rebuild_tool_index()
+        return record["tools"] is not None
+
+    def _ensure_started(self, name: str) -> None:
+        """Start the instances of a lazy server that are not running. Blocks; never call on the manager loop."""
+        record = self._lazy.get(name)
+        if record is None:
+            return
+        record["last_used"] = time.monotonic()
+        with record["start_lock"]:
+            with self._global_lock:
+                missing = [n for n in record["instances"] if n not in self._servers]
+            if not missing:
+                return
+            logger.info("Starting lazy MCP server %s on first use", name)
+            report = self.connect_servers([dict(record["spec"], lazy=False)])
+            with self._global_lock:
+                running = any(n in self._servers for n in record["instances"])
+            if not running:
+                errors = "; ".join(r["error"] for r in report.values() if r.get("error"))
+                raise McpConnectionError(f"Lazy MCP server '{name}' failed to start: {errors}")
+
+    def connect_configured(
+        self,
+        config: Any,
+        idle_seconds: Optional[float] = None,
+        call_timeout: Optional[float] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Start servers from the MCP_SERVERS setting in parallel. Supports the dict form
+        {name: "cmd" | [cmd, *args] | {"command", "args", ...}} and the list form
+        [{"name", "command", "args", ...}, ...]. Best-effort: never raises for bad entries.
+        idle_seconds and call_timeout are defaults for entries that do not set their own.
+        """
+        specs: List[Dict[str, Any]] = []
+        if isinstance(config, dict):
+            items = list(config.items())
+        elif isinstance(config, list):
+            items = [(e.get("name"), e) for e in config if isinstance(e, dict)]
+        else:
+            items = []
+        for sname, cfg in items:
+            if not sname:
+                continue
+            if isinstance(cfg, str):
+                spec: Dict[str, Any] = {"command": cfg, "args": []}
+            elif isinstance(cfg, list):
+                spec = {"command": cfg[0] if cfg else "", "args": cfg[1:]}
+            elif isinstance(cfg, dict):
+                spec = dict(cfg)
+                spec["command"] = cfg.get("command") or cfg.get("cmd") or ""
+                spec["args"] = cfg.get("args") or []
+            else:
+                continue
+            if spec["command"]:
+                spec["name"] = sname
+                if idle_seconds is not None:
+                    spec.setdefault("idle_seconds", idle_seconds)
+                if call_timeout is not None:
+                    spec.setdefault("call_timeout", call_timeout)
+                specs.append(spec)
+        return self.connect_servers(specs)
+
+    def startup_report(self) -> Dict[str, Optional[float]]:
+        """Startup latency (ms) per connected server."""
+        with self._global_lock:
+            return {n: e.get("startup_ms") for n, e in self._servers.items()}
 
-            # Use mcp.stdio_client and mcp.ClientSession per SDK guidance.
-            # We try to enter the stdio_client context manually so the session
-            # can be used for the lifetime of the subprocess.
+    def _drain_stderr(self, name: str, proc: subprocess.Popen, log: "deque[str]", ready_line: Optional[str]) -> Optional[threading.Event]:
+        """
+        Move the server's stderr into its bounded log so a chatty server never blocks on
+        a full pipe. Returns an Event set on the first line matching ready_line, if given.
+        """
+        pattern = re.compile(ready_line) if ready_line else None
+        seen = threading.Event() if pattern else None
+
+        def _drain() -> None:
             try:
+                for raw in iter(proc.stderr.readline, b""):
+                    line = raw.decode("utf-8", errors="replace").rstrip()[:2000]
+                    log.append(line)
+                    logger.debug("[%s stderr] %s", name, line)
+                    if seen is not None and not seen.is_set() and pattern.search(line):
+                        seen.set()
+            except (OSError, ValueError):
+                pass
+
+        threading.Thread(target=_drain, name=f"mcp-stderr-{name}", daemon=True).start()
+        return seen
+
+    def _wait_ready(self, name: str, session: Any, timeout: float, ready_seen: Optional[threading.Event]) -> None:
+        """
+        Block until the server is ready: either a stderr line matching ready_line, or a
+        response to the protocol `initialize` request. A "method not found" error still
+        proves the server is reading requests, so it counts as ready.
+        """
+        if ready_seen is not None:
+            if not ready_seen.wait(timeout):
+                raise McpConnectionError(f"MCP server '{name}' did not print a ready line within {timeout:g}s")
+            return
+
+        def _handshake() -> Any:
+            if hasattr(session, "initialize"):
+                return self._resolve(session.initialize(), timeout)
+            if hasattr(session, "call"):
+                return self._resolve(session.call("initialize", {
+                    "protocolVersion": "2024-11-05",
+                    "capabilities": {},
+                    "clientInfo": {"name": "agent-server", "version": "0.0.1"},
+                }), timeout)
+            return None
+
+        fut = self._startup_pool.submit(_handshake)
+        try:
+            fut.result(timeout)
+        except concurrent.futures.TimeoutError:
+            raise McpConnectionError(f"MCP server '{name}' did not answer initialize within {timeout:g}s")
+        except Exception as exc:
+            text = str(exc).lower()
+            if "-32601" in text or "method not found" in text:
+                return
+            raise McpConnectionError(f"MCP server '{name}' failed initialize: {exc}") from exc
+
+    def _connect_stdio(
+        self,
+        name: str,
+        command: str,
+        args: List[str],
+        ready_timeout: float,
+        ready_line: Optional[str],
+        protocol: Optional[str] = None,
+        stderr_log: Optional["deque[str]"] = None,
+    ) -> Dict[str, Any]:
+        """Spawn the server ourselves and wrap it with a stdio client/session."""
+        cmd = [command] + list(args)
+        logger.info("Starting MCP server %s: %s", name, cmd)
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            # buffered pipes: readline() on an unbuffered pipe reads one byte per syscall
+            bufsize=READ_CHUNK_BYTES,
+        )
+        ready_seen = self._drain_stderr(
+            name, proc, stderr_log if stderr_log is not None else deque(maxlen=STDERR_LOG_LINES), ready_line
+        )
+
+        # Use mcp.stdio_client and mcp.ClientSession per SDK guidance.
+        # We try to enter the stdio_client context manually so the session
+        # can be used for the lifetime of the subprocess.
+        cmgr = None
+        try:
+            if protocol == "jsonrpc" or not hasattr(mcp, "stdio_client"):
+                client = JsonRpcStdioTransport(proc)
+                session = JsonRpcSession(client)
+            else:
                 cmgr = mcp.stdio_client(proc)
                 # Enter the context manager to obtain the client transport.
                 client = cmgr.__enter__()  # type: ignore[attr-defined]
                 session = mcp.ClientSession(client)
-            except Exception as exc:
-                # Ensure process is killed on failure to initialise
-                try:
-                    proc.kill()
-                except Exception:
-                    pass
-                raise McpConnectionError(f"Failed to initialize MCP client for '{name}': {exc}") from exc
+            # Wait for the handshake instead of a fixed startup delay
+            self._wait_ready(name, session, ready_timeout, ready_seen)
+        except Exception as exc:
+            # Ensure process is killed on failure to initialise
+            try:
+                proc.kill()
+            except Exception:
+                pass
+            if isinstance(exc, McpConnectionError):
+                raise
+            raise McpConnectionError(f"Failed to initialize MCP client for '{name}': {exc}") from exc
 
-            server_entry: Dict[str, Any] = {
-                "proc": proc,
-                "cmgr": cmgr,
-                "client": client,
-                "session": session,
-                "tools": {},  # filled by discovery
-                "lock": threading.RLock(),
-            }
+        return {
+            "proc": proc,
+            "cmgr": cmgr,
+            "client": client,
+            "session": session,
+            "tools": {},  # filled by discovery
+            "lock": threading.RLock(),
+        }
 
-            self._servers[name] = server_entry
+    def _resolve(self, value: Any, timeout: Optional[float] = None) -> Any:
+        """Resolve a possibly-awaitable session result on the manager loop."""
+        if inspect.isawaitable(value):
+            return self._run_sync(value, timeout)
+        return value
 
-            # Attempt to discover tools immediately (best-effort)
-            try:
-                tools = self._discover_tools(session)
-                server_entry["tools"] = tools or {}
-                logger.info("Discovered %d tools for server %s", len(server_entry["tools"]), name)
-            except Exception as e:
-                logger.warning("Tool discovery failed for server %s: %s", name, e)
+    @staticmethod
+    def _normalise_tools(tools: Any) -> Optional[Dict[str, Any]]:
+        # SDK list_tools() returns a ListToolsResult with a .tools list of Tool models
+        if hasattr(tools, "tools") and not callable(getattr(tools, "tools")):
+            tools = list(getattr(tools, "tools") or [])
+        if isinstance(tools, dict):
+            return tools
+        if isinstance(tools, list):
+            out: Dict[str, Any] = {}
+            for t in tools:
+                meta = _to_plain(t)
+                if isinstance(meta, dict):
+                    out[meta.get("name", str(t))] = meta
+                else:
+                    out[str(t)] = meta
+            return out
+        return None
 
-    def _discover_tools(self, session: mcp.ClientSession) -> Dict[str, Any]:
+    def _discover_tools(self, session: mcp.ClientSession, timeout: float = DISCOVERY_TIMEOUT_SECONDS) -> Dict[str, Any]:
         """
         Attempt to query the session for exposed tools.
 
         Tries common method names used by MCP SDKs and falls back gracefully.
+        Each round trip is bounded by timeout; a server that does not answer raises
+        McpTimeoutError instead of being asked again under another method name.
         Returns a mapping tool_name -> metadata (may be None if not available).
         """
         # Common method names to try
@@ -123,12 +1068,13 @@ class McpManager:
             if hasattr(session, cand):
                 try:
                     method = getattr(session, cand)
-                    tools = method() if callable(method) else method
+                    tools = self._resolve(method() if callable(method) else method, timeout)
                     # Normalise to dict
-                    if isinstance(tools, dict):
-                        return tools
-                    if isinstance(tools, list):
-                        return {t.get("name", str(t)): t for t in tools}
+                    normalised = self._normalise_tools(tools)
+                    if normalised is not None:
+                        return normalised
+                except McpTimeoutError:
+                    raise
                 except Exception:
                     # continue to other candidates
                     logger.debug("Candidate %s on session raised during discovery", cand, exc_info=True)
@@ -136,16 +1082,13 @@ class McpManager:
         # As a last resort, try to call an RPC named "mcp.list_tools" via generic call API
         try:
             if hasattr(session, "call"):
-                maybe = session.call("mcp.list_tools", {})
                 # call might return a list/dict or a coroutine
-                if inspect.isawaitable(maybe):
-                    import asyncio
-
-                    maybe = asyncio.run(maybe)
-                if isinstance(maybe, dict):
-                    return maybe
-                if isinstance(maybe, list):
-                    return {t.get("name", str(t)): t for t in maybe}
+                maybe = self._resolve(session.call("mcp.list_tools", {}), timeout)
+                normalised = self._normalise_tools(maybe)
+                if normalised is not None:
+                    return normalised
+        except McpTimeoutError:
+            raise
         except Exception:
             logger.debug("Fallback discovery via session.call failed", exc_info=True)
 
@@ -158,72 +1101,577 @@ class McpManager:
 
         Returns a dict mapping server_name -> {tool_name: metadata}
         """
+        # servers with no tool list yet are re-discovered lazily. Discovery waits on the
+        # manager loop, whose call path takes the global lock, so it runs without the lock.
+        with self._global_lock:
+            stale = [(n, e) for n, e in self._servers.items() if not isinstance(e.get("tools"), dict) or not e.get("tools")]
+        discovered = False
+        for name, entry in stale:
+            try:
+                tools = self._discover_tools(entry["session"])
+            except Exception:
+                continue
+            entry["tools"] = tools or {}
+            discovered = discovered or bool(tools)
+
         with self._global_lock:
+            if discovered:
+                self._rebuild_tool_index()
             out: Dict[str, Dict[str, Any]] = {}
             for name, entry in self._servers.items():
                 tools = entry.get("tools") or {}
-                # if tools is callable or a session attribute, attempt re-discovery lazily
-                if not isinstance(tools, dict) or not tools:
-                    try:
-                        tools = self._discover_tools(entry["session"])
-                        entry["tools"] = tools or {}
-                    except Exception:
-                        tools = entry.get("tools") or {}
+                # replicas expose the same tools; list them once under the pool name
+                pool = self._instance_pool.get(name)
+                if pool is not None:
+                    if not out.get(pool):
+                        out[pool] = tools
+                    continue
                 out[name] = tools
+            # lazy servers that are not running advertise their cached manifest
+            for name, lazy in self._lazy.items():
+                if not out.get(name) and lazy["tools"]:
+                    out[name] = lazy["tools"]
             return out
 
+    def _rebuild_tool_index(self) -> None:
+        """Rebuild the tool name -> servers index from cached tool lists. Caller holds the global lock."""
+        index: Dict[str, List[str]] = {}
+        for server, entry in self._servers.items():
+            tools = entry.get("tools")
+            owner = self._instance_pool.get(server, server)
+            if isinstance(tools, dict):
+                for tname in tools:
+                    owners = index.setdefault(tname, [])
+                    if owner not in owners:
+                        owners.append(owner)
+        for name, lazy in self._lazy.items():
+            for tname in lazy["tools"] or {}:
+                owners = index.setdefault(tname, [])
+                if name not in owners:
+                    owners.append(name)
+        self._tool_index = index
+        self._tool_index_at = time.monotonic()
+
+    def refresh_tools(self, name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Re-run discovery for one server (or all) and rebuild the tool index."""
+        with self._global_lock:
+            names = [name] if name else list(self._servers.keys())
+            entries = [(n, self._servers[n]) for n in names if n in self._servers]
+        for n, entry in entries:
+            try:
+                entry["tools"] = self._discover_tools(entry["session"]) or {}
+            except Exception as e:
+                logger.warning("Tool discovery failed for server %s: %s", n, e)
+        with self._global_lock:
+            self._rebuild_tool_index()
+        return self.list_tools()
+
+    def _servers_for_tool(self, name: str) -> List[str]:
+        with self._global_lock:
+            expired = time.monotonic() - self._tool_index_at > TOOL_INDEX_TTL_SECONDS
+        if expired:
+            # list_tools() re-discovers servers whose tool list is still empty
+            self.list_tools()
+            with self._global_lock:
+                self._rebuild_tool_index()
+        with self._global_lock:
+            return list(self._tool_index.get(name, ()))
+
     def _resolve_tool(self, name: str) -> Tuple[str, str]:
         """
         Resolve a tool specification to (server_name, tool_name).
 
         Accepted formats:
           - "server:tool"
-          - "server.tool"
-          - "tool" (attempts to find a unique tool across servers)
+          - "tool" (looked up in the tool index; must be unique across servers)
+          - "server.tool" (when no tool is literally named so)
         """
         if ":" in name:
             server, tool = name.split(":", 1)
             return server, tool
-        if "." in name:
+
+        servers = self._servers_for_tool(name)
+        if not servers and "." in name:
             server, tool = name.split(".", 1)
             return server, tool
-
-        # search across servers
-        matches: List[Tuple[str, str]] = []
-        tools_map = self.list_tools()
-        for server, tools in tools_map.items():
-            if name in tools:
-                matches.append((server, name))
-            else:
-                # some tool metadata may include 'name' field inside list form
-                for tname in tools.keys():
-                    if tname == name:
-                        matches.append((server, tname))
-
-        if not matches:
+        if not servers:
             raise McpConnectionError(f"Tool '{name}' not found on any connected server")
-        if len(matches) > 1:
-            servers = ", ".join(s for s, _ in matches)
-            raise McpConnectionError(f"Ambiguous tool name '{name}' found on servers: {servers}. Use 'server:tool' form.")
-        return matches[0]
+        if len(servers) > 1:
+            raise McpConnectionError(f"Ambiguous tool name '{name}' found on servers: {', '.join(servers)}. Use 'server:tool' form.")
+        return servers[0], name
 
-    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+    def call_tool(
+        self,
+        name: str,
+        arguments: Dict[str, Any],
+        timeout: Optional[float] = None,
+        affinity: Optional[str] = None,
+        cancel_key: Optional[str] = None,
+    ) -> Any:
         """
         Route the tool call to the appropriate server and invoke the tool.
 
         - name: either "server:tool", "server.tool", or a unique "tool"
         - arguments: dict of arguments to pass to the tool
+        - timeout: seconds before the call fails with McpTimeoutError (defaults to the
+          server's call_timeout)
+        - affinity: optional key (e.g. a task id); calls with the same key go to the
+          same instance of a replicated server
+        - cancel_key: optional key (e.g. a task id); cancel_calls(key) aborts the call
 
         Returns whatever the remote tool returns (decoded if necessary).
         """
-        server_name, tool_name = self._resolve_tool(name)
+        fut = self.submit_call(name, arguments, affinity=affinity, timeout=timeout, cancel_key=cancel_key)
+        bound = self._result_bound(timeout)
+        try:
+            return fut.result(bound)
+        except concurrent.futures.CancelledError:
+            raise McpCallCancelled(f"Call to '{name}' was cancelled")
+        except concurrent.futures.TimeoutError:
+            fut.cancel()
+            raise McpTimeoutError(f"Call to '{name}' did not complete within {bound:g}s") from None
+
+    def submit_call(
+        self,
+        name: str,
+        arguments: Dict[str, Any],
+        affinity: Optional[str] = None,
+        timeout: Optional[float] = None,
+        cancel_key: Optional[str] = None,
+    ) -> "concurrent.futures.Future[Any]":
+        """Thread-safe: schedule a tool call on the manager loop and return a Future for its result."""
+        return asyncio.run_coroutine_threadsafe(self._invoke(name, arguments, affinity, timeout, cancel_key), self._loop)
+
+    async def acall_tool(
+        self,
+        name: str,
+        arguments: Dict[str, Any],
+        affinity: Optional[str] = None,
+        timeout: Optional[float] = None,
+        cancel_key: Optional[str] = None,
+    ) -> Any:
+        """Await a tool call from any event loop; the call itself runs on the manager loop."""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            return await self._invoke(name, arguments, affinity, timeout, cancel_key)
+        return await asyncio.wrap_future(
+            self.submit_call(name, arguments, affinity=affinity, timeout=timeout, cancel_key=cancel_key)
+        )
+
+    def _call_timeout(self, server_name: str) -> float:
+        """Configured call_timeout of a server (or replica pool / lazy server), else the default."""
+        with self._global_lock:
+            pool = self._pools.get(server_name)
+            specs = [r["spec"] for n in (pool["instances"] if pool else [server_name]) for r in [self._supervision.get(n)] if r]
+            lazy = self._lazy.get(server_name)
+            if lazy is not None:
+                specs.append(lazy["spec"])
+        for spec in specs:
+            if spec.get("call_timeout"):
+                return float(spec["call_timeout"])
+        return DEFAULT_CALL_TIMEOUT_SECONDS
+
+    def _result_bound(self, timeout: Optional[float]) -> float:
+        """How long a blocking caller waits for a call: its timeout (or the largest configured one) plus slack."""
+        if timeout is None:
+            with self._global_lock:
+                specs = [r["spec"] for r in self._supervision.values()] + [l["spec"] for l in self._lazy.values()]
+            timeout = max([DEFAULT_CALL_TIMEOUT_SECONDS] + [float(sp["call_timeout"]) for sp in specs if sp.get("call_timeout")])
+        return timeout + CALL_RESULT_GRACE_SECONDS
+
+    async def _within(self, what: str, budget: float, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking step (tool resolution, lazy start) in a worker thread, bounded by budget seconds."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(None, func, *args), max(0.0, budget))
+        except asyncio.TimeoutError:
+            raise McpTimeoutError(f"{what} timed out") from None
+
+    def cancel_calls(self, cancel_key: str) -> int:
+        """Cancel every in-flight call made with cancel_key (e.g. when its task is cancelled). Returns the count."""
+        with self._global_lock:
+            tasks = list(self._calls_by_key.get(cancel_key, ()))
+        for task in tasks:
+            self._loop.call_soon_threadsafe(task.cancel)
+        return len(tasks)
+
+    def _breaker(self, server_name: str) -> _CircuitBreaker:
+        breaker = self._breakers.get(server_name)
+        if breaker is None:
+            breaker = self._breakers.setdefault(server_name, _CircuitBreaker())
+        return breaker
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per server: circuit breaker state and per-tool call counts and latencies."""
+        with self._global_lock:
+            out: Dict[str, Any] = {}
+            for (server, tool), stats in self._stats.items():
+                node = out.setdefault(server, {"breaker": None, "tools": {}})
+                node["tools"][tool] = stats.snapshot()
+            for server, breaker in self._breakers.items():
+                out.setdefault(server, {"breaker": None, "tools": {}})["breaker"] = breaker.snapshot()
+            return out
+
+    def _is_read_only(self, pool: Dict[str, Any], instance: str, tool_name: str) -> bool:
+        """Read-only tools are listed in the pool spec or carry the MCP readOnlyHint annotation."""
+        if tool_name in pool["read_only"]:
+            return True
+        meta = (self._servers[instance].get("tools") or {}).get(tool_name)
+        annotations = meta.get("annotations") if isinstance(meta, dict) else None
+        return bool(isinstance(annotations, dict) and annotations.get("readOnlyHint"))
+
+    def _pick_instance(self, server_name: str, tool_names: List[str], affinity: Optional[str]) -> str:
+        """
+        Choose the instance of a replica pool to run a call (or batch) on. Caller holds the global lock.
 
+        Calls with an affinity key stick to the instance first chosen for that key.
+        Calls whose tools are all read-only go to the instance with the fewest calls in
+        flight (ties rotate); anything else goes to the first live instance so replicas
+        never race on writes.
+        """
+        pool = self._pools.get(server_name)
+        if pool is None:
+            return server_name
+        live = [n for n in pool["instances"] if n in self._servers]
+        if not live:
+            raise McpConnectionError(f"No running instance of MCP server '{server_name}'")
+        # prefer instances whose circuit is not open
+        healthy = [n for n in live if self._breaker(n).available()]
+        live = healthy or live
+
+        key = (server_name, str(affinity)) if affinity is not None else None
+        if key is not None:
+            pinned = self._affinity.get(key)
+            if pinned in live:
+                self._affinity.move_to_end(key)
+                return pinned
+        elif not all(self._is_read_only(pool, live[0], t) for t in tool_names):
+            return live[0]
+
+        pool["rr"] = (pool["rr"] + 1) % len(live)
+        rotated = live[pool["rr"]:] + live[:pool["rr"]]
+        choice = min(rotated, key=lambda n: self._servers[n].get("in_flight", 0))
+        if key is not None:
+            self._affinity[key] = choice
+            while len(self._affinity) > MAX_AFFINITY_KEYS:
+                self._affinity.popitem(last=False)
+        return choice
+
+    def _track(self, cancel_key: Optional[str]) -> Optional["asyncio.Task[Any]"]:
+        """Register the current task under cancel_key so cancel_calls() can reach it."""
+        task = asyncio.current_task()
+        if cancel_key is not None and task is not None:
+            with self._global_lock:
+                self._calls_by_key.setdefault(cancel_key, set()).add(task)
+        return task
+
+    def _untrack(self, cancel_key: Optional[str], task: Optional["asyncio.Task[Any]"]) -> None:
+        if cancel_key is None or task is None:
+            return
+        with self._global_lock:
+            tasks = self._calls_by_key.get(cancel_key)
+            if tasks is not None:
+                tasks.discard(task)
+                if not tasks:
+                    del self._calls_by_key[cancel_key]
+
+    async def _invoke(
+        self,
+        name: str,
+        arguments: Dict[str, Any],
+        affinity: Optional[str] = None,
+        timeout: Optional[float] = None,
+        cancel_key: Optional[str] = None,
+    ) -> Any:
+        """Invoke a tool on the manager loop. Async sessions are awaited; sync ones run in a worker thread."""
+        task = self._track(cancel_key)
+        try:
+            return await self._invoke_routed(name, arguments, affinity, timeout)
+        except asyncio.CancelledError:
+            raise McpCallCancelled(f"Call to '{name}' was cancelled") from None
+        finally:
+            self._untrack(cancel_key, task)
+
+    def _admit(self, server_name: str, tool_names: List[str], affinity: Optional[str], timeout: Optional[float]) -> Dict[str, Any]:
+        """
+        Pick the instance for a call (or a batch to one server), apply its timeout and
+        circuit breaker, and count it in flight. Paired with _finish().
+        """
         with self._global_lock:
-            if server_name not in self._servers:
+            target = self._pick_instance(server_name, tool_names, affinity)
+            if target not in self._servers:
                 raise McpConnectionError(f"Server '{server_name}' is not connected")
+            entry = self._servers[target]
+            record = self._supervision.get(target)
+            if timeout is None:
+                timeout = (record["spec"].get("call_timeout") if record else None) or DEFAULT_CALL_TIMEOUT_SECONDS
+            stats = [self._stats.setdefault((target, t), _CallStats()) for t in tool_names]
+            breaker = self._breaker(target)
+            if not breaker.allow():
+                for st in stats:
+                    st.rejected += 1
+                raise McpCircuitOpenError(
+                    f"MCP server '{target}' is failing (circuit open); retry after {breaker.cooldown:g}s"
+                )
+            # only touched on the manager loop, so no lock is needed around the counter
+            entry["in_flight"] = entry.get("in_flight", 0) + 1
+        return {
+            "target": target,
+            "entry": entry,
+            "timeout": timeout,
+            "stats": stats,
+            "breaker": breaker,
+            "lazy": self._lazy.get(server_name),
+            "started": time.monotonic(),
+        }
+
+    def _finish(self, call: Dict[str, Any], outcomes: List[str]) -> None:
+        """Record latency and per-tool outcomes ("ok", "error", "timeout", "cancelled") of an admitted call."""
+        elapsed_ms = (time.monotonic() - call["started"]) * 1000.0
+        call["entry"]["in_flight"] -= 1
+        if call["lazy"] is not None:
+            call["lazy"]["last_used"] = time.monotonic()
+        with self._global_lock:
+            for stats, outcome in zip(call["stats"], outcomes):
+                stats.calls += 1
+                stats.total_ms += elapsed_ms
+                stats.max_ms = max(stats.max_ms, elapsed_ms)
+                stats.recent.append(elapsed_ms)
+                if outcome == "timeout":
+                    stats.timeouts += 1
+                elif outcome == "cancelled":
+                    stats.cancelled += 1
+                elif outcome == "error":
+                    stats.errors += 1
+
+    async def _invoke_routed(self, name: str, arguments: Dict[str, Any], affinity: Optional[str], timeout: Optional[float]) -> Any:
+        # the timeout covers resolution (which may re-discover tools) and lazy start, not just the call
+        started = time.monotonic()
+        server_name, tool_name = await self._within(
+            f"Resolving tool '{name}'", timeout if timeout is not None else DEFAULT_CALL_TIMEOUT_SECONDS,
+            self._resolve_tool, name,
+        )
+        total = timeout if timeout is not None else self._call_timeout(server_name)
+        if server_name in self._lazy:
+            await self._within(
+                f"Starting MCP server '{server_name}' for '{tool_name}'", total - (time.monotonic() - started),
+                self._ensure_started, server_name,
+            )
+
+        call = self._admit(server_name, [tool_name], affinity, max(0.0, total - (time.monotonic() - started)))
+        breaker = call["breaker"]
+        outcome = "ok"
+        try:
+            result = await asyncio.wait_for(self._invoke_on(call["entry"], call["target"], tool_name, arguments), call["timeout"])
+            breaker.record_success()
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            breaker.record_failure()
+            raise McpTimeoutError(f"Tool '{tool_name}' on server '{call['target']}' timed out after {total:g}s") from None
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            # a cancelled call says nothing about the server
+            breaker.release()
+            raise
+        except Exception as exc:
+            outcome = "error"
+            if _is_server_fault(exc):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        finally:
+            self._finish(call, [outcome])
+
+    def call_many(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]],
+        timeout: Optional[float] = None,
+        cancel_key: Optional[str] = None,
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """
+        Run several tool calls, e.g. [("rag:search_knowledge", {"query": q}) for q in queries].
+
+        Calls to the same server go out as one JSON-RPC batch when its transport supports
+        it; otherwise they run as concurrent single calls. Results are returned in the
+        order of `calls`. With return_exceptions, failed calls yield their exception
+        instead of raising the first failure.
+        """
+        fut = asyncio.run_coroutine_threadsafe(self._invoke_many(list(calls), timeout, cancel_key), self._loop)
+        bound = self._result_bound(timeout)
+        try:
+            results = fut.result(bound)
+        except concurrent.futures.CancelledError:
+            raise McpCallCancelled("Batch of MCP calls was cancelled")
+        except concurrent.futures.TimeoutError:
+            fut.cancel()
+            raise McpTimeoutError(f"Batch of MCP calls did not complete within {bound:g}s") from None
+        if not return_exceptions:
+            for r in results:
+                if isinstance(r, BaseException):
+                    raise r
+        return results
+
+    def _supports_batch(self, server_name: str) -> bool:
+        with self._global_lock:
+            pool = self._pools.get(server_name)
+            names = pool["instances"] if pool is not None else [server_name]
+            return any(hasattr(self._servers[n]["session"], "call_tools_batch") for n in names if n in self._servers)
+
+    async def _invoke_many(self, calls: List[Tuple[str, Dict[str, Any]]], timeout: Optional[float], cancel_key: Optional[str]) -> List[Any]:
+        task = self._track(cancel_key)
+        started = time.monotonic()
+
+        def _remaining(server_name: str) -> float:
+            total = timeout if timeout is not None else self._call_timeout(server_name)
+            return max(0.0, total - (time.monotonic() - started))
+
+        try:
+            def _resolve_all() -> List[Any]:
+                out: List[Any] = []
+                for name, _ in calls:
+                    try:
+                        out.append(self._resolve_tool(name))
+                    except Exception as exc:
+                        out.append(exc)
+                return out
+
+            resolved = await self._within(
+                "Resolving tools of the batch", timeout if timeout is not None else DEFAULT_CALL_TIMEOUT_SECONDS,
+                _resolve_all,
+            )
+            results: List[Any] = [None] * len(calls)
+            groups: Dict[str, List[int]] = {}
+            for i, res in enumerate(resolved):
+                if isinstance(res, Exception):
+                    results[i] = res
+                else:
+                    groups.setdefault(res[0], []).append(i)
+
+            async def _single(i: int) -> None:
+                server_name, tool_name = resolved[i]
+                try:
+                    results[i] = await self._invoke_routed(f"{server_name}:{tool_name}", calls[i][1], None, _remaining(server_name))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    results[i] = exc
+
+            async def _group(server_name: str, idxs: List[int]) -> None:
+                if server_name in self._lazy:
+                    try:
+                        await self._within(
+                            f"Starting MCP server '{server_name}'", _remaining(server_name),
+                            self._ensure_started, server_name,
+                        )
+                    except Exception as exc:
+                        for i in idxs:
+                            results[i] = exc
+                        return
+                if len(idxs) == 1 or not self._supports_batch(server_name):
+                    await asyncio.gather(*(_single(i) for i in idxs))
+                    return
+                await self._batch_on(server_name, idxs, resolved, calls, results, _remaining(server_name))
+
+            try:
+                await asyncio.gather(*(_group(srv, idxs) for srv, idxs in groups.items()))
+            except asyncio.CancelledError:
+                raise McpCallCancelled("Batch of MCP calls was cancelled") from None
+            return results
+        finally:
+            self._untrack(cancel_key, task)
+
+    async def _batch_on(
+        self,
+        server_name: str,
+        idxs: List[int],
+        resolved: List[Any],
+        calls: List[Tuple[str, Dict[str, Any]]],
+        results: List[Any],
+        timeout: Optional[float],
+    ) -> None:
+        tool_names = [resolved[i][1] for i in idxs]
+        try:
+            call = self._admit(server_name, tool_names, None, timeout)
+        except Exception as exc:
+            for i in idxs:
+                results[i] = exc
+            return
+        session = call["entry"]["session"]
+        breaker = call["breaker"]
+        outcomes = ["ok"] * len(idxs)
+        try:
+            replies = await asyncio.wait_for(
+                session.call_tools_batch([(resolved[i][1], calls[i][1]) for i in idxs]), call["timeout"]
+            )
+            for pos, (i, reply) in enumerate(zip(idxs, replies)):
+                if isinstance(reply, Exception):
+                    outcomes[pos] = "error"
+                    results[i] = McpConnectionError(
+                        f"Could not invoke tool '{resolved[i][1]}' on server '{call['target']}': {reply}"
+                    )
+                    results[i].__cause__ = reply
+                else:
+                    results[i] = _to_plain(reply)
+            if any(isinstance(r, Exception) and _is_server_fault(r) for r in replies):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        except asyncio.TimeoutError:
+            outcomes = ["timeout"] * len(idxs)
+            breaker.record_failure()
+            for i in idxs:
+                results[i] = McpTimeoutError(
+                    f"Tool '{resolved[i][1]}' on server '{call['target']}' timed out after {round(call['timeout'], 2):g}s"
+                )
+        except asyncio.CancelledError:
+            outcomes = ["cancelled"] * len(idxs)
+            breaker.release()
+            raise
+        except Exception as exc:
+            outcomes = ["error"] * len(idxs)
+            if _is_server_fault(exc):
+                breaker.record_failure()
+            for i in idxs:
+                results[i] = exc
+        finally:
+            self._finish(call, outcomes)
+
+    async def _invoke_on(self, entry: Dict[str, Any], server_name: str, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        session: mcp.ClientSession = entry["session"]
+
+        async def _call(method: Any, *call_args: Any) -> Any:
+            if inspect.iscoroutinefunction(method):
+                return _to_plain(await method(*call_args))
+
+            def _blocking() -> Any:
+                # Synchronous transports are not safe for concurrent use; one call at a time
+                with entry["lock"]:
+                    return method(*call_args)
+
+            result = await loop.run_in_executor(None, _blocking)
+            # If returns awaitable, await it on this loop
+            if inspect.isawaitable(result):
+                result = await result
+            return _to_plain(result)
 
-            entry = self._servers[server_name]
-            session: mcp.ClientSession = entry["session"]
+        # Reuse the method that worked last time instead of probing every candidate
+        cached = entry.get("invoke")
+        if cached is not None:
+            kind, cand = cached
+            method = getattr(session, cand)
+            try:
+                if kind == "generic":
+                    return await _call(method, {"tool": tool_name, "args": arguments})
+                return await _call(method, tool_name, arguments)
+            except Exception as exc:
+                raise McpConnectionError(f"Could not invoke tool '{tool_name}' on server '{server_name}': {exc}") from exc
 
         # Preferred method names for tool invocation on the session
         invoke_candidates = ["call_tool", "call", "invoke", "execute", "run_tool", "run"]
@@ -233,12 +1681,10 @@ class McpManager:
             if hasattr(session, cand):
                 try:
                     method = getattr(session, cand)
-                    result = method(tool_name, arguments) if callable(method) else method
-                    # If returns awaitable, run it
-                    if inspect.isawaitable(result):
-                        import asyncio
-
-                        result = asyncio.run(result)
+                    if not callable(method):
+                        return method
+                    result = await _call(method, tool_name, arguments)
+                    entry["invoke"] = ("tool", cand)
                     return result
                 except Exception as exc:
                     last_exc = exc
@@ -251,11 +1697,8 @@ class McpManager:
                 try:
                     method = getattr(session, cand)
                     payload = {"tool": tool_name, "args": arguments}
-                    result = method(payload)
-                    if inspect.isawaitable(result):
-                        import asyncio
-
-                        result = asyncio.run(result)
+                    result = await _call(method, payload)
+                    entry["invoke"] = ("generic", cand)
                     return result
                 except Exception as exc:
                     last_exc = exc
@@ -270,47 +1713,213 @@ class McpManager:
     def disconnect_server(self, name: str) -> None:
         """
         Gracefully shutdown the stdio session and terminate the subprocess.
+        The server is no longer supervised; a replica pool name stops every instance.
         Safe to call multiple times.
         """
         with self._global_lock:
-            entry = self._servers.get(name)
+            self._lazy.pop(name, None)
+            pool = self._pools.pop(name, None)
+            if pool is not None:
+                for inst in pool["instances"]:
+                    self._instance_pool.pop(inst, None)
+                for key in [k for k in self._affinity if k[0] == name]:
+                    del self._affinity[key]
+            names = pool["instances"] if pool is not None else [name]
+            for n in names:
+                self._supervision.pop(n, None)
+        for n in names:
+            self._close_server(n)
+
+    def _close_server(self, name: str) -> None:
+        """
+        Unregister a connected server, then close its session and process. The closing
+        waits on the manager loop and the process, so it runs without the global lock.
+        """
+        with self._global_lock:
+            entry = self._servers.pop(name, None)
             if not entry:
                 return
+            self._rebuild_tool_index()
 
-            proc: subprocess.Popen = entry.get("proc")
-            cmgr = entry.get("cmgr")
-            client = entry.get("client")
+        proc: subprocess.Popen = entry.get("proc")
+        cmgr = entry.get("cmgr")
+        client = entry.get("client")
 
-            # Attempt to close session/context manager if present
+        # Async SDK sessions: signal the owning task to exit its context managers
+        stop = entry.get("stop")
+        runner = entry.get("runner")
+        if stop is not None:
             try:
-                if cmgr is not None:
-                    # Call __exit__ on the context manager to close underlying resources
-                    cmgr.__exit__(None, None, None)  # type: ignore[attr-defined]
+                self._loop.call_soon_threadsafe(stop.set)
+                if runner is not None:
+                    asyncio.run_coroutine_threadsafe(asyncio.wait_for(asyncio.shield(runner), 5.0), self._loop).result(6.0)
             except Exception:
-                logger.exception("Error while exiting stdio_client context for %s", name)
+                logger.exception("Error while closing MCP session for %s", name)
+
+        # Attempt to close session/context manager if present
+        try:
+            if cmgr is not None:
+                # Call __exit__ on the context manager to close underlying resources
+                cmgr.__exit__(None, None, None)  # type: ignore[attr-defined]
+        except Exception:
+            logger.exception("Error while exiting stdio_client context for %s", name)
+        try:
+            # multiplexed transports fail their in-flight requests on close
+            if client is not None and hasattr(client, "close"):
+                client.close()
+        except Exception:
+            logger.exception("Error while closing MCP transport for %s", name)
+
+        # Terminate process if still running
+        try:
+            if proc and proc.poll() is None:
+                proc.terminate()
+                # give it a short grace period
+                try:
+                    proc.wait(timeout=2.0)
+                except Exception:
+                    proc.kill()
+        except Exception:
+            logger.exception("Error while terminating MCP subprocess for %s", name)
+
+    @staticmethod
+    def _entry_alive(entry: Dict[str, Any]) -> bool:
+        proc = entry.get("proc")
+        if proc is not None:
+            return proc.poll() is None
+        runner = entry.get("runner")
+        if runner is not None:
+            return not runner.done()
+        return True
 
-            # Terminate process if still running
+    def _supervise(self) -> None:
+        while not self._supervisor_stop.wait(SUPERVISE_INTERVAL_SECONDS):
             try:
-                if proc and proc.poll() is None:
-                    proc.terminate()
-                    # give it a short grace period
-                    try:
-                        proc.wait(timeout=2.0)
-                    except Exception:
-                        proc.kill()
+                self._check_servers()
             except Exception:
-                logger.exception("Error while terminating MCP subprocess for %s", name)
+                logger.exception("MCP supervisor check failed")
+
+    def _check_servers(self) -> None:
+        """Detect crashed servers, schedule their restart and start the ones whose backoff elapsed."""
+        now = time.monotonic()
+        with self._global_lock:
+            crashed = [n for n, e in self._servers.items() if n not in self._starting and not self._entry_alive(e)]
+        for name in crashed:
+            with self._global_lock:
+                entry = self._servers.get(name)
+                record = self._supervision.get(name)
+                proc = entry.get("proc") if entry else None
+                exit_code = proc.poll() if proc is not None else None
+            tail = "\n".join(list(record["stderr"])[-10:]) if record else ""
+            logger.warning("MCP server %s exited (code %s); stderr tail:\n%s", name, exit_code, tail)
+            self._close_server(name)
+            if record is None:
+                continue
+            with self._global_lock:
+                if record.get("started_at") is not None and now - record["started_at"] >= RESTART_STABLE_SECONDS:
+                    record["failures"] = 0
+                self._schedule_restart(record, now, exit_code=exit_code)
+
+        # Stop lazy servers that have been idle for longer than their idle_seconds
+        with self._global_lock:
+            idle = []
+            for name, lazy in self._lazy.items():
+                running = [n for n in lazy["instances"] if n in self._servers and n not in self._starting]
+                if (
+                    running
+                    and now - lazy["last_used"] > lazy["idle_seconds"]
+                    and all(self._servers[n].get("in_flight", 0) == 0 for n in running)
+                ):
+                    idle.extend(running)
+        for name in idle:
+            logger.info("Stopping idle lazy MCP server %s", name)
+            self._close_server(name)
+            with self._global_lock:
+                record = self._supervision.get(name)
+                if record is not None:
+                    record.update(state="idle", next_restart_at=None)
+
+        with self._global_lock:
+            due = [
+                n for n, r in self._supervision.items()
+                if r["state"] == "crashed" and r["next_restart_at"] is not None and now >= r["next_restart_at"]
+                and n not in self._servers and n not in self._starting
+            ]
+            for name in due:
+                self._supervision[name]["state"] = "restarting"
+                self._starting.add(name)
+        for name in due:
+            # own thread per restart: _restart blocks on a handshake submitted to _startup_pool
+            threading.Thread(target=self._restart, args=(name,), name=f"mcp-restart-{name}", daemon=True).start()
+
+    def _schedule_restart(self, record: Dict[str, Any], now: float, exit_code: Optional[int] = None, error: Optional[str] = None) -> None:
+        """Mark a record crashed and set its next restart time with exponential backoff. Caller holds the lock."""
+        delay = min(RESTART_BACKOFF_MAX_SECONDS, RESTART_BACKOFF_BASE_SECONDS * (2 ** record["failures"]))
+        record["failures"] += 1
+        record.update(state="crashed", last_crash_at=time.time(), next_restart_at=now + delay)
+        if exit_code is not None:
+            record["last_exit_code"] = exit_code
+        if error is not None:
+            record["last_error"] = error
 
-            # Remove from registry
+    def _restart(self, name: str) -> None:
+        """Restart a crashed server from its spec; tools are re-discovered by _start_server."""
+        try:
+            with self._global_lock:
+                record = self._supervision.get(name)
+            if record is None:
+                return
             try:
-                del self._servers[name]
-            except KeyError:
-                pass
+                self._start_server(name, record["spec"], record)
+            except Exception as exc:
+                logger.warning("Restart of MCP server %s failed: %s", name, exc)
+                with self._global_lock:
+                    self._schedule_restart(record, time.monotonic(), error=str(exc))
+                return
+            record["restarts"] += 1
+            logger.info("MCP server %s restarted (restart #%d)", name, record["restarts"])
+            with self._global_lock:
+                disconnected = name not in self._supervision
+            if disconnected:
+                # disconnect_server() ran while the restart was in progress
+                self._close_server(name)
+        finally:
+            with self._global_lock:
+                self._starting.discard(name)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Health per supervised server: state, pid, restarts, last exit and the stderr tail."""
+        with self._global_lock:
+            out: Dict[str, Dict[str, Any]] = {}
+            for name, record in self._supervision.items():
+                entry = self._servers.get(name) or {}
+                proc = entry.get("proc")
+                out[name] = {
+                    "pool": self._instance_pool.get(name),
+                    "state": record["state"],
+                    "pid": proc.pid if proc is not None else None,
+                    "restarts": record["restarts"],
+                    "last_exit_code": record["last_exit_code"],
+                    "last_crash_at": record["last_crash_at"],
+                    "last_error": record["last_error"],
+                    "startup_ms": entry.get("startup_ms"),
+                    "tools": len(entry.get("tools") or {}),
+                    "stderr_tail": list(record["stderr"])[-20:],
+                }
+            for name, lazy in self._lazy.items():
+                for inst in lazy["instances"]:
+                    if inst in out:
+                        out[inst]["lazy"] = True
+                    else:
+                        out[inst] = {"pool": self._instance_pool.get(inst), "state": "lazy", "lazy": True,
+                                     "tools": len(lazy["tools"] or {})}
+            return out
 
     def shutdown(self) -> None:
-        """Shutdown all known servers."""
+        """Shutdown all known servers. The event loop keeps running so the manager stays usable."""
         with self._global_lock:
-            names = list(self._servers.keys())
+            # pool names first: disconnecting a pool stops all of its instances
+            names = list(self._lazy.keys()) + list(self._pools.keys()) + list(self._servers.keys())
         for n in names:
             try:
                 self.disconnect_server(n)
@@ -320,10 +1929,12 @@ class McpManager:
 
 # Basic module-level helper: a global manager instance
 _global_mcp_manager: Optional[McpManager] = None
+_global_mcp_manager_lock = threading.Lock()
 
 
 def get_global_manager() -> McpManager:
     global _global_mcp_manager
-    if _global_mcp_manager is None:
-        _global_mcp_manager = McpManager()
-    return _global_mcp_manager
\ No newline at end of file
+    with _global_mcp_manager_lock:
+        if _global_mcp_manager is None:
+            _global_mcp_manager = McpManager()
+        return _global_mcp_manager
\ No newline at end of file
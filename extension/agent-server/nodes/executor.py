@@ -10,8 +10,10 @@ from state import AgentState
 from llm import get_llm
 from config import get_settings
 from mcp_client import get_global_manager
-from tools import fs, terminal, search
+from tools import fs, terminal, search, patch, affected_tests
 from schema import Artifact
+from blob_store import spill
+from store import append_task_event
 import uuid
 import json
 
@@ -26,12 +28,20 @@ def _is_error_output(name: str, output: Any) -> bool:
             return True
     return False
 
+def _spill_entry(entry: Dict) -> Dict:
+    """Replace a large 'output' value with a blob reference so it stays out of the message history."""
+    if not isinstance(entry, dict) or "output" not in entry:
+        return entry
+    out = dict(entry)
+    out["output"] = spill(entry["output"])
+    return out
+
 def executor_node(state: AgentState) -> AgentState:
     """
     Execute drafted tool calls attached to the state (state['tool_calls'] or
     encoded in the last AIMessage). This node runs the tools (fs.* and terminal.run_command)
     and appends a ToolMessage containing the outputs. It also creates Artifact objects for
-    any write_file calls.
+    any write_file calls and diff artifacts for apply_patch calls.
 
     NOTE: Shell commands (tool name 'run_command') must NOT be executed directly.
     Instead, they are recorded as pending approvals (HITL) so a human may approve
@@ -50,45 +60,13 @@ def executor_node(state: AgentState) -> AgentState:
     try:
         mcp_mgr = get_global_manager()
         if mcp_config:
-            # support dict form: { name: { "command": "...", "args": [...] } }
-            if isinstance(mcp_config, dict):
-                for sname, cfg in mcp_config.items():
-                    try:
-                        if isinstance(cfg, str):
-                            cmd = cfg
-                            args = []
-                        elif isinstance(cfg, list):
-                            cmd = cfg[0] if cfg else ""
-                            args = cfg[1:] if len(cfg) > 1 else []
-                        elif isinstance(cfg, dict):
-                            cmd = cfg.get("command") or cfg.get("cmd") or ""
-                            args = cfg.get("args") or []
-                        else:
-                            continue
-                        if cmd:
-                            try:
-                                mcp_mgr.connect_to_server(sname, cmd, args)
-                            except Exception:
-                                # best-effort; continue on failure
-                                pass
-                    except Exception:
-                        continue
-            # support list form: [ { "name": "...", "command": "...", "args": [...] }, ... ]
-            elif isinstance(mcp_config, list):
-                for entry in mcp_config:
-                    try:
-                        if not isinstance(entry, dict):
-                            continue
-                        name = entry.get("name")
-                        cmd = entry.get("command") or entry.get("cmd") or ""
-                        args = entry.get("args") or []
-                        if name and cmd:
-                            try:
-                                mcp_mgr.connect_to_server(name, cmd, args)
-                            except Exception:
-                                pass
-                    except Exception:
-                        continue
+            # Servers start concurrently; ones already connected are skipped and lazy
+            # ones are only registered until a tool of theirs is called
+            mcp_mgr.connect_configured(
+                mcp_config,
+                idle_seconds=getattr(settings, "MCP_IDLE_SECONDS", None),
+                call_timeout=getattr(settings, "MCP_CALL_TIMEOUT_SECONDS", None),
+            )
     except Exception:
         mcp_mgr = None
     
@@ -108,8 +86,14 @@ def executor_node(state: AgentState) -> AgentState:
         "list_files": fs.list_files,
         "read_file": fs.read_file,
         "write_file": fs.write_file,
+        "apply_patch": patch.apply_patch,
         "run_command": terminal.run_command,
+        "process_status": terminal.process_status,
+        "process_tail": terminal.process_tail,
+        "process_wait": terminal.process_wait,
+        "process_kill": terminal.process_kill,
         "search_code": search.search_code,
+        "select_tests": affected_tests.select_tests,
     }
     
     # Convert internal tools and discovered MCP tools into a combined list consumable by agents.
@@ -131,6 +115,7 @@ def executor_node(state: AgentState) -> AgentState:
         combined_tools = [{"name": k, "func": v} for k, v in tool_map.items()]
     
     # Discover external tools from MCP manager and wrap them as callables / StructuredTool
+    task_id = state.get("task_id")
     if mcp_mgr is not None:
         try:
             external = mcp_mgr.list_tools() or {}
@@ -140,17 +125,18 @@ def executor_node(state: AgentState) -> AgentState:
                 for tool_key, meta in server_tools.items():
                     full_name = f"{server_name}:{tool_key}"
     
-                    # create a closure that routes calls to the MCP manager
+                    # create a closure that routes calls to the MCP manager; calls are
+                    # keyed by task so cancelling the task aborts them
                     def _make_call(srv: str, tkey: str):
                         def _call(*args, **kwargs):
                             # Prefer kwargs dict as the named arguments payload
                             try:
                                 if kwargs:
-                                    return mcp_mgr.call_tool(f"{srv}:{tkey}", kwargs)
+                                    return mcp_mgr.call_tool(f"{srv}:{tkey}", kwargs, cancel_key=task_id)
                                 if len(args) == 1 and isinstance(args[0], dict):
-                                    return mcp_mgr.call_tool(f"{srv}:{tkey}", args[0])
+                                    return mcp_mgr.call_tool(f"{srv}:{tkey}", args[0], cancel_key=task_id)
                                 # otherwise pass positional args as a list under "args"
-                                return mcp_mgr.call_tool(f"{srv}:{tkey}", {"args": list(args)})
+                                return mcp_mgr.call_tool(f"{srv}:{tkey}", {"args": list(args)}, cancel_key=task_id)
                             except Exception as e:
                                 raise
                         return _call
@@ -253,7 +239,7 @@ def executor_node(state: AgentState) -> AgentState:
                         "type": "escalation",
                         "reason": "retry_limit_exceeded",
                         "status": "pending_human",
-                        "details": {"tool": name, "output": out},
+                        "details": {"tool": name, "output": spill(out)},
                     }
                     pending = state.get("pending_approvals", [])
                     pending.append(escalation)
@@ -263,6 +249,16 @@ def executor_node(state: AgentState) -> AgentState:
 
             outputs.append({"name": name, "output": out})
 
+            # Remember edited files so verification can run only the affected tests
+            edited: List[str] = []
+            if name == "write_file" and isinstance(args, dict) and args.get("path"):
+                edited.append(args["path"])
+            elif name == "apply_patch" and isinstance(out, dict):
+                edited.extend(f.get("path") for f in out.get("files", []) or [] if f.get("path"))
+            if edited:
+                changed = state.get("changed_files") or []
+                state["changed_files"] = changed + [e for e in edited if e not in changed]
+
             # Create artifact for write_file calls when possible
             if name == "write_file":
                 try:
@@ -275,6 +271,17 @@ def executor_node(state: AgentState) -> AgentState:
                     state["artifacts"] = state_artifacts
                 except Exception:
                     pass
+
+            # Create one diff artifact per file touched by apply_patch
+            if name == "apply_patch" and isinstance(out, dict):
+                try:
+                    state_artifacts = state.get("artifacts", [])
+                    for f in out.get("files", []) or []:
+                        art = Artifact(id=uuid.uuid4(), type="diff", title=f.get("path") or "patch", content=f.get("diff") or "")
+                        state_artifacts.append(art)
+                    state["artifacts"] = state_artifacts
+                except Exception:
+                    pass
         except Exception as e:
             # Detect explicit exceptions (file not found, validation errors, etc.)
             had_error = True
@@ -298,7 +305,9 @@ def executor_node(state: AgentState) -> AgentState:
             # Stop processing further tool calls on error
             break
 
-    # Append a ToolMessage (fallback to AIMessage if ToolMessage construction fails)
+    # Append a ToolMessage (fallback to AIMessage if ToolMessage construction fails).
+    # Large outputs are spilled to the blob store and referenced by hash.
+    outputs = [_spill_entry(o) for o in outputs]
     try:
         tool_msg = ToolMessage(content=json.dumps(outputs))
     except Exception:
@@ -319,9 +328,16 @@ def executor_node(state: AgentState) -> AgentState:
             if p.get("type") == "run_command" and p.get("status") == "approved" and not p.get("executed"):
                 p_args = p.get("args", {}) or {}
                 try:
+                    # Stream output line by line into the task's event stream when running under a task
+                    task_id = state.get("task_id")
+                    on_output = None
+                    if task_id:
+                        def on_output(line: str, _tid=task_id, _aid=p.get("id")):
+                            append_task_event(_tid, {"type": "command_output", "approval_id": _aid, "line": line})
                     # Call terminal.run_command using dict kwargs or positional list
                     if isinstance(p_args, dict):
-                        result = terminal.run_command(**p_args)
+                        # Commands of one task share a persistent shell session keyed by task id
+                        result = terminal.run_command(**p_args, on_output=on_output, session_id=task_id)
                     elif isinstance(p_args, list):
                         result = terminal.run_command(*p_args)
                     else:
@@ -338,7 +354,7 @@ def executor_node(state: AgentState) -> AgentState:
                             "error": "detected_error"
                         })
                         p["status"] = "executed"
-                        p["result"] = result
+                        p["result"] = spill(result)
                         p["executed"] = True
 
                         if retry_count > 3:
@@ -347,7 +363,7 @@ def executor_node(state: AgentState) -> AgentState:
                                 "type": "escalation",
                                 "reason": "retry_limit_exceeded",
                                 "status": "pending_human",
-                                "details": {"approval_id": p.get("id"), "output": result},
+                                "details": {"approval_id": p.get("id"), "output": spill(result)},
                             }
                             pending.append(escalation)
                             state["pending_approvals"] = pending
@@ -362,7 +378,7 @@ def executor_node(state: AgentState) -> AgentState:
                             "output": result
                         })
                         p["status"] = "executed"
-                        p["result"] = result
+                        p["result"] = spill(result)
                         p["executed"] = True
                 except Exception as e:
                     had_error = True
@@ -419,6 +435,7 @@ def executor_node(state: AgentState) -> AgentState:
     # If we executed any approvals, append their outputs as a new ToolMessage so the
     # planner and executor nodes can observe the results and react (retry/replan).
     if executed_results:
+        executed_results = [_spill_entry(r) for r in executed_results]
         try:
             exec_msg = ToolMessage(content=json.dumps(executed_results))
         except Exception:
@@ -3,10 +3,12 @@ from typing import List
 import json
 import re
 from pydantic import BaseModel
-from langchain_core.messages import SystemMessage, AIMessage
+from langchain_core.messages import SystemMessage, AIMessage, HumanMessage
 from llm import get_llm
 from state import AgentState
 from utils.repo_map import generate_repo_map
+from utils.symbol_map import generate_symbol_map
+from config import get_settings
 from prompts import planner_system_message
 
 
@@ -17,11 +19,23 @@ class Plan(BaseModel):
 def planner_node(state: AgentState) -> AgentState:
     """
     Call the LLM with a system prompt to produce a Plan and attach it to the state.
-    The repository map is regenerated on every planning turn and appended to the system prompt
-    so the LLM has up-to-date context about the project structure.
+    The repository map is refreshed on every planning turn and appended to the system prompt
+    so the LLM has up-to-date context about the project structure. Unchanged directories are
+    served from the repo map cache, so this only costs one stat per directory.
     """
-    # generate fresh repo map for this planning turn
-    repo_map = generate_repo_map(".")
+    # refresh the (cached) repo map for this planning turn
+    settings = get_settings()
+    if (getattr(settings, "REPO_MAP_MODE", "tree") or "tree").lower() == "symbols":
+        # rank definitions by relevance to the most recent user request
+        query = ""
+        for m in reversed(state.get("messages", []) or []):
+            if isinstance(m, HumanMessage):
+                query = getattr(m, "content", "") or ""
+                break
+        budget = int(getattr(settings, "REPO_MAP_TOKEN_BUDGET", 2048) or 2048)
+        repo_map = generate_symbol_map(".", query=str(query), token_budget=budget)
+    else:
+        repo_map = generate_repo_map(".")
 
     llm = get_llm("reasoning")
     system = planner_system_message(repo_map)
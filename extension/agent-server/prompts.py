@@ -6,6 +6,7 @@ PLANNER_BASE = (
     "Use 'search_knowledge' for high-level conceptual questions or whenever file locations are unclear. "
     "When unsure about where code lives, prefer using 'search_knowledge' to research concepts and file locations. "
     "After making changes, always include a verification step that uses the terminal (for example: run tests or run the script). "
+    "Verification should run only the tests affected by the edited files; 'select_tests' returns that minimal command. "
     "Break the user request into a step-by-step plan."
     "Return ONLY a JSON object matching this schema: {'steps': [<string>, ...]}. "
     "Do not include any additional explanatory text or markdown; ensure output is valid JSON."
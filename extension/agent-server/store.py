@@ -1,5 +1,10 @@
+import threading
+
 # Simple in-memory task store
 TASK_STORE = {}
+# Events kept per task (oldest are dropped first)
+MAX_TASK_EVENTS = 5000
+_events_lock = threading.Lock()
 
 def create_task(task_id):
     """Create a new task entry if it doesn't exist."""
@@ -18,4 +23,36 @@ def update_task_state(task_id, state):
 
 def get_task(task_id):
     """Return the task dict or None if not found."""
-    return TASK_STORE.get(task_id)
\ No newline at end of file
+    return TASK_STORE.get(task_id)
+
+def cancel_task(task_id):
+    """Mark a task as cancelled; running workers stop at their next checkpoint."""
+    task = TASK_STORE.get(task_id)
+    if task is not None:
+        task["cancelled"] = True
+    return task
+
+def is_task_cancelled(task_id):
+    task = TASK_STORE.get(task_id)
+    return bool(task and task.get("cancelled"))
+
+def append_task_event(task_id, event):
+    """Append an event (e.g. a line of command output) to the task's event stream with a sequence number."""
+    with _events_lock:
+        task = TASK_STORE.get(task_id) or create_task(task_id)
+        seq = task.get("event_seq", 0) + 1
+        task["event_seq"] = seq
+        entry = dict(event, seq=seq)
+        events = task.setdefault("events", [])
+        events.append(entry)
+        if len(events) > MAX_TASK_EVENTS:
+            del events[:len(events) - MAX_TASK_EVENTS]
+        return entry
+
+def get_task_events(task_id, after=0):
+    """Return events with seq > after, or None if the task does not exist."""
+    with _events_lock:
+        task = TASK_STORE.get(task_id)
+        if task is None:
+            return None
+        return [e for e in task.get("events", []) if e["seq"] > after]
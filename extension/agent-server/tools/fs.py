@@ -1,7 +1,13 @@
 """Filesystem tools for the agent server, restricted to the current working directory sandbox."""
 import os
-from typing import List
+import fnmatch
+import mmap
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 from langchain_core.tools import tool
+from utils.gitignore import IgnoreStack
 
 ROOT = os.getcwd()
 
@@ -27,11 +33,53 @@ def validate_path(path: str) -> str:
         raise ValueError("Resolved path is outside the sandbox")
     return full
 
+# Directories never descended into by recursive listings
+LIST_EXCLUDED_DIRS = {".git", "node_modules", "venv", ".venv", "__pycache__"}
+LIST_FILES_PAGE_SIZE = 500
+
+
+def _scan_tree(full: str, rel: str, depth: int, max_depth: Optional[int], ignores: Optional[IgnoreStack], excluded: set):
+    """Yield (rel_path, DirEntry, is_dir) in sorted pre-order using os.scandir; no extra stat calls for type."""
+    try:
+        with os.scandir(full) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return
+    for entry in entries:
+        is_dir = entry.is_dir(follow_symlinks=False)
+        if is_dir and entry.name in excluded:
+            continue
+        if ignores is not None and ignores.is_ignored(entry.path, is_dir):
+            continue
+        child_rel = f"{rel}/{entry.name}" if rel else entry.name
+        yield child_rel, entry, is_dir
+        if is_dir and (max_depth is None or depth + 1 < max_depth):
+            child_ignores = ignores.push(entry.path) if ignores is not None else None
+            yield from _scan_tree(entry.path, child_rel, depth + 1, max_depth, child_ignores, excluded)
+
+
 @tool
-def list_files(path: str = ".") -> List[str]:
+def list_files(
+    path: str = ".",
+    recursive: bool = False,
+    max_depth: Optional[int] = None,
+    pattern: Optional[str] = None,
+    respect_gitignore: bool = True,
+    cursor: Optional[str] = None,
+    limit: int = LIST_FILES_PAGE_SIZE,
+) -> Dict[str, Any]:
     """
-    List files and directories directly under the given directory (relative to sandbox).
-    Returns a list of names (not full paths).
+    List entries under the given directory (relative to sandbox).
+
+    - recursive: descend into subdirectories (skips .git, node_modules, venvs, __pycache__).
+    - max_depth: maximum depth for recursive listings (1 = direct children only).
+    - pattern: glob filter, e.g. "*.py" (matched against the name) or "src/**/*.ts"
+      (matched against the relative path).
+    - respect_gitignore: skip entries matched by .gitignore files in the tree.
+    - cursor/limit: pagination; pass back the returned next_cursor to continue.
+
+    Returns {"entries": [{"path", "type": "file"|"dir"|"symlink", "size"}], "next_cursor": str|None}.
+    Paths are relative to `path`.
     """
     full = validate_path(path)
     if not os.path.exists(full):
@@ -39,23 +87,154 @@ def list_files(path: str = ".") -> List[str]:
     if not os.path.isdir(full):
         raise ValueError(f"Not a directory: {path}")
     try:
-        return sorted(os.listdir(full))
+        start = int(cursor) if cursor else 0
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    limit = max(1, int(limit or LIST_FILES_PAGE_SIZE))
+    depth_limit = max_depth if recursive else 1
+    excluded = LIST_EXCLUDED_DIRS if recursive else set()
+
+    ignores: Optional[IgnoreStack] = None
+    if respect_gitignore:
+        # Collect .gitignore files from the sandbox root down to the listed directory
+        cur = ROOT
+        ignores = IgnoreStack(ROOT).push(cur)
+        for part in os.path.relpath(full, ROOT).split(os.sep):
+            if part in ("", "."):
+                continue
+            cur = os.path.join(cur, part)
+            ignores = ignores.push(cur)
+
+    entries: List[Dict[str, Any]] = []
+    seen = 0
+    next_cursor: Optional[str] = None
+    try:
+        for rel, entry, is_dir in _scan_tree(full, "", 0, depth_limit, ignores, excluded):
+            if pattern:
+                target = rel if "/" in pattern else entry.name
+                if not fnmatch.fnmatchcase(target, pattern):
+                    continue
+            if seen < start:
+                seen += 1
+                continue
+            if len(entries) >= limit:
+                next_cursor = str(seen)
+                break
+            seen += 1
+            if entry.is_symlink():
+                kind, size = "symlink", None
+            elif is_dir:
+                kind, size = "dir", None
+            else:
+                kind = "file"
+                # served from the scandir cache on Windows; a single lstat elsewhere
+                size = entry.stat(follow_symlinks=False).st_size
+            entries.append({"path": rel, "type": kind, "size": size})
     except OSError as e:
         raise ValueError(f"Error listing directory {path}: {e}")
+    return {"entries": entries, "next_cursor": next_cursor}
+
+# Default cap on how much of a file read_file returns in one call
+READ_FILE_MAX_BYTES = 256 * 1024
+# Number of per-file line-offset indexes kept in memory
+_LINE_INDEX_CACHE_SIZE = 32
+# full_path -> ((mtime_ns, size), array of line start offsets)
+_line_index_cache: "OrderedDict[str, Tuple[Tuple[int, int], array]]" = OrderedDict()
+_line_index_lock = threading.Lock()
+
+
+def _line_index(full: str, st: os.stat_result) -> array:
+    """
+    Return byte offsets of the start of every line in the file, built with mmap
+    and cached per file version (mtime + size) so repeated ranged reads are cheap.
+    """
+    version = (st.st_mtime_ns, st.st_size)
+    with _line_index_lock:
+        cached = _line_index_cache.get(full)
+        if cached is not None and cached[0] == version:
+            _line_index_cache.move_to_end(full)
+            return cached[1]
+
+    offsets = array("Q", [0])
+    if st.st_size > 0:
+        with open(full, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = mm.find(b"\n")
+            while pos != -1:
+                offsets.append(pos + 1)
+                pos = mm.find(b"\n", pos + 1)
+        # Drop the phantom line after a trailing newline
+        if offsets[-1] == st.st_size and len(offsets) > 1:
+            offsets.pop()
+
+    with _line_index_lock:
+        _line_index_cache[full] = (version, offsets)
+        _line_index_cache.move_to_end(full)
+        while len(_line_index_cache) > _LINE_INDEX_CACHE_SIZE:
+            _line_index_cache.popitem(last=False)
+    return offsets
+
 
 @tool
-def read_file(path: str) -> str:
+def read_file(
+    path: str,
+    offset: Optional[int] = None,
+    limit: Optional[int] = None,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    max_bytes: int = READ_FILE_MAX_BYTES,
+) -> str:
     """
     Read a file from the sandbox and return its contents as a string.
+
+    - offset/limit: read `limit` bytes starting at byte `offset`.
+    - start_line/end_line: read an inclusive, 1-based line range.
+    - max_bytes: cap on returned bytes; larger reads end with a truncation marker
+      telling how to request the rest.
     """
     full = validate_path(path)
     if not os.path.exists(full):
         raise ValueError(f"Path does not exist: {path}")
     if not os.path.isfile(full):
         raise ValueError(f"Not a file: {path}")
+    if (offset is not None or limit is not None) and (start_line is not None or end_line is not None):
+        raise ValueError("Use either offset/limit or start_line/end_line, not both")
     try:
-        with open(full, "r", encoding="utf-8") as f:
-            return f.read()
+        st = os.stat(full)
+        size = st.st_size
+        if start_line is not None or end_line is not None:
+            index = _line_index(full, st)
+            total_lines = len(index) if size > 0 else 0
+            first = max(1, int(start_line or 1))
+            last = min(total_lines, int(end_line) if end_line is not None else total_lines)
+            if first > last:
+                return ""
+            begin = index[first - 1]
+            end = index[last] if last < total_lines else size
+        else:
+            begin = max(0, int(offset or 0))
+            end = size if limit is None else min(size, begin + max(0, int(limit)))
+            if begin >= end:
+                return ""
+
+        cap = max(0, int(max_bytes)) if max_bytes is not None else 0
+        stop = min(end, begin + cap) if cap else end
+        with open(full, "rb") as f:
+            f.seek(begin)
+            data = f.read(stop - begin)
+            if data.endswith(b"\r") and stop < size and f.read(1) == b"\n":
+                # keep a CRLF pair together when the range ends between them
+                data += b"\n"
+                stop += 1
+                end = max(end, stop)
+        # Newlines are normalised like a text-mode read, so content written back
+        # through write_file does not turn CRLF into CR CR LF
+        text = data.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+        if stop < end:
+            text += (
+                f"\n... [truncated: returned bytes {begin}-{stop} of {size}; "
+                f"use offset/limit or start_line/end_line to read more]"
+            )
+        return text
     except OSError as e:
         raise ValueError(f"Error reading file {path}: {e}")
 
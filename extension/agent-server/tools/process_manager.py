@@ -0,0 +1,202 @@
+"""Background process manager: tracks processes started by run_command(background=True)."""
+import os
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+# Lines of output kept per process; older lines are dropped
+RING_BUFFER_LINES = 2000
+# Longest single line kept in the ring buffer
+MAX_LINE_CHARS = 4000
+
+
+def new_process_group_kwargs() -> Dict[str, Any]:
+    """Popen kwargs that start the command in its own process group, so killing it reaches shell children."""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}  # type: ignore[attr-defined]
+    return {"start_new_session": True}
+
+
+def kill_process_tree(proc: subprocess.Popen, grace: float = 3.0) -> None:
+    """Terminate a process started with new_process_group_kwargs(), escalating to a hard kill after grace seconds."""
+    if proc.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            proc.send_signal(signal.CTRL_BREAK_EVENT)  # type: ignore[attr-defined]
+        else:
+            os.killpg(proc.pid, signal.SIGTERM)
+    except (OSError, ValueError):
+        proc.terminate()
+    try:
+        proc.wait(timeout=grace)
+        return
+    except subprocess.TimeoutExpired:
+        pass
+    try:
+        if os.name == "nt":
+            proc.kill()
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        pass
+    try:
+        proc.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+class _ManagedProcess:
+    def __init__(self, proc_id: str, command: str, proc: subprocess.Popen):
+        self.id = proc_id
+        self.command = command
+        self.proc = proc
+        self.started_at = time.time()
+        self.ended_at: Optional[float] = None
+        self.lines: deque = deque(maxlen=RING_BUFFER_LINES)
+        self.total_lines = 0
+        self.lock = threading.Lock()
+        self.reader: Optional[threading.Thread] = None
+
+    def drain(self) -> None:
+        """Reader thread body: move output into the ring buffer so the pipe never fills."""
+        stream = self.proc.stdout
+        try:
+            for line in iter(stream.readline, ""):
+                line = line.rstrip("\n")
+                if len(line) > MAX_LINE_CHARS:
+                    line = line[:MAX_LINE_CHARS] + " ...[line truncated]"
+                with self.lock:
+                    self.lines.append(line)
+                    self.total_lines += 1
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                stream.close()
+            except Exception:
+                pass
+            self.proc.wait()
+            self.ended_at = time.time()
+
+    def status(self) -> Dict[str, Any]:
+        code = self.proc.poll()
+        with self.lock:
+            total = self.total_lines
+            kept = len(self.lines)
+        return {
+            "id": self.id,
+            "pid": self.proc.pid,
+            "command": self.command,
+            "running": code is None,
+            "exit_code": code,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+            "output_lines": total,
+            "dropped_lines": total - kept,
+        }
+
+    def tail(self, lines: int) -> List[str]:
+        with self.lock:
+            if lines <= 0:
+                return []
+            return list(self.lines)[-lines:]
+
+
+class ProcessManager:
+    """
+    Start shell commands in the background and keep their output readable.
+
+    Output (stdout + stderr) is drained by a reader thread per process into a bounded
+    ring buffer, so chatty processes never block on a full pipe. Processes are
+    addressed by a short id and are killed on shutdown().
+    """
+
+    def __init__(self) -> None:
+        self._procs: Dict[str, _ManagedProcess] = {}
+        self._lock = threading.Lock()
+
+    def start(self, command: str, cwd: Optional[str] = None) -> Dict[str, Any]:
+        proc = subprocess.Popen(
+            command,
+            shell=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            bufsize=1,
+            cwd=cwd,
+            **new_process_group_kwargs(),
+        )
+        proc_id = uuid.uuid4().hex[:8]
+        mp = _ManagedProcess(proc_id, command, proc)
+        mp.reader = threading.Thread(target=mp.drain, name=f"proc-reader-{proc_id}", daemon=True)
+        mp.reader.start()
+        with self._lock:
+            self._procs[proc_id] = mp
+        return mp.status()
+
+    def _get(self, proc_id: str) -> _ManagedProcess:
+        with self._lock:
+            mp = self._procs.get(proc_id)
+        if mp is None:
+            raise ValueError(f"Unknown background process: {proc_id}")
+        return mp
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            procs = list(self._procs.values())
+        return [p.status() for p in procs]
+
+    def status(self, proc_id: str) -> Dict[str, Any]:
+        return self._get(proc_id).status()
+
+    def tail(self, proc_id: str, lines: int = 50) -> Dict[str, Any]:
+        mp = self._get(proc_id)
+        out = mp.status()
+        out["output"] = "\n".join(mp.tail(int(lines)))
+        return out
+
+    def wait(self, proc_id: str, timeout: float = 30.0) -> Dict[str, Any]:
+        """Wait up to timeout seconds for the process to exit; returns status with the output tail."""
+        mp = self._get(proc_id)
+        try:
+            mp.proc.wait(timeout=max(0.0, float(timeout)))
+        except subprocess.TimeoutExpired:
+            pass
+        if mp.reader is not None and mp.proc.poll() is not None:
+            # let the reader flush the last lines
+            mp.reader.join(timeout=1.0)
+        return self.tail(proc_id)
+
+    def kill(self, proc_id: str, grace: float = 3.0) -> Dict[str, Any]:
+        mp = self._get(proc_id)
+        kill_process_tree(mp.proc, grace)
+        return mp.status()
+
+    def shutdown(self) -> None:
+        """Kill every tracked process; called when the sidecar stops."""
+        with self._lock:
+            ids = list(self._procs.keys())
+        for proc_id in ids:
+            try:
+                self.kill(proc_id, grace=1.0)
+            except Exception:
+                pass
+
+
+_process_manager: Optional[ProcessManager] = None
+_process_manager_lock = threading.Lock()
+
+
+def get_process_manager() -> ProcessManager:
+    global _process_manager
+    with _process_manager_lock:
+        if _process_manager is None:
+            _process_manager = ProcessManager()
+        return _process_manager
@@ -0,0 +1,180 @@
+"""Persistent shell sessions so consecutive terminal commands of a task share cwd and environment."""
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional, Tuple
+
+from tools.process_manager import kill_process_tree, new_process_group_kwargs
+
+# Sessions unused for this long are closed the next time any session is requested
+SESSION_IDLE_SECONDS = 15 * 60
+
+
+def sessions_supported() -> bool:
+    """Sentinel framing relies on a POSIX shell; Windows falls back to one process per command."""
+    return os.name != "nt" and bool(shutil.which("bash") or shutil.which("sh"))
+
+
+class ShellSession:
+    """
+    One long-lived shell process. Each command is framed with unique sentinels on
+    stdout and stderr so its output and exit code can be told apart from the next one.
+    """
+
+    def __init__(self, cwd: Optional[str] = None):
+        shell = shutil.which("bash") or shutil.which("sh") or "/bin/sh"
+        self.proc = subprocess.Popen(
+            [shell],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+            bufsize=1,
+            cwd=cwd,
+            **new_process_group_kwargs(),
+        )
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+        self._lines: "queue.Queue[Tuple[str, Optional[str]]]" = queue.Queue()
+        for name, stream in (("stdout", self.proc.stdout), ("stderr", self.proc.stderr)):
+            t = threading.Thread(target=self._pump, args=(name, stream), name=f"shell-{name}", daemon=True)
+            t.start()
+
+    def _pump(self, name: str, stream) -> None:
+        try:
+            for line in iter(stream.readline, ""):
+                self._lines.put((name, line))
+        except (OSError, ValueError):
+            pass
+        self._lines.put((name, None))
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def run(self, command: str, timeout: float, on_line: Callable[[str, str], None]) -> Tuple[Optional[int], bool]:
+        """
+        Run command in the session, calling on_line(stream, line) for each output line.
+        Returns (exit_code, timed_out). On timeout or shell exit the session is closed.
+        """
+        token = uuid.uuid4().hex
+        end = f"__OSAE_END_{token}__"
+        # eval keeps cd/export effects in the shell, survives syntax errors, and
+        # reading from /dev/null stops the command from consuming our framing lines.
+        script = (
+            f"eval \"$(cat <<'__OSAE_CMD_{token}__'\n{command}\n__OSAE_CMD_{token}__\n)\" < /dev/null\n"
+            f"__osae_rc=$?\n"
+            f"printf '\\n{end} %d\\n' \"$__osae_rc\"\n"
+            f"printf '\\n{end}\\n' >&2\n"
+        )
+        with self.lock:
+            self.last_used = time.time()
+            try:
+                self.proc.stdin.write(script)
+                self.proc.stdin.flush()
+            except (OSError, ValueError):
+                self.close()
+                return self.proc.poll(), False
+
+            deadline = time.monotonic() + timeout
+            pending: Dict[str, Optional[str]] = {"stdout": None, "stderr": None}
+            finished = {"stdout": False, "stderr": False}
+            exit_code: Optional[int] = None
+            while not all(finished.values()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.close()
+                    return None, True
+                try:
+                    stream, line = self._lines.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if line is None:
+                    # the command exited the shell itself (e.g. `exit 3`)
+                    finished[stream] = True
+                    if pending[stream] is not None:
+                        on_line(stream, pending[stream])
+                        pending[stream] = None
+                    if all(finished.values()) or not self.alive:
+                        self.close()
+                        return self.proc.poll(), False
+                    continue
+                if line.startswith(end):
+                    finished[stream] = True
+                    if stream == "stdout":
+                        try:
+                            exit_code = int(line[len(end):].strip())
+                        except ValueError:
+                            exit_code = None
+                    # the framing printf starts with a newline: drop it from the last line
+                    prev = pending[stream]
+                    if prev is not None and prev != "\n":
+                        on_line(stream, prev[:-1] if prev.endswith("\n") else prev)
+                    pending[stream] = None
+                    continue
+                if pending[stream] is not None:
+                    on_line(stream, pending[stream])
+                pending[stream] = line
+            self.last_used = time.time()
+            return exit_code, False
+
+    def close(self) -> None:
+        try:
+            if self.proc.stdin:
+                self.proc.stdin.close()
+        except Exception:
+            pass
+        kill_process_tree(self.proc, grace=1.0)
+
+
+class ShellSessionManager:
+    """Registry of shell sessions keyed by session id (the task id)."""
+
+    def __init__(self) -> None:
+        self._sessions: Dict[str, ShellSession] = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str, cwd: Optional[str] = None) -> ShellSession:
+        now = time.time()
+        stale = []
+        with self._lock:
+            for sid, sess in list(self._sessions.items()):
+                if sid != session_id and now - sess.last_used > SESSION_IDLE_SECONDS:
+                    stale.append(self._sessions.pop(sid))
+            sess = self._sessions.get(session_id)
+            if sess is None or not sess.alive:
+                sess = ShellSession(cwd=cwd)
+                self._sessions[session_id] = sess
+        for s in stale:
+            s.close()
+        return sess
+
+    def close(self, session_id: str) -> None:
+        with self._lock:
+            sess = self._sessions.pop(session_id, None)
+        if sess is not None:
+            sess.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for s in sessions:
+            s.close()
+
+
+_shell_sessions: Optional[ShellSessionManager] = None
+_shell_sessions_lock = threading.Lock()
+
+
+def get_shell_sessions() -> ShellSessionManager:
+    global _shell_sessions
+    with _shell_sessions_lock:
+        if _shell_sessions is None:
+            _shell_sessions = ShellSessionManager()
+        return _shell_sessions
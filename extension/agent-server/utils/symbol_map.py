@@ -0,0 +1,232 @@
+import ast
+import hashlib
+import math
+import os
+import re
+import threading
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from utils.repo_map import get_repo_map_service
+
+PY_EXTS = {'.py'}
+JS_EXTS = {'.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx'}
+# Files larger than this are skipped; they are rarely hand-written sources
+MAX_FILE_BYTES = 512 * 1024
+
+_IDENT_RE = re.compile(r'[A-Za-z_$][A-Za-z0-9_$]{2,}')
+_WORD_RE = re.compile(r'[A-Za-z0-9]+')
+_JS_DEF_PATTERNS = [
+    re.compile(r'^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)\s*(\([^)]*\))?'),
+    re.compile(r'^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([A-Za-z_$][\w$]*)'),
+    re.compile(r'^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*(?::[^=]+)?=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*(?::[^=]+)?=>|[A-Za-z_$][\w$]*\s*=>)'),
+    re.compile(r'^\s*(?:export\s+)?interface\s+([A-Za-z_$][\w$]*)'),
+    re.compile(r'^\s*(?:export\s+)?type\s+([A-Za-z_$][\w$]*)\s*(?:<[^>]*>)?\s*='),
+    re.compile(r'^\s*(?:export\s+)?(?:const\s+)?enum\s+([A-Za-z_$][\w$]*)'),
+]
+
+
+class _FileSymbols:
+    __slots__ = ('names', 'lines', 'idents')
+
+    def __init__(self, names: List[str], lines: List[str], idents: FrozenSet[str]):
+        # defined symbol names and their rendered one-line signatures
+        self.names = names
+        self.lines = lines
+        # identifiers referenced anywhere in the file
+        self.idents = idents
+
+
+def _py_signature(node: ast.AST) -> str:
+    try:
+        args = ast.unparse(node.args)  # type: ignore[attr-defined]
+    except Exception:
+        args = '...'
+    prefix = 'async def' if isinstance(node, ast.AsyncFunctionDef) else 'def'
+    return f'{prefix} {node.name}({args})'
+
+
+def _extract_python(text: str) -> Tuple[List[str], List[str]]:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return [], []
+    names: List[str] = []
+    lines: List[str] = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            names.append(node.name)
+            lines.append(_py_signature(node))
+        elif isinstance(node, ast.ClassDef):
+            names.append(node.name)
+            lines.append(f'class {node.name}')
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and not item.name.startswith('__'):
+                    lines.append('    ' + _py_signature(item))
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id.isupper():
+                    names.append(target.id)
+                    lines.append(f'{target.id} = ...')
+    return names, lines
+
+
+def _extract_js(text: str) -> Tuple[List[str], List[str]]:
+    names: List[str] = []
+    lines: List[str] = []
+    for line in text.splitlines():
+        # only consider top-level-ish declarations to keep the map compact
+        if line[:1] in (' ', '\t') and not line.lstrip().startswith('export'):
+            continue
+        for pattern in _JS_DEF_PATTERNS:
+            m = pattern.match(line)
+            if m:
+                names.append(m.group(1))
+                lines.append(line.strip().rstrip('{').strip()[:160])
+                break
+    return names, lines
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _query_terms(query: str) -> FrozenSet[str]:
+    terms = set()
+    for word in _WORD_RE.findall(query or ''):
+        terms.add(word.lower())
+    for ident in _IDENT_RE.findall(query or ''):
+        terms.add(ident.lower())
+        # also split snake_case and camelCase identifiers
+        for part in re.split(r'_|(?<=[a-z0-9])(?=[A-Z])', ident):
+            if len(part) >= 3:
+                terms.add(part.lower())
+    return frozenset(terms)
+
+
+class SymbolMapService:
+    """
+    Render a repository map of top-level definitions, ranked by how often other
+    files reference them and by relevance to the current prompt, within a token budget.
+
+    Definitions use ast for Python and lightweight regexes for JS/TS. Results are
+    cached per file content hash; (mtime, size) is checked first to avoid rehashing.
+    """
+
+    def __init__(self):
+        # full path -> ((mtime_ns, size), content hash)
+        self._versions: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        # content hash -> extracted symbols
+        self._symbols: Dict[str, _FileSymbols] = {}
+        self._lock = threading.Lock()
+
+    def _file_symbols(self, full: str, ext: str) -> Optional[_FileSymbols]:
+        try:
+            st = os.stat(full)
+        except OSError:
+            return None
+        if st.st_size > MAX_FILE_BYTES:
+            return None
+        version = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            known = self._versions.get(full)
+            if known is not None and known[0] == version and known[1] in self._symbols:
+                return self._symbols[known[1]]
+        try:
+            with open(full, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        digest = hashlib.sha1(data).hexdigest()
+        with self._lock:
+            cached = self._symbols.get(digest)
+        if cached is None:
+            text = data.decode('utf-8', errors='ignore')
+            if ext in PY_EXTS:
+                names, lines = _extract_python(text)
+            else:
+                names, lines = _extract_js(text)
+            cached = _FileSymbols(names, lines, frozenset(_IDENT_RE.findall(text)))
+        with self._lock:
+            self._symbols[digest] = cached
+            self._versions[full] = (version, digest)
+        return cached
+
+    def _prune(self, root_abs: str, listed: set) -> None:
+        """Forget files under root_abs that were deleted or are now ignored, and symbols no file uses."""
+        prefix = root_abs.rstrip(os.sep) + os.sep
+        with self._lock:
+            for stale in [p for p in self._versions if p.startswith(prefix) and p not in listed]:
+                del self._versions[stale]
+            live = {digest for _, digest in self._versions.values()}
+            for digest in [d for d in self._symbols if d not in live]:
+                del self._symbols[digest]
+
+    def generate(self, root_path: str, query: str = '', token_budget: int = 2048) -> str:
+        if not os.path.exists(root_path):
+            return f"Path not found: {root_path}"
+        root_abs = os.path.abspath(root_path)
+
+        files: Dict[str, _FileSymbols] = {}
+        listed = set()
+        for rel in get_repo_map_service().list_files(root_abs, respect_gitignore=True):
+            ext = os.path.splitext(rel)[1].lower()
+            if ext not in PY_EXTS and ext not in JS_EXTS:
+                continue
+            full = os.path.join(root_abs, rel)
+            listed.add(full)
+            syms = self._file_symbols(full, ext)
+            if syms is not None and syms.lines:
+                files[rel] = syms
+        self._prune(root_abs, listed)
+
+        # Reference graph: a file scores for each other file that uses one of its symbols
+        defined_by: Dict[str, List[str]] = {}
+        for rel, syms in files.items():
+            for name in syms.names:
+                defined_by.setdefault(name, []).append(rel)
+        refs: Dict[str, int] = {rel: 0 for rel in files}
+        for rel, syms in files.items():
+            for name in syms.idents.intersection(defined_by):
+                for owner in defined_by[name]:
+                    if owner != rel:
+                        refs[owner] += 1
+
+        terms = _query_terms(query)
+
+        def score(rel: str) -> float:
+            syms = files[rel]
+            relevance = 0
+            if terms:
+                relevance += 3 * sum(1 for part in _WORD_RE.findall(rel) if part.lower() in terms)
+                relevance += 5 * sum(1 for name in syms.names if name.lower() in terms)
+            return 10 * relevance + math.log1p(refs[rel])
+
+        ranked = sorted(files, key=lambda r: (-score(r), r))
+
+        root_name = os.path.basename(root_abs) or root_path
+        out: List[str] = [root_name + '/ (top-level definitions, most relevant first)']
+        used = _estimate_tokens(out[0])
+        omitted = 0
+        for rel in ranked:
+            block = rel + ':\n' + '\n'.join('  ' + line for line in files[rel].lines)
+            cost = _estimate_tokens(block)
+            if used + cost > token_budget:
+                # skip files that do not fit; smaller lower-ranked files may still fit
+                omitted += 1
+                continue
+            out.append(block)
+            used += cost
+        if omitted:
+            out.append(f'... ({omitted} more files omitted to fit the token budget)')
+        return '\n'.join(out)
+
+
+_default_service = SymbolMapService()
+
+
+def generate_symbol_map(root_path: str, query: str = '', token_budget: int = 2048) -> str:
+    """
+    Generate a map of top-level definitions per source file, ranked by reference
+    count and relevance to `query`, rendered within roughly `token_budget` tokens.
+    """
+    return _default_service.generate(root_path, query=query, token_budget=token_budget)
@@ -0,0 +1,341 @@
+"""
+Source chunking for the RAG server.
+
+Kept free of Chroma and Ollama imports so index_codebase can run read_and_chunk
+in worker processes.
+"""
+
+import ast
+import bisect
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Helper: safe read file
+def _read_text_file(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8", errors="ignore")
+    except Exception:
+        # Try binary decode fallback
+        try:
+            with open(path, "rb") as f:
+                return f.read().decode("utf-8", errors="ignore")
+        except Exception:
+            return ""
+
+# Helper: NUL bytes near the start mean a binary file the extension list missed
+def _looks_binary(text: str) -> bool:
+    return "\x00" in text[:8192]
+
+# Helper: basic language detection from extension
+def _lang_from_path(path: Path) -> str:
+    return path.suffix.lstrip(".").lower() or "text"
+
+# Chunking logic:
+# - Split source into definition units: `ast` for Python, per-language regexes otherwise
+# - Pack adjacent small units up to CHUNK_TOKENS, so chunks fit the embedding context
+# - Split oversized units into line windows that overlap by CHUNK_OVERLAP_TOKENS
+# Tokens are estimated as characters / 4.
+CHUNK_TOKENS = int(os.getenv("RAG_CHUNK_TOKENS", "384"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("RAG_CHUNK_OVERLAP_TOKENS", "48"))
+CHARS_PER_TOKEN = 4
+
+_JS_DEFS = [
+    r'^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)',
+    r'^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([A-Za-z_$][\w$]*)',
+    r'^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*(?::[^=]+)?=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*(?::[^=]+)?=>|[A-Za-z_$][\w$]*\s*=>)',
+    r'^\s*(?:export\s+)?(?:interface|enum|namespace)\s+([A-Za-z_$][\w$]*)',
+    r'^\s*(?:export\s+)?type\s+([A-Za-z_$][\w$]*)\s*(?:<[^>]*>)?\s*=',
+    r'^\s+(?:(?:public|private|protected|static|async|readonly|override|get|set)\s+)*([A-Za-z_$][\w$]*)\s*\([^)]*\)\s*(?::[^{]+)?\{\s*$',
+]
+_C_FAMILY_DEFS = [
+    r'^\s*(?:(?:public|private|protected|internal|static|final|abstract|sealed|partial)\s+)*(?:class|interface|enum|struct|record)\s+(\w+)',
+    r'^\s*(?:(?:public|private|protected|internal|static|final|abstract|synchronized|virtual|override|async|inline|extern|const|unsigned)\s+)*[\w:<>\[\],*&]+(?:\s+[\w:<>\[\],*&]+)*\s+\**(\w+)\s*\([^;]*$',
+]
+_LANG_DEFS = {
+    "js": _JS_DEFS,
+    "go": [r'^func\s+(?:\([^)]*\)\s*)?(\w+)', r'^type\s+(\w+)'],
+    "rs": [
+        r'^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?(?:const\s+)?fn\s+(\w+)',
+        r'^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait|mod)\s+(\w+)',
+        r'^impl(?:<[^>]*>)?\s+(?:[\w:<>]+\s+for\s+)?([\w:]+)',
+    ],
+    "c": _C_FAMILY_DEFS,
+    "rb": [r'^\s*(?:def|class|module)\s+([\w.:?!]+)'],
+    "php": [r'^\s*(?:(?:public|private|protected|static|abstract|final)\s+)*function\s+(\w+)', r'^\s*(?:abstract\s+|final\s+)?(?:class|interface|trait)\s+(\w+)'],
+    "md": [r'^#{1,6}\s+(.+?)\s*#*\s*$'],
+}
+_EXT_GRAMMAR = {
+    "js": "js", "jsx": "js", "mjs": "js", "cjs": "js", "ts": "js", "tsx": "js",
+    "go": "go", "rs": "rs", "rb": "rb", "php": "php", "md": "md", "markdown": "md",
+    "java": "c", "cs": "c", "kt": "c", "scala": "c", "swift": "c",
+    "c": "c", "h": "c", "cc": "c", "cpp": "c", "cxx": "c", "hpp": "c", "hh": "c",
+}
+_GRAMMARS = {key: [re.compile(p) for p in pats] for key, pats in _LANG_DEFS.items()}
+# Words the method patterns must not mistake for definitions
+_NOT_DEFS = {"if", "for", "while", "switch", "catch", "return", "else", "do", "try", "new", "sizeof", "with", "elif", "function"}
+_COMMENT_PREFIXES = ("#", "//", "/*", "*", "@", "--", "///")
+
+
+class _Lines:
+    """Lines of one file with prefix character counts for O(1) token estimates of line ranges."""
+
+    def __init__(self, text: str):
+        self.lines = text.splitlines()
+        self.cum = [0]
+        for line in self.lines:
+            self.cum.append(self.cum[-1] + len(line) + 1)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def tokens(self, start: int, end: int) -> int:
+        """Estimated tokens of 1-based inclusive line range [start, end]."""
+        return max(1, (self.cum[end] - self.cum[start - 1]) // CHARS_PER_TOKEN)
+
+    def text(self, start: int, end: int) -> str:
+        return "\n".join(self.lines[start - 1:end])
+
+
+def _leading_comment_start(lines: List[str], start: int) -> int:
+    """Move a definition's first line (1-based) up over directly preceding comments and decorators."""
+    while start > 1:
+        prev = lines[start - 2].strip()
+        if not prev or not prev.startswith(_COMMENT_PREFIXES):
+            break
+        start -= 1
+    return start
+
+
+def _python_units(doc: _Lines, text: str, target: int) -> Optional[List[Tuple[int, int, List[str]]]]:
+    """Definition units (start, end, symbols) from the Python AST; None if the file does not parse."""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    units: List[Tuple[int, int, List[str]]] = []
+
+    def first_line(node: ast.AST) -> int:
+        decorators = getattr(node, "decorator_list", None) or []
+        return min([node.lineno] + [d.lineno for d in decorators])
+
+    def visit(node: ast.AST, prefix: str) -> None:
+        start = _leading_comment_start(doc.lines, first_line(node))
+        end = getattr(node, "end_lineno", None) or start
+        name = prefix + node.name
+        members = [n for n in getattr(node, "body", []) if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))]
+        if isinstance(node, ast.ClassDef) and members and doc.tokens(start, end) > target:
+            # large class: the header (docstring, attributes) and each method become units
+            header_end = _leading_comment_start(doc.lines, first_line(members[0])) - 1
+            if header_end >= start:
+                units.append((start, header_end, [name]))
+            for member in members:
+                visit(member, name + ".")
+            return
+        units.append((start, end, [name]))
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            visit(node, "")
+    return units
+
+
+def _regex_units(doc: _Lines, grammar: List["re.Pattern[str]"], attach_comments: bool = True) -> List[Tuple[int, int, List[str]]]:
+    """Definition units from per-language regexes: each match starts a unit ending before the next."""
+    starts: List[Tuple[int, str]] = []
+    for i, line in enumerate(doc.lines, 1):
+        for pattern in grammar:
+            m = pattern.match(line)
+            if m and m.group(1) not in _NOT_DEFS:
+                start = _leading_comment_start(doc.lines, i) if attach_comments else i
+                starts.append((start, m.group(1).strip()))
+                break
+    units: List[Tuple[int, int, List[str]]] = []
+    for idx, (start, name) in enumerate(starts):
+        if units and start <= units[-1][0]:
+            continue
+        end = starts[idx + 1][0] - 1 if idx + 1 < len(starts) else len(doc)
+        units.append((start, max(start, end), [name]))
+    return units
+
+
+def _fill_gaps(units: List[Tuple[int, int, List[str]]], total: int) -> List[Tuple[int, int, List[str]]]:
+    """Sort units and add symbol-less units for uncovered lines (imports, module code)."""
+    out: List[Tuple[int, int, List[str]]] = []
+    line = 1
+    for start, end, symbols in sorted(units, key=lambda u: u[0]):
+        start = max(start, line)
+        if start > end:
+            continue
+        if start > line:
+            out.append((line, start - 1, []))
+        out.append((start, end, symbols))
+        line = end + 1
+    if line <= total:
+        out.append((line, total, []))
+    return out
+
+
+def _windows(doc: _Lines, start: int, end: int, target: int, overlap: int) -> List[Tuple[int, int]]:
+    """Split [start, end] into line windows of about target tokens, overlapping by about overlap tokens."""
+    out: List[Tuple[int, int]] = []
+    i = start
+    while i <= end:
+        j = bisect.bisect_right(doc.cum, doc.cum[i - 1] + target * CHARS_PER_TOKEN) - 1
+        j = min(max(j, i), end)
+        out.append((i, j))
+        if j >= end:
+            break
+        k = bisect.bisect_left(doc.cum, doc.cum[j] - overlap * CHARS_PER_TOKEN) + 1
+        i = j + 1 if k > j else max(i + 1, k)
+    return out
+
+
+def _make_chunk(doc: _Lines, start: int, end: int, symbols: List[str], target: int) -> Dict[str, Any]:
+    text = doc.text(start, end)
+    # a single huge line (minified code) would still blow the embedding context
+    limit = target * CHARS_PER_TOKEN * 2
+    if len(text) > limit:
+        text = text[:limit]
+    return {"start": start, "end": end, "text": text, "symbols": symbols}
+
+
+def chunk_file_by_defs(text: str, lang: str = "", target_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Split a source file into chunks of about target_tokens tokens along definition
+    boundaries. Returns dicts: {'start': int, 'end': int, 'text': str, 'symbols': [str]}
+    with 1-based inclusive line numbers. Files without a known grammar fall back to
+    overlapping line windows.
+    """
+    target = max(16, target_tokens or CHUNK_TOKENS)
+    overlap = max(0, min(overlap_tokens if overlap_tokens is not None else CHUNK_OVERLAP_TOKENS, target // 2))
+    doc = _Lines(text)
+    if not doc.lines:
+        return []
+
+    units: Optional[List[Tuple[int, int, List[str]]]] = None
+    if lang in ("py", "pyi", "pyw"):
+        units = _python_units(doc, text, target)
+    elif lang in _EXT_GRAMMAR:
+        grammar = _EXT_GRAMMAR[lang]
+        # markdown headings start with '#', which is not a comment there
+        units = _regex_units(doc, _GRAMMARS[grammar], attach_comments=grammar != "md")
+    if not units:
+        return chunk_text_generic(text, target, overlap)
+
+    chunks: List[Dict[str, Any]] = []
+    cur: Optional[List[Any]] = None  # [start, end, symbols]
+    for start, end, symbols in _fill_gaps(units, len(doc)):
+        size = doc.tokens(start, end)
+        if size > target:
+            if cur is not None:
+                chunks.append(_make_chunk(doc, cur[0], cur[1], cur[2], target))
+                cur = None
+            for ws, we in _windows(doc, start, end, target, overlap):
+                chunks.append(_make_chunk(doc, ws, we, list(symbols), target))
+            continue
+        if cur is not None and doc.tokens(cur[0], end) > target:
+            chunks.append(_make_chunk(doc, cur[0], cur[1], cur[2], target))
+            cur = None
+        if cur is None:
+            cur = [start, end, list(symbols)]
+        else:
+            cur[1] = end
+            cur[2].extend(sym for sym in symbols if sym not in cur[2])
+    if cur is not None:
+        chunks.append(_make_chunk(doc, cur[0], cur[1], cur[2], target))
+    return chunks
+
+
+def chunk_text_generic(text: str, target_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+    target = max(16, target_tokens or CHUNK_TOKENS)
+    overlap = max(0, min(overlap_tokens if overlap_tokens is not None else CHUNK_OVERLAP_TOKENS, target // 2))
+    doc = _Lines(text)
+    if not doc.lines:
+        return []
+    return [_make_chunk(doc, s, e, [], target) for s, e in _windows(doc, 1, len(doc), target, overlap)]
+
+
+SKIP_DIRS = {".git", ".cache", "__pycache__", "node_modules", ".venv", "venv"}
+BINARY_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".exe", ".dll", ".so", ".bin"}
+
+
+def iter_source_files(root: Path) -> Iterator[Tuple[Path, bool]]:
+    """Yield (path, is_binary) for every file under root, skipping common large or irrelevant directories."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for fname in filenames:
+            fpath = Path(dirpath) / fname
+            # skip binary-ish by extension heuristics
+            yield fpath, fpath.suffix.lower() in BINARY_EXTS
+
+
+def read_and_chunk(path: str, root: str) -> Dict[str, Any]:
+    """
+    Read and chunk one file for indexing (runs in a worker process).
+    Returns {'chunks': [(document, metadata)], 'busy_s': float}; chunks is empty for skipped files.
+    """
+    t0 = time.perf_counter()
+    fpath = Path(path)
+    text = _read_text_file(fpath)
+    out: List[Tuple[str, Dict[str, Any]]] = []
+    if text.strip() and not _looks_binary(text):
+        lang = _lang_from_path(fpath)
+        rel = str(fpath.relative_to(root)) if fpath.is_relative_to(root) else str(fpath)
+        for chunk in chunk_file_by_defs(text, lang):
+            doc_text = chunk["text"].strip()
+            if not doc_text:
+                continue
+            out.append((doc_text, {
+                "path": rel,
+                "full_path": str(fpath),
+                "start_line": int(chunk["start"]),
+                "end_line": int(chunk["end"]),
+                "language": lang,
+                # Chroma metadata values must be scalars
+                "symbols": ", ".join(chunk["symbols"]),
+            }))
+    return {"chunks": out, "busy_s": time.perf_counter() - t0}
+
+
+def benchmark_chunking(root_path: str, target_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """Chunk every file under root_path without embedding and report throughput and chunk sizes."""
+    root = Path(root_path)
+    files = 0
+    total_bytes = 0
+    sizes: List[int] = []
+    with_symbols = 0
+    read_s = 0.0
+    chunk_s = 0.0
+    for fpath, is_binary in iter_source_files(root):
+        if is_binary:
+            continue
+        t0 = time.perf_counter()
+        text = _read_text_file(fpath)
+        t1 = time.perf_counter()
+        if _looks_binary(text):
+            continue
+        chunks = chunk_file_by_defs(text, _lang_from_path(fpath), target_tokens, overlap_tokens) if text.strip() else []
+        t2 = time.perf_counter()
+        read_s += t1 - t0
+        chunk_s += t2 - t1
+        files += 1
+        total_bytes += len(text)
+        for chunk in chunks:
+            sizes.append(max(1, len(chunk["text"]) // CHARS_PER_TOKEN))
+            with_symbols += bool(chunk["symbols"])
+    sizes.sort()
+    return {
+        "files": files,
+        "mb": round(total_bytes / 1e6, 2),
+        "chunks": len(sizes),
+        "chunks_with_symbols": with_symbols,
+        "read_s": round(read_s, 3),
+        "chunk_s": round(chunk_s, 3),
+        "files_per_s": round(files / chunk_s, 1) if chunk_s else None,
+        "mb_per_s": round(total_bytes / 1e6 / chunk_s, 2) if chunk_s else None,
+        "tokens_p50": sizes[len(sizes) // 2] if sizes else 0,
+        "tokens_max": sizes[-1] if sizes else 0,
+    }
@@ -1,74 +1,55 @@
 #!/usr/bin/env python3
 """
 Test runner for MCP dummy server using McpManager bridge.
+
+    python scripts/test_mcp_integration.py            # discovery / concurrency check
+    python scripts/test_mcp_integration.py --bench --output before.json
+    python scripts/test_mcp_integration.py --bench --compare before.json
+
+--bench measures connect time, list_tools latency, echo latency (p50/p95/p99) and
+calls per second at several concurrency levels, payload sizes and batching, and
+writes the results as JSON. Run it before and after every transport change.
 """
 import sys
 import os
 import time
 import json
 import types
+import argparse
+import platform
+import threading
 import subprocess
 import importlib.util
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 # Paths
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 MCP_CLIENT_PATH = os.path.join(ROOT, "agent-server", "mcp_client.py")
 DUMMY_SERVER_PATH = os.path.join(ROOT, "agent-server", "mcp_dummy_server.py")
 
-# Minimal mcp shim that implements stdio_client and ClientSession used by McpManager
+# Minimal mcp shim: stdio_client/ClientSession backed by McpManager's own
+# multiplexed JSON-RPC transport (imported lazily, after mcp_client is loaded)
 class _StdioClientCM:
     def __init__(self, proc: subprocess.Popen):
         self.proc = proc
+        self.transport = None
 
     def __enter__(self):
-        return _StdioTransport(self.proc)
+        self.transport = mcp_client.JsonRpcStdioTransport(self.proc)
+        return self.transport
 
     def __exit__(self, exc_type, exc, tb):
-        # no-op
+        if self.transport is not None:
+            self.transport.close()
         return False
 
-class _StdioTransport:
-    def __init__(self, proc: subprocess.Popen):
-        self.proc = proc
-        self._id = 0
-
-    def call_rpc(self, method: str, params: Dict[str, Any]):
-        self._id += 1
-        payload = {"jsonrpc": "2.0", "id": self._id, "method": method, "params": params}
-        line = json.dumps(payload, separators=(",", ":")) + "\n"
-        try:
-            # write as text to subprocess stdin
-            self.proc.stdin.write(line)
-            self.proc.stdin.flush()
-        except Exception as exc:
-            raise RuntimeError(f"Failed to write to subprocess stdin: {exc}")
-        # Read a single line response
-        out_line = self.proc.stdout.readline()
-        if not out_line:
-            raise RuntimeError("No response from MCP server (EOF)")
-        try:
-            resp = json.loads(out_line)
-        except json.JSONDecodeError as exc:
-            raise RuntimeError(f"Invalid JSON response: {exc}")
-        if "error" in resp:
-            raise RuntimeError(f"RPC error: {resp['error']}")
-        return resp.get("result")
-
-class _ClientSession:
-    def __init__(self, transport: _StdioTransport):
-        self._transport = transport
-
-    def call(self, method: str, params: Dict[str, Any]):
-        return self._transport.call_rpc(method, params)
-
-    def list_tools(self):
-        return self.call("mcp.list_tools", {})
+def _client_session(transport):
+    return mcp_client.JsonRpcSession(transport)
 
 # Insert shim into sys.modules before loading mcp_client so imports resolve to this shim
 m = types.ModuleType("mcp")
 m.stdio_client = lambda proc: _StdioClientCM(proc)
-m.ClientSession = _ClientSession
+m.ClientSession = _client_session
 sys.modules["mcp"] = m
 
 # Load mcp_client module from file so it picks up our shim
@@ -77,8 +58,200 @@ mcp_client = importlib.util.module_from_spec(spec)
 sys.modules["mcp_client"] = mcp_client
 spec.loader.exec_module(mcp_client)  # type: ignore
 
+def _percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(samples)
+
+    def pct(q: float) -> Optional[float]:
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {"p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+
+def _run_load(mgr, tool: str, args: Dict[str, Any], calls: int, concurrency: int) -> Dict[str, Any]:
+    """Issue `calls` blocking calls from `concurrency` threads; return latency percentiles and throughput."""
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    remaining = [calls]
+
+    def worker():
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                mgr.call_tool(tool, args)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            elapsed = (time.perf_counter() - started) * 1000.0
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    out = {"concurrency": concurrency, "calls": calls, "errors": errors[0]}
+    out.update(_percentiles(latencies))
+    out["calls_per_sec"] = round(len(latencies) / wall, 1) if wall > 0 else None
+    return out
+
+def run_benchmark(args) -> Dict[str, Any]:
+    mgr = mcp_client.get_global_manager()
+    results: Dict[str, Any] = {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+    connect_ms: List[float] = []
+    for i in range(args.connects):
+        name = f"bench-connect-{i}"
+        started = time.perf_counter()
+        mgr.connect_to_server(name, sys.executable, [DUMMY_SERVER_PATH])
+        connect_ms.append((time.perf_counter() - started) * 1000.0)
+        mgr.disconnect_server(name)
+    results["connect"] = dict(_percentiles(connect_ms), runs=args.connects)
+
+    mgr.connect_to_server("dummy", sys.executable, [DUMMY_SERVER_PATH])
+    try:
+        results["transport"] = type(mgr._servers["dummy"]["session"]).__name__
+
+        list_ms: List[float] = []
+        for _ in range(args.list_calls):
+            started = time.perf_counter()
+            mgr.refresh_tools("dummy")
+            list_ms.append((time.perf_counter() - started) * 1000.0)
+        results["list_tools"] = dict(_percentiles(list_ms), runs=args.list_calls)
+
+        mgr.call_tool("dummy:dummy.echo", {"warmup": True})
+        results["echo_concurrency"] = []
+        for c in args.concurrency:
+            results["echo_concurrency"].append(_run_load(mgr, "dummy:dummy.echo", {"data": "x" * 100}, args.calls, c))
+
+        results["echo_payload"] = []
+        for size in args.payload_sizes:
+            # fewer iterations for large payloads: about 50 MB per size, at least 3 calls
+            calls = max(3, min(args.calls, int(50e6 // max(size, 1))))
+            row = _run_load(mgr, "dummy:dummy.echo", {"data": "x" * size}, calls, 1)
+            row["payload_bytes"] = size
+            row["mb_per_sec"] = round(row["calls_per_sec"] * size * 2 / 1e6, 2) if row["calls_per_sec"] else None
+            results["echo_payload"].append(row)
+
+        batch = [("dummy:dummy.echo", {"i": i}) for i in range(args.batch_size)]
+        started = time.perf_counter()
+        for call in batch:
+            mgr.call_tool(*call)
+        sequential_ms = (time.perf_counter() - started) * 1000.0
+        started = time.perf_counter()
+        mgr.call_many(batch)
+        batched_ms = (time.perf_counter() - started) * 1000.0
+        results["batch"] = {
+            "calls": args.batch_size,
+            "sequential_ms": round(sequential_ms, 3),
+            "call_many_ms": round(batched_ms, 3),
+        }
+    finally:
+        mgr.shutdown()
+    return results
+
+def _compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print p50 and throughput deltas against a previous result file."""
+    def delta(new, old):
+        if new is None or old in (None, 0):
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    print(f"Comparing against {baseline.get('label') or baseline.get('timestamp')}:", file=sys.stderr)
+    for key in ("connect", "list_tools"):
+        print(f"  {key} p50: {current[key]['p50_ms']} ms ({delta(current[key]['p50_ms'], baseline.get(key, {}).get('p50_ms'))})", file=sys.stderr)
+    old_rows = {r["concurrency"]: r for r in baseline.get("echo_concurrency", [])}
+    for row in current["echo_concurrency"]:
+        old = old_rows.get(row["concurrency"], {})
+        print(
+            f"  echo c={row['concurrency']}: p50 {row['p50_ms']} ms ({delta(row['p50_ms'], old.get('p50_ms'))}), "
+            f"{row['calls_per_sec']} calls/s ({delta(row['calls_per_sec'], old.get('calls_per_sec'))})",
+            file=sys.stderr,
+        )
+    old_rows = {r["payload_bytes"]: r for r in baseline.get("echo_payload", [])}
+    for row in current["echo_payload"]:
+        old = old_rows.get(row["payload_bytes"], {})
+        print(f"  payload {row['payload_bytes']} B: p50 {row['p50_ms']} ms ({delta(row['p50_ms'], old.get('p50_ms'))})", file=sys.stderr)
+
+def _int_list(text: str) -> List[int]:
+    return [int(float(x)) for x in text.split(",") if x.strip()]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bench", action="store_true", help="run the latency/throughput benchmark")
+    parser.add_argument("--output", help="write benchmark results to this JSON file (default: stdout)")
+    parser.add_argument("--compare", help="previous results JSON to print deltas against")
+    parser.add_argument("--label", default="", help="free-form label stored with the results")
+    parser.add_argument("--calls", type=int, default=500, help="echo calls per measurement")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 2, 4, 8, 16], help="comma-separated levels")
+    parser.add_argument("--payload-sizes", type=_int_list, default=[100, 10_000, 1_000_000, 10_000_000],
+                        help="comma-separated echo payload sizes in bytes")
+    parser.add_argument("--connects", type=int, default=5, help="connect/disconnect cycles to time")
+    parser.add_argument("--list-calls", type=int, default=50, help="list_tools round trips to time")
+    parser.add_argument("--batch-size", type=int, default=50, help="calls compared sequentially vs call_many")
+    return parser.parse_args(argv)
+
+def bench_main(args) -> int:
+    try:
+        results = run_benchmark(args)
+    except Exception as exc:
+        print(f"Benchmark failed: {exc}", file=sys.stderr)
+        return 1
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            _compare(results, json.load(f))
+    return 0
+
+def check_mixed_batch_routing(mgr) -> bool:
+    """A call_many batch mixing read-only and write tools must run on the pool's first instance."""
+    report = mgr.connect_servers([{
+        "name": "rw",
+        "command": sys.executable,
+        "args": [DUMMY_SERVER_PATH],
+        "replicas": 3,
+        "read_only_tools": ["dummy.ping"],
+    }])
+    if not all(r["ok"] for r in report.values()):
+        print(f"replica pool failed to start: {report}", file=sys.stderr)
+        return False
+    try:
+        for i in range(6):
+            mgr.call_many([("rw:dummy.ping", {}), ("rw:dummy.echo", {"i": i})])
+        metrics = mgr.metrics()
+        echo_on = sorted(n for n, m in metrics.items() if n.startswith("rw#") and "dummy.echo" in m["tools"])
+        ok = echo_on == ["rw#0"]
+        print(f"mixed read/write batches ran on {echo_on}: {'ok' if ok else 'FAIL (writes must only go to rw#0)'}")
+        return ok
+    finally:
+        try:
+            mgr.disconnect_server("rw")
+        except Exception:
+            pass
+
 def main():
     mgr = mcp_client.get_global_manager()
+    failed = False
 
     print("Starting connection to dummy MCP server...")
     try:
@@ -87,21 +260,30 @@ def main():
         print(f"connect_to_server failed: {exc}", file=sys.stderr)
         return 1
 
-    time.sleep(0.1)
-
     try:
         tools = mgr.list_tools()
         print("Discovered tools (server -> tools):")
         print(json.dumps(tools, indent=2))
+
+        # Several calls in flight on the one pipe: total time ~ the slowest call, not the sum
+        started = time.monotonic()
+        futures = [mgr.submit_call("dummy:dummy.sleep", {"seconds": 0.5}) for _ in range(4)]
+        results = [f.result(10) for f in futures]
+        elapsed = time.monotonic() - started
+        print(f"4 concurrent calls of 0.5s finished in {elapsed:.2f}s: {results}")
+
+        failed = not check_mixed_batch_routing(mgr)
     except Exception as exc:
-        print(f"Listing tools failed: {exc}", file=sys.stderr)
+        print(f"MCP calls failed: {exc}", file=sys.stderr)
+        failed = True
     finally:
         try:
             mgr.disconnect_server("dummy")
         except Exception:
             pass
         mgr.shutdown()
-    return 0
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    _args = parse_args()
+    sys.exit(bench_main(_args) if _args.bench else main())
\ No newline at end of file
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Regression checks for the unified-diff applier in agent-server/tools/patch.py.
+
+    python scripts/test_patch.py
+
+Exits non-zero if any check fails.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "agent-server"))
+
+from tools.patch import _FileState, _apply_hunks, _parse_unified_diff  # noqa: E402
+
+
+def _apply(content: str, patch: str) -> str:
+    with tempfile.TemporaryDirectory() as tmp:
+        full = os.path.join(tmp, "f.txt")
+        with open(full, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        st = _FileState("f.txt", full)
+        _apply_hunks(st, _parse_unified_diff(patch)[0]["hunks"])
+        return st.content or ""
+
+
+def _rejects(content: str, patch: str) -> bool:
+    try:
+        _apply(content, patch)
+    except ValueError:
+        return True
+    return False
+
+
+def main() -> int:
+    base = "l1\nl2\nl3\n"
+    header = "--- a/f.txt\n+++ b/f.txt\n"
+    checks = [
+        # diff -U0 insertion: "-2,0" means after line 2
+        ("zero-context insert after line 2",
+         _apply(base, header + "@@ -2,0 +3,1 @@\n+NEW\n") == "l1\nl2\nNEW\nl3\n"),
+        ("zero-context insert at the top",
+         _apply(base, header + "@@ -0,0 +1 @@\n+NEW\n") == "NEW\nl1\nl2\nl3\n"),
+        ("zero-context insert at the end",
+         _apply(base, header + "@@ -3,0 +4,2 @@\n+a\n+b\n") == "l1\nl2\nl3\na\nb\n"),
+        ("two insertions shift later hunks",
+         _apply(base, header + "@@ -1,0 +2 @@\n+x\n@@ -2,0 +4 @@\n+y\n") == "l1\nx\nl2\ny\nl3\n"),
+        ("context hunk still applies",
+         _apply(base, header + "@@ -1,3 +1,3 @@\n l1\n-l2\n+L2\n l3\n") == "l1\nL2\nl3\n"),
+        ("blank line after a complete hunk is ignored",
+         _apply(base, header + "@@ -2 +2 @@\n-l2\n+L2\n\n") == "l1\nL2\nl3\n"),
+        ("truncated hunk is rejected",
+         _rejects(base, header + "@@ -1,3 +1,3 @@\n l1\n-l2\n+L2\n")),
+        ("hunk with extra lines is rejected",
+         _rejects(base, header + "@@ -2,1 +2,1 @@\n-l2\n+L2\n+L3\n")),
+    ]
+    failed = [name for name, ok in checks if not ok]
+    for name, ok in checks:
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())